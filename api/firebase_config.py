@@ -1,13 +1,16 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
+import importlib
 import os
 
+def _sdk(module='firebase_admin'):
+    # The Admin SDK is imported on first use so cold starts don't pay for it
+    return importlib.import_module(module)
+
 # Initialize Firebase Admin SDK
 def initialize_firebase():
     try:
         # Use the service account key file
-        cred = credentials.Certificate('firebase-service-account.json')
-        firebase_admin.initialize_app(cred)
+        cred = _sdk('firebase_admin.credentials').Certificate('firebase-service-account.json')
+        _sdk().initialize_app(cred)
         print("Firebase initialized successfully")
         return True
     except Exception as e:
@@ -16,12 +19,12 @@ def initialize_firebase():
 
 # Get Firestore database instance
 def get_db():
-    return firestore.client()
+    return _sdk('firebase_admin.firestore').client()
 
 # User authentication functions
 def create_user(email, password, display_name):
     try:
-        user = auth.create_user(
+        user = _sdk('firebase_admin.auth').create_user(
             email=email,
             password=password,
             display_name=display_name
@@ -36,7 +39,7 @@ def verify_user_credentials(email, password):
     try:
         # For Firebase Admin SDK, we need to verify the user exists
         # and then validate the password (this is a simplified approach)
-        user = auth.get_user_by_email(email)
+        user = _sdk('firebase_admin.auth').get_user_by_email(email)
         if user:
             # In a real implementation, you'd verify the password
             # For now, we'll return the user if they exist
@@ -52,7 +55,7 @@ def verify_user_credentials(email, password):
 
 def verify_user_token(token):
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = _sdk('firebase_admin.auth').verify_id_token(token)
         return decoded_token['uid']
     except Exception as e:
         print(f"Error verifying token: {e}")
@@ -62,7 +65,7 @@ def verify_user_token(token):
 def save_job_to_firebase(job_data, user_id=None):
     db = get_db()
     try:
-        job_data['created_at'] = firestore.SERVER_TIMESTAMP
+        job_data['created_at'] = _sdk('firebase_admin.firestore').SERVER_TIMESTAMP
         job_data['user_id'] = user_id
         job_data['status'] = 'active'
         
@@ -151,14 +154,14 @@ def mark_job_applied(job_id, user_id):
     try:
         # Add to user's applied jobs
         db.collection('users').document(user_id).collection('applied_jobs').document(job_id).set({
-            'applied_at': firestore.SERVER_TIMESTAMP,
+            'applied_at': _sdk('firebase_admin.firestore').SERVER_TIMESTAMP,
             'status': 'applied'
         })
         
         # Update job application count
         job_ref = db.collection('jobs').document(job_id)
         job_ref.update({
-            'applications': firestore.Increment(1)
+            'applications': _sdk('firebase_admin.firestore').Increment(1)
         })
         
         return True
@@ -173,7 +176,7 @@ def delete_job(job_id, user_id):
         db.collection('jobs').document(job_id).update({
             'status': 'inactive',
             'deleted_by': user_id,
-            'deleted_at': firestore.SERVER_TIMESTAMP
+            'deleted_at': _sdk('firebase_admin.firestore').SERVER_TIMESTAMP
         })
         return True
     except Exception as e:
@@ -1,8 +1,13 @@
-from flask import Flask, render_template, request, jsonify, send_file
-import csv
-import os
-from jobspy import scrape_jobs
-import threading
+from flask import Flask, Response, render_template, request, jsonify, send_file
+import io
+from scrape_engine import scrape_jobs_parallel, DEFAULT_SITES
+from job_records import normalize_job_frame, job_keys, description_snippet, JOB_SUMMARY_FIELDS
+from job_store import JobStore, iter_json, migrate_legacy_csv
+import http_cache
+import metrics
+from http_cache import make_etag, not_modified, with_validators
+from scrape_cache import get_scrape_cache
+from search_queue import QueueFull, submit_search, get_search_status, latest_search, running_count
 import time
 from datetime import datetime
 import logging
@@ -13,23 +18,29 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Compress JSON, NDJSON and CSV responses for clients that accept gzip/brotli
+http_cache.init_app(app)
+metrics.init_app(app)
 
-# Global variable to store scraping status
-scraping_status = {
-    'is_running': False,
-    'progress': 0,
-    'message': '',
-    'jobs_count': 0,
-    'errors': [],
-    'current_site': ''
-}
-
-def scrape_jobs_background(search_params):
-    """Background job scraping function with robust error handling"""
-    global scraping_status
+# Columns /api/jobs returns; stored jobs also carry app-specific salary and posted_date
+SUMMARY_COLUMNS = ['id', *JOB_SUMMARY_FIELDS, 'salary', 'posted_date']
+
+# Scraped jobs live in a columnar store; jobs.csv is only produced for downloads
+job_store = JobStore()
+migrate_legacy_csv(job_store)
+
+def store_validators(*variant):
+    """ETag and Last-Modified for this request against the stored jobs file"""
+    signature = job_store.signature()
+    return make_etag(*signature, request.full_path, *variant), signature[0] // 1_000_000_000
+
+def scrape_jobs_background(search_params, scraping_status):
+    """Background job scraping function with robust error handling
     
+    Runs on a search_queue worker and reports progress through the
+    per-search ``scraping_status`` dict.
+    """
     try:
-        scraping_status['is_running'] = True
         scraping_status['progress'] = 0
         scraping_status['message'] = 'Initializing job search...'
         scraping_status['errors'] = []
@@ -48,7 +59,7 @@ def scrape_jobs_background(search_params):
         
         # Exact configuration from working scrap.py
         scraping_config = {
-            'site_name': ["indeed", "linkedin", "zip_recruiter", "google"],
+            'sites': DEFAULT_SITES,
             'search_term': search_term,
             'google_search_term': f"{search_term} jobs near {location} since yesterday",
             'location': location,
@@ -57,13 +68,21 @@ def scrape_jobs_background(search_params):
             'country_indeed': 'USA',
         }
         
-        scraping_status['message'] = f'Starting search across 4 job boards...'
+        scraping_status['message'] = f'Starting search across {len(DEFAULT_SITES)} job boards...'
         scraping_status['progress'] = 20
         
+        def on_site_done(report, completed, total):
+            # Sites finish independently, so spread 20-80% across them
+            scraping_status['progress'] = 20 + int(60 * completed / total)
+            scraping_status['current_site'] = report['site']
+            if report['error']:
+                scraping_status['errors'].append(f"{report['site']}: {report['error']}")
+            scraping_status['message'] = f"Finished {completed} of {total} job boards ({report['site']}: {report['jobs_count']} jobs)"
+        
         # Perform the job scraping with error handling
         try:
             logger.info(f"Starting job scraping with config: {scraping_config}")
-            jobs = scrape_jobs(**scraping_config)
+            jobs, _ = scrape_jobs_parallel(on_site_done=on_site_done, **scraping_config)
             
             if jobs is None or jobs.empty:
                 scraping_status['message'] = 'No jobs found. Try adjusting your search parameters.'
@@ -79,12 +98,13 @@ def scrape_jobs_background(search_params):
             
             # Save results with error handling
             try:
-                jobs.to_csv("jobs.csv", quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False, encoding='utf-8')
+                # Merge by job key so concurrent searches add to the store instead of replacing it
+                job_store.merge(jobs)
                 scraping_status['progress'] = 100
                 scraping_status['message'] = f'Successfully found and saved {len(jobs)} jobs!'
                 scraping_status['jobs_count'] = len(jobs)
             except Exception as e:
-                logger.error(f"Error saving jobs to CSV: {str(e)}")
+                logger.error(f"Error saving jobs: {str(e)}")
                 scraping_status['errors'].append(f"Failed to save results: {str(e)}")
                 scraping_status['message'] = f'Found {len(jobs)} jobs but failed to save. Please try again.'
                 scraping_status['progress'] = 90
@@ -104,14 +124,15 @@ def scrape_jobs_background(search_params):
         scraping_status['message'] = error_msg
         scraping_status['progress'] = 0
         scraping_status['errors'].append(error_msg)
-    finally:
-        scraping_status['is_running'] = False
 
 def clean_job_data(jobs_df):
     """Clean and validate job data"""
     try:
-        # Remove duplicate jobs based on title and company
-        jobs_df = jobs_df.drop_duplicates(subset=['title', 'company'], keep='first')
+        # Remove duplicate jobs using the same key as the Firestore document IDs
+        jobs_df = jobs_df[~job_keys(jobs_df).duplicated(keep='first')]
+        
+        # Normalize dates, NaN and numpy scalars column-wise, same as the Firestore ingest path
+        jobs_df = normalize_job_frame(jobs_df)
         
         # Fill missing values
         jobs_df['title'] = jobs_df['title'].fillna('Job Title')
@@ -135,9 +156,13 @@ def clean_job_data(jobs_df):
         if 'job_type' not in jobs_df.columns:
             jobs_df['job_type'] = 'Full Time'
         
+        # Excerpt for list views, taken before the stored description is truncated
+        jobs_df['description_snippet'] = jobs_df['description'].map(description_snippet)
+        
         # Truncate long descriptions
-        jobs_df['description'] = jobs_df['description'].astype(str).apply(
-            lambda x: x[:500] + '...' if len(x) > 500 else x
+        descriptions = jobs_df['description'].astype(str)
+        jobs_df['description'] = descriptions.where(
+            descriptions.str.len() <= 500, descriptions.str.slice(0, 500) + '...'
         )
         
         return jobs_df
@@ -152,9 +177,6 @@ def index():
 
 @app.route('/api/start-scraping', methods=['POST'])
 def start_scraping():
-    if scraping_status['is_running']:
-        return jsonify({'error': 'A job search is already in progress. Please wait for it to complete.'})
-    
     try:
         data = request.get_json()
         if not data:
@@ -166,12 +188,15 @@ def start_scraping():
             if not data.get(field, '').strip():
                 return jsonify({'error': f'{field.replace("_", " ").title()} is required'})
         
-        # Start scraping in background thread
-        thread = threading.Thread(target=scrape_jobs_background, args=(data,))
-        thread.daemon = True
-        thread.start()
+        # Queue the search; clients poll its status by ID
+        try:
+            search_id = submit_search(scrape_jobs_background, data)
+        except QueueFull:
+            response = jsonify({'error': 'Too many searches are queued, please try again shortly'})
+            response.headers['Retry-After'] = '30'
+            return response, 429
         
-        return jsonify({'message': 'Job search started successfully'})
+        return jsonify({'message': 'Job search started successfully', 'search_id': search_id})
         
     except Exception as e:
         logger.error(f"Error starting scraping: {str(e)}")
@@ -179,18 +204,41 @@ def start_scraping():
 
 @app.route('/api/scraping-status')
 def get_scraping_status():
-    return jsonify(scraping_status)
+    """Status of the search given by ?search_id=, or of the latest search"""
+    search_id = request.args.get('search_id')
+    status = get_search_status(search_id) if search_id else latest_search()
+    if status is None:
+        if search_id:
+            return jsonify({'error': 'Unknown search ID'}), 404
+        return jsonify({'state': 'idle', 'is_running': False, 'progress': 0, 'message': '',
+                        'jobs_count': 0, 'errors': [], 'current_site': ''})
+    return jsonify(status)
+
+@app.route('/api/search-status/<search_id>')
+def get_search_status_by_id(search_id):
+    status = get_search_status(search_id)
+    if status is None:
+        return jsonify({'error': 'Unknown search ID'}), 404
+    return jsonify(status)
 
 @app.route('/api/download-jobs')
 def download_jobs():
-    if os.path.exists('jobs.csv'):
+    if job_store.exists():
         try:
-            return send_file(
-                'jobs.csv', 
+            etag, last_modified = store_validators()
+            unchanged = not_modified(etag, last_modified)
+            if unchanged is not None:
+                return unchanged
+            export = io.BytesIO()
+            job_store.export_csv(export)
+            export.seek(0)
+            response = send_file(
+                export, 
                 as_attachment=True, 
                 download_name=f'scout4me_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
                 mimetype='text/csv'
             )
+            return with_validators(response, etag, last_modified)
         except Exception as e:
             logger.error(f"Error downloading jobs: {str(e)}")
             return jsonify({'error': f'Download failed: {str(e)}'})
@@ -199,27 +247,58 @@ def download_jobs():
 
 @app.route('/api/jobs')
 def get_jobs():
-    """Return scraped jobs as JSON instead of raw CSV text."""
-    if not os.path.exists('jobs.csv'):
+    """Return scraped jobs as JSON.
+    
+    Only the summary columns are read; ``/api/jobs/<job_id>`` returns the
+    full row. ``?offset=&limit=`` select a range of rows. The body is streamed
+    in chunks, as NDJSON with ``?format=ndjson`` or ``Accept:
+    application/x-ndjson``.
+    """
+    if not job_store.exists():
         return jsonify({'error': 'No jobs file found'})
 
     try:
-        # Convert CSV rows to dictionaries so the frontend can easily consume them
-        with open('jobs.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            jobs = list(reader)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
 
-        return jsonify(jobs)
+    try:
+        ndjson = request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
+        # Polls of an unchanged file are answered 304 before it is opened
+        etag, last_modified = store_validators(ndjson)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+        jobs = job_store.read(columns=SUMMARY_COLUMNS, offset=offset, limit=limit)
+        response = Response(iter_json(jobs, ndjson=ndjson),
+                            mimetype='application/x-ndjson' if ndjson else 'application/json')
+        response.vary.add('Accept')
+        return with_validators(response, etag, last_modified)
     except Exception as e:
         logger.error(f"Error reading jobs file: {str(e)}")
         return jsonify({'error': f'Error reading jobs file: {str(e)}'})
 
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Return every column of one scraped job"""
+    if not job_store.exists():
+        return jsonify({'error': 'No jobs file found'}), 404
+
+    try:
+        job = job_store.find('id', job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+    except Exception as e:
+        logger.error(f"Error reading jobs file: {str(e)}")
+        return jsonify({'error': f'Error reading jobs file: {str(e)}'}), 500
+
 @app.route('/api/clear-jobs')
 def clear_jobs():
     """Clear the jobs file"""
     try:
-        if os.path.exists('jobs.csv'):
-            os.remove('jobs.csv')
+        job_store.clear()
         return jsonify({'message': 'Jobs cleared successfully'})
     except Exception as e:
         logger.error(f"Error clearing jobs: {str(e)}")
@@ -231,7 +310,10 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'scraping_status': scraping_status['is_running']
+        'scraping_status': running_count() > 0,
+        'active_searches': running_count(),
+        'scrape_cache': get_scrape_cache().stats(),
+        'job_store': job_store.stats()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Offline end-to-end benchmarks for server.py.
+
+Usage:
+    python benchmark.py [--rows 30,10000] [--backend fake|sqlite|emulator]
+                        [--output report.json] [--compare baseline.json]
+
+Replays the recorded ``jobs.csv`` as jobspy output, scaled up to each
+``--rows`` size by repeating rows under new IDs, through server.py's own
+search pipeline. It then times the API a dashboard uses: ``/api/jobs``
+(first page, a full paged walk and a conditional poll), ``/api/stats``,
+mark-applied and delete, single and bulk.
+
+Requests go through Flask's test client, so the timings cover routing,
+serialization and compression as well as storage. Storage is a fresh
+``FakeFirestore`` per size (``--latency-ms`` adds a simulated round trip to
+every RPC), a SQLite file, or the Firestore emulator when
+``FIRESTORE_EMULATOR_HOST`` is set. On the fake, every operation also
+reports the RPCs, reads and writes it cost.
+
+Results are written as JSON. ``--compare`` checks them against an earlier
+report and exits non-zero when an operation's median latency regressed by
+more than ``--threshold``.
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+import pandas as pd
+
+import firebase_config
+import server
+from fake_firestore import FakeFirestore
+from job_repository import FirestoreJobRepository
+from scrape_engine import scrape_jobs_parallel
+from sqlite_repository import SQLiteJobRepository
+
+RECORDED_JOBS = 'jobs.csv'
+
+BENCH_USER = 'bench-user'
+
+BACKENDS = ['fake', 'sqlite', 'emulator']
+
+# Sent with every request, as a browser would
+HEADERS = {'Accept-Encoding': 'gzip'}
+
+
+def load_recorded(path=RECORDED_JOBS):
+    return pd.read_csv(path, encoding='utf-8')
+
+
+def scale_up(jobs, rows):
+    """``rows`` jobs cycling through ``jobs``; every repeat gets its own ``id``."""
+    if rows <= len(jobs):
+        return jobs.head(rows).reset_index(drop=True)
+    scaled = jobs.iloc[[i % len(jobs) for i in range(rows)]].reset_index(drop=True)
+    copy = pd.Series(range(rows)) // len(jobs)
+    scaled['id'] = scaled['id'].astype(str).where(copy == 0, scaled['id'].astype(str) + '-' + copy.astype(str))
+    return scaled
+
+
+def replay_scraper(jobs):
+    """Stand-in for jobspy's ``scrape_jobs`` that returns the recorded rows of the requested site."""
+    by_site = {site: frame.reset_index(drop=True) for site, frame in jobs.groupby('site')}
+
+    def scrape_jobs(site_name, **kwargs):
+        return by_site.get(site_name[0], jobs.iloc[0:0]).copy()
+    return scrape_jobs
+
+
+def open_backend(name, workdir, latency=0.0):
+    """Fresh repository for ``name``; returns (repository, FakeFirestore or None)."""
+    if name == 'fake':
+        db = FakeFirestore(latency=latency)
+        firebase_config.set_db(db)
+        return FirestoreJobRepository(), db
+    if name == 'sqlite':
+        path = os.path.join(workdir, f'bench-{time.time_ns()}.db')
+        return SQLiteJobRepository(path), None
+    if name == 'emulator':
+        if not os.getenv('FIRESTORE_EMULATOR_HOST'):
+            raise SystemExit('Set FIRESTORE_EMULATOR_HOST to benchmark against the Firestore emulator')
+        from google.cloud import firestore
+        firebase_config.set_db(firestore.Client(project=os.getenv('GCLOUD_PROJECT', 'scout4me-bench')))
+        return FirestoreJobRepository(), None
+    raise ValueError(f'Unknown backend {name!r}')
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize_samples(samples, db_cost=None):
+    ordered = sorted(samples)
+    summary = {
+        'count': len(samples),
+        'total_s': round(sum(samples), 4),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+    if db_cost is not None:
+        summary['per_op'] = {key: round(value / len(samples), 2) for key, value in db_cost.items()}
+    return summary
+
+
+class Recorder:
+    """Times operations and, on the fake, the Firestore traffic they cause."""
+
+    def __init__(self, db=None):
+        self.db = db
+        self.results = {}
+
+    def run(self, name, operation, times=1):
+        before = dict(self.db.stats) if self.db else None
+        samples = []
+        for _ in range(times):
+            started = time.perf_counter()
+            operation()
+            samples.append(time.perf_counter() - started)
+        cost = {key: self.db.stats[key] - before[key] for key in before} if self.db else None
+        self.results[name] = summarize_samples(samples, cost)
+        return self.results[name]
+
+
+def _check(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f'{response.request.path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return response
+
+
+def _json(response):
+    body = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def _ids(client, count):
+    """Up to ``count`` listed job IDs, read without timing."""
+    ids, cursor = [], None
+    while len(ids) < count:
+        page = _check(client.get('/api/jobs', query_string={'page_size': 200, **({'cursor': cursor} if cursor else {})}), 200).get_json()
+        ids += [job['id'] for job in page['jobs']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return ids[:count]
+
+
+def run_size(recorded, rows, backend, workdir, repeat=20, ops=20, bulk=100, latency=0.0):
+    """Ingest ``rows`` jobs into a fresh ``backend`` and time every operation."""
+    jobs = scale_up(recorded, rows)
+    repository, db = open_backend(backend, workdir, latency)
+    server.use_storage(repository)
+    recorder = Recorder(db)
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = BENCH_USER
+        session['user_name'] = 'Benchmark'
+
+    # Ingest: the /api/search-jobs worker with jobspy replaced by the recorded rows
+    status = {'errors': []}
+    params = {'search_term': 'benchmark', 'location': 'Dallas, TX', 'results_wanted': rows, 'hours_old': 72,
+              'user_id': BENCH_USER}
+    scrape = server.scrape_jobs_parallel
+    server.scrape_jobs_parallel = partial(scrape_jobs_parallel, scraper=replay_scraper(jobs), cache=False)
+    try:
+        ingest = recorder.run('ingest', lambda: server.run_search(params, status))
+    finally:
+        server.scrape_jobs_parallel = scrape
+    if status['errors']:
+        raise RuntimeError(f"Ingest failed: {status['errors'][:3]}")
+    ingest['jobs'] = status.get('jobs_count', 0)
+    ingest['jobs_per_s'] = round(ingest['jobs'] / ingest['total_s'], 1) if ingest['total_s'] else None
+
+    recorder.run('jobs_first_page', lambda: _check(client.get('/api/jobs', headers=HEADERS), 200), repeat)
+
+    etag = _check(client.get('/api/jobs', headers=HEADERS), 200).headers.get('ETag')
+    if etag:
+        recorder.run('jobs_not_modified',
+                     lambda: _check(client.get('/api/jobs', headers={**HEADERS, 'If-None-Match': etag}), 304), repeat)
+
+    def walk():
+        cursor, pages = None, 0
+        while True:
+            query = {'page_size': 200, **({'cursor': cursor} if cursor else {})}
+            cursor = _json(_check(client.get('/api/jobs', query_string=query, headers=HEADERS), 200))['next_cursor']
+            pages += 1
+            if not cursor:
+                return pages
+    recorder.run('jobs_walk_all', walk)
+
+    recorder.run('stats', lambda: _check(client.get('/api/stats', headers=HEADERS), 200), repeat)
+
+    ids = iter(_ids(client, 2 * ops + 2 * bulk))
+
+    def post(url, payload):
+        return lambda: _check(client.post(url, json=payload, headers=HEADERS), 200)
+
+    for name, url, size in (('mark_applied', '/api/mark-applied', 1), ('delete', '/api/delete-job', 1),
+                            ('mark_applied_bulk', '/api/mark-applied-bulk', bulk),
+                            ('delete_bulk', '/api/delete-jobs-bulk', bulk)):
+        batches = []
+        for _ in range(ops if size == 1 else 1):
+            batch = [job_id for _, job_id in zip(range(size), ids)]
+            if batch:
+                batches.append(batch)
+        if not batches:
+            continue
+        calls = iter([post(url, {'job_id': batch[0]} if size == 1 else {'job_ids': batch}) for batch in batches])
+        result = recorder.run(name, lambda: next(calls)(), len(batches))
+        result['jobs'] = sum(len(batch) for batch in batches)
+
+    if hasattr(repository, 'close'):
+        repository.close()
+    return {'rows': rows, 'results': recorder.results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(sizes, backend='fake', repeat=20, ops=20, bulk=100, latency=0.0, recorded=RECORDED_JOBS):
+    """Benchmark every size in ``sizes``; returns the report dict."""
+    jobs = load_recorded(recorded)
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for rows in sizes:
+                runs.append(run_size(jobs, rows, backend, workdir, repeat=repeat, ops=ops, bulk=bulk, latency=latency))
+    finally:
+        firebase_config.set_db(None)
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': backend,
+        'latency_ms': latency * 1000,
+        'runs': runs,
+    }
+
+
+def compare(report, baseline, threshold=1.25, metric='p50_ms'):
+    """Operations whose ``metric`` grew by more than ``threshold`` times the baseline's."""
+    previous = {run['rows']: run['results'] for run in baseline.get('runs', [])}
+    regressions = []
+    for run in report['runs']:
+        for name, result in run['results'].items():
+            before = previous.get(run['rows'], {}).get(name)
+            if not before or not before.get(metric):
+                continue
+            ratio = result[metric] / before[metric]
+            if ratio > threshold:
+                regressions.append({'rows': run['rows'], 'operation': name, 'baseline': before[metric],
+                                    'current': result[metric], 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def print_report(report):
+    print(f"backend={report['backend']} commit={report['git_commit']} python={report['python']}")
+    for run in report['runs']:
+        print(f"\n{run['rows']} rows")
+        print(f"  {'operation':<20} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}  firestore/op")
+        for name, result in run['results'].items():
+            cost = ' '.join(f'{key}={value}' for key, value in result.get('per_op', {}).items())
+            print(f"  {name:<20} {result['count']:>6} {result['p50_ms']:>10} {result['p95_ms']:>10} {result['total_s']:>9}  {cost}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='', help='Comma-separated job counts (default: the recorded jobs only)')
+    parser.add_argument('--backend', choices=BACKENDS, default='fake')
+    parser.add_argument('--recorded', default=RECORDED_JOBS, help='Recorded jobspy output to replay')
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per read benchmark')
+    parser.add_argument('--ops', type=int, default=20, help='Single mark-applied/delete requests')
+    parser.add_argument('--bulk', type=int, default=100, help='Job IDs per bulk request')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated round trip per fake Firestore RPC')
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--compare', help='Earlier report to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Allowed p50 slowdown ratio for --compare')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.rows.split(',') if size.strip()] or [len(load_recorded(args.recorded))]
+    report = run_benchmark(sizes, args.backend, repeat=args.repeat, ops=args.ops, bulk=args.bulk,
+                           latency=args.latency_ms / 1000, recorded=args.recorded)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['operation']} @ {regression['rows']} rows: "
+                  f"{regression['baseline']} -> {regression['current']} ms ({regression['ratio']}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""Fixtures shared by the test modules."""
+import pytest
+
+import firebase_config
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def db():
+    """In-memory Firestore that firebase_config uses for the duration of a test."""
+    db = FakeFirestore()
+    firebase_config.set_db(db)
+    yield db
+    firebase_config.set_db(None)
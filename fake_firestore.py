@@ -0,0 +1,566 @@
+"""In-memory stand-in for the Firestore client used by firebase_config.py.
+
+Implements the subset of ``google.cloud.firestore`` that this project calls
+(collections, documents, queries, batches, transactions, ``get_all`` and
+count aggregations) and counts every RPC, document read and write, so the
+storage code can be tested and benchmarked without a Firebase project::
+
+    from fake_firestore import FakeFirestore
+    import firebase_config
+
+    db = FakeFirestore(latency=0.005)   # simulate a 5ms round trip
+    firebase_config.set_db(db)
+    ...
+    print(db.stats)
+
+For the real wire protocol use the Firestore emulator instead: export
+``FIRESTORE_EMULATOR_HOST`` and the regular client talks to it.
+"""
+import copy
+import datetime
+import threading
+import time
+import uuid
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+DOCUMENT_ID = '__name__'
+
+# Firestore rejects commits with more writes than this
+MAX_WRITES_PER_COMMIT = 500
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _get_field(data, field_path):
+    value = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def _set_field(data, field_path, value):
+    parts = field_path.split('.')
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    data[parts[-1]] = value
+
+
+def _type_rank(value):
+    # Firestore's cross-type ordering: null < bool < number < timestamp < string < bytes < reference < map/array
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, FakeDocumentReference):
+        return 6
+    return 7
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 6:
+        return (rank, value.path)
+    if rank == 7:
+        return (rank, repr(value))
+    if rank == 3 and isinstance(value, datetime.datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return (rank, value)
+
+
+def _resolve(existing, value):
+    """Apply a write value on top of ``existing``, expanding sentinels and transforms."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return _now()
+    if isinstance(value, transforms.Increment):
+        base = existing if isinstance(existing, (int, float)) and not isinstance(existing, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.Maximum):
+        return value.value if not isinstance(existing, (int, float)) else max(existing, value.value)
+    if isinstance(value, transforms.Minimum):
+        return value.value if not isinstance(existing, (int, float)) else min(existing, value.value)
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(existing) if isinstance(existing, list) else []
+        result.extend(v for v in value.values if v not in result)
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        return [v for v in existing if v not in value.values] if isinstance(existing, list) else []
+    if isinstance(value, dict):
+        base = existing if isinstance(existing, dict) else {}
+        return {k: _resolve(base.get(k), v) for k, v in value.items() if v is not transforms.DELETE_FIELD}
+    return copy.deepcopy(value)
+
+
+def _merge(target, data):
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = _resolve(target.get(key), value)
+
+
+class FakeFirestore:
+    """Thread-safe in-memory Firestore with RPC accounting."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._documents = {}
+        # Bumped on every write, so transactions can detect a conflicting commit
+        self._versions = {}
+        self._lock = threading.RLock()
+        self.fail_next_commits = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'rpcs': 0, 'reads': 0, 'writes': 0, 'commits': 0}
+
+    def _rpc(self, reads=0):
+        with self._lock:
+            self.stats['rpcs'] += 1
+            self.stats['reads'] += reads
+        if self.latency:
+            time.sleep(self.latency)
+
+    # Client API
+
+    def collection(self, *path):
+        return FakeCollectionReference(self, '/'.join(path))
+
+    def document(self, *path):
+        path = '/'.join(path)
+        collection, _, document_id = path.rpartition('/')
+        return FakeDocumentReference(self, collection, document_id)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return FakeTransaction(self)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._rpc(reads=len(references))
+        with self._lock:
+            snapshots = [ref._snapshot(field_paths) for ref in references]
+            if transaction is not None:
+                transaction._track(references)
+        return iter(snapshots)
+
+    # Storage internals
+
+    def _commit(self, writes, read_versions=None):
+        if len(writes) > MAX_WRITES_PER_COMMIT:
+            raise exceptions.InvalidArgument(f'maximum {MAX_WRITES_PER_COMMIT} writes allowed per request')
+        with self._lock:
+            if self.fail_next_commits:
+                self.fail_next_commits -= 1
+                failed = True
+            else:
+                failed = False
+        if failed:
+            self._rpc()
+            raise exceptions.ServiceUnavailable('injected commit failure')
+
+        with self._lock:
+            conflict = read_versions and any(self._versions.get(path, 0) != version
+                                             for path, version in read_versions.items())
+        if conflict:
+            self._rpc()
+            raise exceptions.Aborted('transaction read documents that changed before commit')
+
+        with self._lock:
+            # Validate first so a failing write leaves the whole commit unapplied
+            for op, path, _, _ in writes:
+                if op == 'update' and path not in self._documents:
+                    raise exceptions.NotFound(f'No document to update: {path}')
+                if op == 'create' and path in self._documents:
+                    raise exceptions.AlreadyExists(f'Document already exists: {path}')
+            for op, path, data, merge in writes:
+                self._versions[path] = self._versions.get(path, 0) + 1
+                if op == 'delete':
+                    self._documents.pop(path, None)
+                elif op == 'update':
+                    document = self._documents[path]
+                    for field_path, value in data.items():
+                        if value is transforms.DELETE_FIELD:
+                            parent, _, leaf = field_path.rpartition('.')
+                            container = _get_field(document, parent)[0] if parent else document
+                            if isinstance(container, dict):
+                                container.pop(leaf, None)
+                        else:
+                            _set_field(document, field_path, _resolve(_get_field(document, field_path)[0], value))
+                elif merge:
+                    _merge(self._documents.setdefault(path, {}), data)
+                else:
+                    self._documents[path] = _resolve(None, data)
+            self.stats['writes'] += len(writes)
+            self.stats['commits'] += 1
+        self._rpc()
+        return [FakeWriteResult(_now()) for _ in writes]
+
+    def _children(self, collection_path):
+        prefix = collection_path + '/'
+        return [
+            (path[len(prefix):], data) for path, data in self._documents.items()
+            if path.startswith(prefix) and '/' not in path[len(prefix):]
+        ]
+
+
+class FakeWriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data, field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and field_paths is not None:
+            projected = {}
+            for field_path in field_paths:
+                value, found = _get_field(data, field_path)
+                if found:
+                    _set_field(projected, field_path, value)
+            data = projected
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        if self._data is None:
+            return None
+        if field_path == DOCUMENT_ID:
+            return self.reference
+        return _get_field(self._data, field_path)[0]
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection_path, document_id):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+        self.path = f'{collection_path}/{document_id}'
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def parent(self):
+        return FakeCollectionReference(self._client, self._collection_path)
+
+    def collection(self, name):
+        return FakeCollectionReference(self._client, f'{self.path}/{name}')
+
+    def _snapshot(self, field_paths=None):
+        return FakeDocumentSnapshot(self, self._client._documents.get(self.path), field_paths)
+
+    def get(self, field_paths=None, transaction=None):
+        self._client._rpc(reads=1)
+        with self._client._lock:
+            if transaction is not None:
+                transaction._track([self])
+            return self._snapshot(field_paths)
+
+    def set(self, document_data, merge=False):
+        return self._client._commit([('set', self.path, document_data, merge)])[0]
+
+    def create(self, document_data):
+        return self._client._commit([('create', self.path, document_data, False)])[0]
+
+    def update(self, field_updates):
+        return self._client._commit([('update', self.path, field_updates, False)])[0]
+
+    def delete(self):
+        return self._client._commit([('delete', self.path, None, False)])[0]
+
+
+class FakeAggregationResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+
+class FakeAggregationQuery:
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias or 'field_1'
+
+    def get(self, transaction=None):
+        count = len(self._query._matching())
+        # Count queries are billed one read per 1000 index entries
+        self._query._client._rpc(reads=max(1, -(-count // 1000)))
+        return [[FakeAggregationResult(self._alias, count)]]
+
+
+class FakeQuery:
+    def __init__(self, client, collection_path, filters=(), orders=(), limit=None,
+                 cursor=None, projection=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes):
+        state = {
+            'filters': self._filters, 'orders': self._orders, 'limit': self._limit,
+            'cursor': self._cursor, 'projection': self._projection,
+        }
+        state.update(changes)
+        return FakeQuery(self._client, self._collection_path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            if not isinstance(filter, FieldFilter):
+                raise NotImplementedError('Only FieldFilter is supported by the fake')
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self, alias)
+
+    def _field_value(self, document_id, data, field_path):
+        if field_path == DOCUMENT_ID:
+            return document_id, True
+        return _get_field(data, field_path)
+
+    def _matches(self, document_id, data):
+        for field_path, op, expected in self._filters:
+            value, found = self._field_value(document_id, data, field_path)
+            if isinstance(expected, FakeDocumentReference):
+                expected = expected.id
+            if op == '==':
+                ok = found and value == expected
+            elif op == '!=':
+                ok = found and value != expected
+            elif op == 'in':
+                ok = found and value in expected
+            elif op == 'not-in':
+                ok = found and value not in expected
+            elif op == 'array_contains':
+                ok = found and isinstance(value, list) and expected in value
+            elif op == 'array_contains_any':
+                ok = found and isinstance(value, list) and any(v in value for v in expected)
+            elif op in ('<', '<=', '>', '>='):
+                if not found or _type_rank(value) != _type_rank(expected):
+                    ok = False
+                else:
+                    a, b = _sort_key(value), _sort_key(expected)
+                    ok = {'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}[op]
+            else:
+                raise NotImplementedError(f'Unsupported operator {op!r}')
+            if not ok:
+                return False
+        return True
+
+    def _order_fields(self):
+        orders = list(self._orders)
+        # Inequality filters imply an order on that field, and every query ends with the document ID
+        for field_path, op, _ in self._filters:
+            if op in ('<', '<=', '>', '>=', '!=', 'not-in') and field_path not in [f for f, _ in orders]:
+                orders.insert(0, (field_path, 'ASCENDING'))
+        if DOCUMENT_ID not in [f for f, _ in orders]:
+            direction = orders[-1][1] if orders else 'ASCENDING'
+            orders.append((DOCUMENT_ID, direction))
+        return orders
+
+    def _matching(self):
+        orders = self._order_fields()
+        with self._client._lock:
+            rows = []
+            for document_id, data in self._client._children(self._collection_path):
+                if not self._matches(document_id, data):
+                    continue
+                values = []
+                for field_path, _ in orders:
+                    value, found = self._field_value(document_id, data, field_path)
+                    if not found:
+                        break
+                    values.append(value)
+                else:
+                    rows.append((values, document_id, data))
+
+        for index in reversed(range(len(orders))):
+            reverse = orders[index][1] == 'DESCENDING'
+            rows.sort(key=lambda row: _sort_key(row[0][index]), reverse=reverse)
+
+        if self._cursor is not None:
+            cursor = self._cursor_values(orders)
+            rows = [row for row in rows if self._after_cursor(row[0], cursor, orders)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return rows
+
+    def _cursor_values(self, orders):
+        cursor = self._cursor
+        if isinstance(cursor, FakeDocumentSnapshot):
+            data = cursor._data or {}
+            return [cursor.id if field == DOCUMENT_ID else _get_field(data, field)[0] for field, _ in orders]
+        values = []
+        for field, _ in orders:
+            if field not in cursor:
+                break
+            value = cursor[field]
+            if field == DOCUMENT_ID and isinstance(value, FakeDocumentReference):
+                value = value.id
+            elif field == DOCUMENT_ID and isinstance(value, str):
+                value = value.rpartition('/')[2]
+            values.append(value)
+        return values
+
+    def _after_cursor(self, values, cursor, orders):
+        for value, bound, (_, direction) in zip(values, cursor, orders):
+            a, b = _sort_key(value), _sort_key(bound)
+            if a == b:
+                continue
+            return a > b if direction == 'ASCENDING' else a < b
+        return False
+
+    def stream(self, transaction=None):
+        rows = self._matching()
+        self._client._rpc(reads=max(1, len(rows)))
+        collection = FakeCollectionReference(self._client, self._collection_path)
+        if transaction is not None:
+            with self._client._lock:
+                transaction._track([collection.document(document_id) for _, document_id, _ in rows])
+        for _, document_id, data in rows:
+            yield FakeDocumentSnapshot(collection.document(document_id), data, self._projection)
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.id = path.rpartition('/')[2]
+        self.path = path
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._client, self._collection_path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data, document_id=None):
+        reference = self.document(document_id)
+        result = reference.create(document_data)
+        return result.update_time, reference
+
+    def list_documents(self):
+        self._client._rpc()
+        with self._client._lock:
+            return [self.document(document_id) for document_id, _ in self._client._children(self.path)]
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference.path, document_data, merge))
+        return self
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference.path, document_data, False))
+        return self
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference.path, field_updates, False))
+        return self
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference.path, None, False))
+        return self
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Buffers writes until commit; works with ``firestore.transactional``."""
+
+    _read_only = False
+    _max_attempts = 5
+
+    def __init__(self, client):
+        super().__init__(client)
+        self._id = None
+        self._read_versions = {}
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _track(self, references):
+        # Called with the client lock held, alongside the read it records
+        for reference in references:
+            self._read_versions.setdefault(reference.path, self._client._versions.get(reference.path, 0))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes, self._read_versions)
+
+    def _begin(self, retry_id=None):
+        # BeginTransaction is a round trip of its own on the real client
+        self._client._rpc()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self):
+        try:
+            return self.commit()
+        finally:
+            self._clean_up()
+
+    def _rollback(self):
+        self._clean_up()
+
+    def get_all(self, references):
+        return self._client.get_all(references, transaction=self)
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        return ref_or_query.stream(transaction=self)
@@ -1,6 +1,84 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
+import base64
+import bisect
+import json
+import logging
 import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from startup import lazy_module
+from metrics import instrument, trace_firestore
+from job_records import JOB_SUMMARY_FIELDS, description_snippet, job_document_id
+from search_index import FACET_TOP_N, FIELD_WEIGHTS, FILTER_FIELDS, RESULT_FIELDS, SearchIndex, get_search_index
+from job_stats import STATS_FIELDS, COUNTER_FIELDS, add_deltas, aggregate_jobs, company_registers, contribution_delta, summarize
+
+# The Admin SDK takes a few hundred milliseconds to import; load it on first use
+firebase_admin = lazy_module('firebase_admin')
+credentials = lazy_module('firebase_admin.credentials')
+firestore = lazy_module('firebase_admin.firestore')
+auth = lazy_module('firebase_admin.auth')
+google_exceptions = lazy_module('google.api_core.exceptions')
+
+logger = logging.getLogger(__name__)
+
+# Firestore limits a single commit to 500 writes and 10 MiB of payload
+MAX_BATCH_WRITES = 500
+MAX_BATCH_BYTES = 9 * 1024 * 1024
+
+# Errors worth retrying a commit for; anything else is a problem with the data
+RETRYABLE_ERRORS = ('Aborted', 'DeadlineExceeded', 'InternalServerError', 'ResourceExhausted', 'ServiceUnavailable')
+
+def _retryable_errors():
+    # Resolved when an exception is being handled, so the import stays lazy
+    return tuple(getattr(google_exceptions, name) for name in RETRYABLE_ERRORS)
+
+# Page sizes for /api/jobs
+JOBS_PAGE_SIZE = 50
+MAX_JOBS_PAGE_SIZE = 200
+MAX_PAGE_READS = 5
+
+# Firestore's special field path for ordering and paging by document ID
+DOCUMENT_ID = '__name__'
+
+# Seconds a user's /api/stats numbers are served from memory
+USER_STATS_TTL = float(os.getenv('USER_STATS_TTL', '30'))
+
+_db_override = None
+_search_index_override = None
+_user_stats_cache = {}
+_user_stats_lock = threading.Lock()
+
+# Seconds a user's applied job IDs are trusted before rereading them; this
+# process updates them on write, the TTL only bounds drift from other instances
+APPLIED_IDS_TTL = float(os.getenv('APPLIED_IDS_TTL', '300'))
+
+_applied_ids_cache = {}
+_applied_ids_lock = threading.Lock()
+
+# Jobs not re-scraped within this many hours are expired by expire_stale_jobs
+JOB_MAX_AGE_HOURS = float(os.getenv('JOB_MAX_AGE_HOURS', '336'))
+
+# Expiry deletes at most this many jobs per pass and sleeps between passes,
+# so a large backlog is reclaimed gradually instead of saturating Firestore
+JOB_SWEEP_BATCH = int(os.getenv('JOB_SWEEP_BATCH', '200'))
+JOB_SWEEP_PAUSE = float(os.getenv('JOB_SWEEP_PAUSE', '1.0'))
+
+# Seconds the stats document's write generation is trusted before rereading
+# it; HTTP validators built from it only lag writes made by other instances
+DATA_VERSION_TTL = float(os.getenv('DATA_VERSION_TTL', '2'))
+
+_data_version = {'value': None, 'expires': 0.0}
+
+# Seconds between checks that the search index still matches the stats
+# document's generation. This process's writes advance the index's own
+# generation as they are indexed, so only writes by another instance, worker
+# or manage.py command leave a gap; the index is then rebuilt in the
+# background, and search results and facets lag those writes by at most this
+SEARCH_INDEX_SYNC_INTERVAL = float(os.getenv('SEARCH_INDEX_SYNC_INTERVAL', '300'))
+
+_index_sync = {'checked': None, 'thread': None}
+_index_sync_lock = threading.Lock()
+_data_version_lock = threading.Lock()
 
 # Initialize Firebase Admin SDK
 def initialize_firebase():
@@ -29,14 +107,13 @@ def initialize_firebase():
             cred = credentials.Certificate('firebase-service-account.json')
         
         firebase_admin.initialize_app(cred)
-        print("Firebase initialized successfully")
+        logger.info("Firebase initialized successfully")
         return True
     except Exception as e:
-        print(f"Firebase initialization error: {e}")
+        logger.error(f"Firebase initialization error: {e}")
         
         # Check which environment variables are missing
         if os.getenv('RENDER'):
-            print("Checking environment variables:")
             required_vars = [
                 'FIREBASE_PROJECT_ID',
                 'FIREBASE_PRIVATE_KEY_ID', 
@@ -52,14 +129,37 @@ def initialize_firebase():
                     missing_vars.append(var)
             
             if missing_vars:
-                print(f"Missing environment variables: {', '.join(missing_vars)}")
-                print("Please add these to your Render environment variables")
+                logger.warning(f"Missing environment variables: {', '.join(missing_vars)}")
+                logger.warning("Please add these to your Render environment variables")
         
         return False
 
 # Get Firestore database instance
 def get_db():
-    return firestore.client()
+    if _db_override is not None:
+        return trace_firestore(_db_override)
+    return trace_firestore(firestore.client())
+
+def set_db(db):
+    """Use ``db`` instead of the default Firestore client (e.g. fake_firestore.FakeFirestore).
+    
+    Pass None to go back to the default client. Per-user caches are cleared
+    and an override gets its own in-memory search index, since they describe
+    the previous database.
+    """
+    global _db_override, _search_index_override
+    _db_override = db
+    _search_index_override = SearchIndex() if db is not None else None
+    if db is not None:
+        # A fresh override index starts empty, in sync with an empty database
+        _search_index_override.data_generation = 0
+    with _index_sync_lock:
+        _index_sync.update(checked=time.monotonic() if db is not None else None, thread=None)
+    with _user_stats_lock:
+        _user_stats_cache.clear()
+    with _applied_ids_lock:
+        _applied_ids_cache.clear()
+    _data_changed()
 
 # User authentication functions
 def create_user(email, password, display_name):
@@ -71,7 +171,7 @@ def create_user(email, password, display_name):
         )
         return user.uid
     except Exception as e:
-        print(f"Error creating user: {e}")
+        logger.error(f"Error creating user: {e}")
         return None
 
 def verify_user_credentials(email, password):
@@ -90,7 +190,7 @@ def verify_user_credentials(email, password):
             }
         return None
     except Exception as e:
-        print(f"Error verifying credentials: {e}")
+        logger.error(f"Error verifying credentials: {e}")
         return None
 
 def verify_user_token(token):
@@ -98,51 +198,364 @@ def verify_user_token(token):
         decoded_token = auth.verify_id_token(token)
         return decoded_token['uid']
     except Exception as e:
-        print(f"Error verifying token: {e}")
+        logger.error(f"Error verifying token: {e}")
         return None
 
 # Job management functions
+def _prepare_job(job_data, user_id):
+    job_data = dict(job_data)
+    # created_at doubles as "last scraped": every upsert refreshes it
+    job_data['created_at'] = firestore.SERVER_TIMESTAMP
+    job_data['user_id'] = user_id
+    job_data['status'] = 'active'
+    if 'description' in job_data:
+        # Stored separately so listings can project it instead of the full text
+        job_data['description_snippet'] = description_snippet(job_data['description'])
+    return job_data
+
+def _stats_ref(db):
+    return db.collection('stats').document('global')
+
+def _stats_update(delta, companies=()):
+    """Blind-write payload applying counter deltas and company sketch updates to the stats doc"""
+    update = {field: firestore.Increment(value) for field, value in delta.items() if value}
+    registers = company_registers(companies)
+    if registers:
+        update['company_hll'] = {index: firestore.Maximum(rank) for index, rank in registers.items()}
+    update['updated_at'] = firestore.SERVER_TIMESTAMP
+    # Every job write goes through here, so the generation versions the data
+    update['generation'] = firestore.Increment(1)
+    return update
+
+def _data_changed():
+    """Forget the cached data version after a write from this process"""
+    with _data_version_lock:
+        _data_version['value'] = None
+
+def _read_generation(db):
+    snapshot = _stats_ref(db).get(field_paths=['generation'])
+    return (snapshot.to_dict() or {}).get('generation', 0) if snapshot.exists else 0
+
+@instrument
+def get_data_version():
+    """Write generation of the jobs data, for ETags on /api/jobs and /api/stats.
+    
+    Read from the stats document at most every DATA_VERSION_TTL seconds and
+    reread right after this process writes. Returns None if it can't be read.
+    """
+    now = time.monotonic()
+    with _data_version_lock:
+        if _data_version['value'] is not None and _data_version['expires'] > now:
+            return _data_version['value']
+    try:
+        generation = _read_generation(get_db())
+    except Exception as e:
+        logger.error(f"Error reading data version: {e}")
+        return None
+    with _data_version_lock:
+        _data_version['value'] = generation
+        _data_version['expires'] = now + DATA_VERSION_TTL
+    return generation
+
+def _user_ref(db, user_id):
+    return db.collection('users').document(user_id)
+
+def _user_counters_update(jobs=0, applied=0):
+    """Blind-write payload for the per-user counters that back get_user_stats without count queries"""
+    update = {}
+    if jobs:
+        update['jobs_count'] = firestore.Increment(jobs)
+    if applied:
+        update['applied_count'] = firestore.Increment(applied)
+    return update
+
+def invalidate_user_stats(user_id):
+    """Drop a user's cached stats after a write that changes them"""
+    with _user_stats_lock:
+        _user_stats_cache.pop(user_id, None)
+
+def _ingest_delta(chunk, previous):
+    """Counter delta and companies for upserting ``chunk`` over the ``previous`` documents"""
+    delta = dict.fromkeys(COUNTER_FIELDS, 0)
+    companies = []
+    for doc_id, job_data in chunk:
+        old = previous.get(doc_id)
+        new = {**(old or {}), **{field: job_data[field] for field in STATS_FIELDS if field in job_data}}
+        add_deltas(delta, contribution_delta(old, new))
+        companies.append(new.get('company'))
+    return delta, companies
+
+@instrument
 def save_job_to_firebase(job_data, user_id=None):
+    """Upsert one job under its deterministic document ID and return the ID"""
     db = get_db()
     try:
-        job_data['created_at'] = firestore.SERVER_TIMESTAMP
-        job_data['user_id'] = user_id
-        job_data['status'] = 'active'
-        
-        doc_ref = db.collection('jobs').add(job_data)
-        return doc_ref[1].id
+        doc_id = job_document_id(job_data, user_id)
+        job_data = _prepare_job(job_data, user_id)
+        _, errors, commits = _commit_jobs(db, [(doc_id, job_data)], user_id, max_retries=0, retry_delay=0)
+        if errors:
+            raise RuntimeError(errors[0]['error'])
+        invalidate_user_stats(user_id)
+        _index_jobs([(doc_id, job_data)], commits)
+        return doc_id
     except Exception as e:
-        print(f"Error saving job: {e}")
+        logger.error(f"Error saving job: {e}")
         return None
 
-def get_jobs_from_firebase(user_id=None, filters=None):
+def _estimate_document_size(job_data):
+    # Rough Firestore document size: field names plus value payloads plus per-field overhead
+    return 32 + sum(len(str(key)) + len(str(value)) + 1 for key, value in job_data.items())
+
+def _chunk_jobs(documents, max_writes, max_bytes):
+    chunk, chunk_bytes = [], 0
+    for doc_id, job_data in documents:
+        size = _estimate_document_size(job_data)
+        if chunk and (len(chunk) >= max_writes or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append((doc_id, job_data))
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+def _commit_jobs(db, chunk, user_id, max_retries, retry_delay):
+    """Upsert ``chunk`` of (doc_id, job_data) pairs in one transaction, retrying transient errors.
+    
+    The transaction reads the chunk's current documents and writes the jobs
+    together with the stats and counter deltas computed from them, so
+    aggregates change atomically with the jobs and two concurrent ingests
+    of the same postings can't both count them as new. Transient errors are
+    retried with backoff and fail the whole chunk once retries run out, as
+    splitting it would only multiply the calls into an outage. A chunk
+    rejected outright is split in half until the bad documents are
+    isolated. Returns (saved_ids, errors, commits), where ``commits`` counts
+    the transactions that went through.
+    """
+    refs = {doc_id: db.collection('jobs').document(doc_id) for doc_id, _ in chunk}
+    
+    @firestore.transactional
+    def upsert_in_transaction(transaction):
+        # Only the jobs are read: the stats doc gets blind Increment writes,
+        # so concurrent ingests of different jobs don't conflict on it
+        previous = {snapshot.id: snapshot.to_dict() for snapshot in transaction.get_all(list(refs.values()))
+                    if snapshot.exists}
+        delta, companies = _ingest_delta(chunk, previous)
+        new_jobs = sum(1 for doc_id, _ in chunk if doc_id not in previous)
+        for doc_id, job_data in chunk:
+            transaction.set(refs[doc_id], job_data, merge=True)
+        transaction.set(_stats_ref(db), _stats_update(delta, companies), merge=True)
+        if user_id and new_jobs:
+            transaction.set(_user_ref(db, user_id), _user_counters_update(jobs=new_jobs), merge=True)
+    
+    last_error, retryable = None, False
+    for attempt in range(max_retries + 1):
+        try:
+            upsert_in_transaction(db.transaction())
+            return [doc_id for doc_id, _ in chunk], [], 1
+        except Exception as e:
+            last_error = e
+            # firestore.transactional wraps the last Aborted in a ValueError once its attempts run out
+            retryable = isinstance(e, _retryable_errors()) or isinstance(e.__cause__, _retryable_errors())
+            if not retryable:
+                break
+            if attempt < max_retries:
+                time.sleep(retry_delay * (2 ** attempt))
+    
+    if retryable or len(chunk) == 1:
+        return [], [{'id': doc_id, 'error': str(last_error)} for doc_id, _ in chunk], 0
+    
+    middle = len(chunk) // 2
+    saved_left, errors_left, commits_left = _commit_jobs(db, chunk[:middle], user_id, max_retries, retry_delay)
+    saved_right, errors_right, commits_right = _commit_jobs(db, chunk[middle:], user_id, max_retries, retry_delay)
+    return saved_left + saved_right, errors_left + errors_right, commits_left + commits_right
+
+@instrument
+def save_jobs_bulk(jobs, user_id=None, max_writes=MAX_BATCH_WRITES, max_bytes=MAX_BATCH_BYTES,
+                   max_retries=3, retry_delay=0.5):
+    """Upsert many jobs with batched commits instead of one add() per job.
+    
+    Each job is written under its deterministic ``job_document_id`` with
+    merge semantics, so re-scraped postings update in place. Jobs are
+    chunked to Firestore's per-commit write and size limits. Chunks that
+    hit transient errors are retried, and chunks that are rejected are
+    bisected so one bad document cannot sink the rest. Returns a report with ``saved``, ``failed``, the saved document
+    ``ids`` and per-document ``errors``.
+    """
     db = get_db()
+    report = {'saved': 0, 'failed': 0, 'ids': [], 'errors': []}
+    
+    # Key by document ID so a posting scraped twice in one run is written once
+    documents = {}
+    for job_data in jobs:
+        documents[job_document_id(job_data, user_id)] = _prepare_job(job_data, user_id)
+    
+    # Two writes per commit are reserved for the stats and user counter documents
+    for chunk in _chunk_jobs(documents.items(), max_writes - 2, max_bytes):
+        saved_ids, errors, commits = _commit_jobs(db, chunk, user_id, max_retries, retry_delay)
+        report['ids'].extend(saved_ids)
+        report['errors'].extend(errors)
+        # Index each chunk as soon as it commits, so the index keeps pace with the stats generation
+        _index_jobs(((doc_id, documents[doc_id]) for doc_id in saved_ids), commits)
+    
+    report['saved'] = len(report['ids'])
+    report['failed'] = len(report['errors'])
+    invalidate_user_stats(user_id)
+    if report['failed']:
+        logger.warning(f"Bulk save: {report['saved']} saved, {report['failed']} failed",
+                       extra={'saved': report['saved'], 'failed': report['failed']})
+    return report
+
+def _jobs_query(db, user_id=None, filters=None):
+    # Start with basic query - only get active jobs
+    query = db.collection('jobs').where('status', '==', 'active')
+    
+    # Add user filter only if user_id is provided
+    if user_id:
+        query = query.where('user_id', '==', user_id)
+    
+    # Add other filters
+    if filters:
+        for key, value in filters.items():
+            if value:
+                query = query.where(key, '==', value)
+    return query
+
+class AppliedJobIds:
+    """Sorted, immutable set of a user's applied job IDs"""
+    
+    def __init__(self, ids=()):
+        self._ids = sorted(set(ids))
+    
+    def __contains__(self, job_id):
+        index = bisect.bisect_left(self._ids, job_id)
+        return index < len(self._ids) and self._ids[index] == job_id
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __iter__(self):
+        return iter(self._ids)
+    
+    def union(self, job_ids):
+        return AppliedJobIds(self._ids + list(job_ids))
+
+def _applied_job_ids(db, user_id):
+    """IDs of the jobs a user applied to, cached for APPLIED_IDS_TTL seconds"""
+    if not user_id:
+        return AppliedJobIds()
+    now = time.monotonic()
+    with _applied_ids_lock:
+        cached = _applied_ids_cache.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+    
+    # IDs only: the applied snapshots themselves are never needed here
+    applied_docs = _user_ref(db, user_id).collection('applied_jobs').select([]).stream()
+    applied_ids = AppliedJobIds(doc.id for doc in applied_docs)
+    with _applied_ids_lock:
+        _applied_ids_cache[user_id] = (now + APPLIED_IDS_TTL, applied_ids)
+    return applied_ids
+
+def _remember_applied(user_id, job_ids):
+    """Write-through for job IDs just added to a user's applied_jobs"""
+    with _applied_ids_lock:
+        cached = _applied_ids_cache.get(user_id)
+        if cached:
+            _applied_ids_cache[user_id] = (cached[0], cached[1].union(job_ids))
+
+def encode_cursor(doc_id):
+    """Opaque page cursor pointing just after ``doc_id``"""
+    payload = json.dumps({'after': doc_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for cursors we did not issue"""
     try:
-        print(f"Getting jobs for user_id: {user_id}")
-        
-        # Start with basic query - only get active jobs
-        query = db.collection('jobs').where('status', '==', 'active')
+        padded = cursor + '=' * (-len(cursor) % 4)
+        doc_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['after']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(doc_id, str) or not doc_id or '/' in doc_id:
+        raise ValueError('Invalid cursor')
+    return doc_id
+
+@instrument
+def get_jobs_page(user_id=None, filters=None, page_size=JOBS_PAGE_SIZE, cursor=None,
+                  fields=JOB_SUMMARY_FIELDS):
+    """Read one page of active jobs ordered by document ID.
+    
+    Only about ``page_size`` documents are read per call: the query starts
+    after the cursor's document and is limited to one page (plus one to
+    detect whether more exist). By default only ``JOB_SUMMARY_FIELDS`` are
+    fetched; pass ``fields=None`` for full documents. Returns ``{'jobs':
+    [...], 'next_cursor': str or None}``. Raises ValueError for an invalid
+    cursor.
+    """
+    page_size = max(1, min(int(page_size), MAX_JOBS_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    
+    db = get_db()
+    try:
+        query = _jobs_query(db, user_id, filters).order_by(DOCUMENT_ID)
+        if fields is not None:
+            query = query.select(fields)
+        applied_job_ids = _applied_job_ids(db, user_id)
         
-        # Add user filter only if user_id is provided
-        if user_id:
-            print(f"Filtering by user_id: {user_id}")
-            query = query.where('user_id', '==', user_id)
+        jobs = []
+        next_cursor = None
+        # Applied jobs are skipped after the read, so a page may need a few follow-up reads
+        for _ in range(MAX_PAGE_READS):
+            page_query = query.start_after({DOCUMENT_ID: after}) if after else query
+            wanted = page_size - len(jobs) + 1
+            docs = list(page_query.limit(wanted).stream())
+            for doc in docs:
+                if len(jobs) == page_size:
+                    next_cursor = encode_cursor(jobs[-1]['id'])
+                    break
+                after = doc.id
+                if doc.id in applied_job_ids:
+                    continue
+                job_data = doc.to_dict()
+                job_data['id'] = doc.id
+                jobs.append(job_data)
+            if next_cursor or len(docs) < wanted:
+                break
+        else:
+            # Gave up filling the page; let the client continue from here
+            next_cursor = encode_cursor(after)
         
-        # Add other filters
-        if filters:
-            for key, value in filters.items():
-                if value:
-                    print(f"Adding filter: {key} == {value}")
-                    query = query.where(key, '==', value)
+        return {'jobs': jobs, 'next_cursor': next_cursor}
+    except Exception as e:
+        logger.error(f"Error getting jobs page: {e}")
+        return {'jobs': [], 'next_cursor': None}
+
+@instrument
+def get_job(job_id, user_id=None):
+    """Full record of one job, or None if it doesn't exist or belongs to another user"""
+    db = get_db()
+    try:
+        doc = db.collection('jobs').document(job_id).get()
+        if not doc.exists:
+            return None
+        job_data = doc.to_dict()
+        if user_id and job_data.get('user_id') not in (None, user_id):
+            return None
+        job_data['id'] = doc.id
+        return job_data
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {e}")
+        return None
+
+@instrument
+def get_jobs_from_firebase(user_id=None, filters=None):
+    db = get_db()
+    try:
+        logger.debug(f"Getting jobs for user_id: {user_id}")
         
-        docs = query.stream()
+        docs = _jobs_query(db, user_id, filters).stream()
         jobs = []
         
-        # Get user's applied job IDs to exclude them
-        applied_job_ids = set()
-        if user_id:
-            applied_docs = db.collection('users').document(user_id).collection('applied_jobs').stream()
-            applied_job_ids = {doc.id for doc in applied_docs}
+        applied_job_ids = _applied_job_ids(db, user_id)
         
         for doc in docs:
             job_data = doc.to_dict()
@@ -152,141 +565,496 @@ def get_jobs_from_firebase(user_id=None, filters=None):
             if doc.id not in applied_job_ids:
                 jobs.append(job_data)
         
-        print(f"Found {len(jobs)} jobs")
-        if jobs:
-            print(f"Sample job user_id: {jobs[0].get('user_id')}")
+        logger.debug(f"Found {len(jobs)} jobs", extra={'user_id': user_id, 'jobs': len(jobs)})
         
         return jobs
     except Exception as e:
-        print(f"Error getting jobs: {e}")
+        logger.error(f"Error getting jobs: {e}")
         return []
 
-def get_applied_jobs_from_firebase(user_id):
+@instrument
+def get_applied_jobs_page(user_id, page_size=JOBS_PAGE_SIZE, cursor=None):
+    """Read one page of a user's applied jobs ordered by document ID.
+    
+    mark_job_applied stores a full snapshot of the job, so pages are served
+    straight from the ``applied_jobs`` subcollection. Only older entries that
+    hold just the application fields are enriched, with a single get_all
+    over the ``jobs`` collection. Returns ``{'jobs': [...], 'next_cursor':
+    str or None}``. Raises ValueError for an invalid cursor.
+    """
+    page_size = max(1, min(int(page_size), MAX_JOBS_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    
     db = get_db()
     try:
         if not user_id:
-            return []
+            return {'jobs': [], 'next_cursor': None}
         
-        # Get user's applied jobs
-        applied_docs = db.collection('users').document(user_id).collection('applied_jobs').stream()
-        applied_jobs = []
+        query = _user_ref(db, user_id).collection('applied_jobs').order_by(DOCUMENT_ID)
+        if after:
+            query = query.start_after({DOCUMENT_ID: after})
+        docs = list(query.limit(page_size + 1).stream())
+        next_cursor = encode_cursor(docs[page_size - 1].id) if len(docs) > page_size else None
         
-        for doc in applied_docs:
+        applied_jobs = []
+        missing = []
+        for doc in docs[:page_size]:
             applied_data = doc.to_dict()
-            applied_data['id'] = doc.id
-            
-            # Get the original job data
-            job_doc = db.collection('jobs').document(doc.id).get()
-            if job_doc.exists:
-                job_data = job_doc.to_dict()
-                job_data['id'] = doc.id
-                job_data['applied_at'] = applied_data.get('applied_at')
-                job_data['application_status'] = applied_data.get('status', 'applied')
-                applied_jobs.append(job_data)
+            job_data = dict(applied_data)
+            job_data['id'] = doc.id
+            # Entries written before snapshots kept the application status in 'status'
+            job_data['application_status'] = applied_data.get('application_status', applied_data.get('status', 'applied'))
+            if 'title' not in applied_data:
+                missing.append(job_data)
+            applied_jobs.append(job_data)
+        
+        if missing:
+            refs = [db.collection('jobs').document(job['id']) for job in missing]
+            originals = {snapshot.id: snapshot.to_dict() for snapshot in db.get_all(refs) if snapshot.exists}
+            for job_data in missing:
+                original = originals.get(job_data['id'])
+                if original:
+                    job_data.update({key: value for key, value in original.items() if key not in job_data})
         
-        return applied_jobs
+        return {'jobs': applied_jobs, 'next_cursor': next_cursor}
     except Exception as e:
-        print(f"Error getting applied jobs: {e}")
-        return []
+        logger.error(f"Error getting applied jobs: {e}")
+        return {'jobs': [], 'next_cursor': None}
 
-def mark_job_applied(job_id, user_id):
+@instrument
+def get_applied_jobs_from_firebase(user_id):
+    """All of a user's applied jobs; prefer get_applied_jobs_page"""
+    applied_jobs, cursor = [], None
+    while True:
+        page = get_applied_jobs_page(user_id, MAX_JOBS_PAGE_SIZE, cursor)
+        applied_jobs.extend(page['jobs'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return applied_jobs
+
+def _mark_applied_chunk(db, job_ids, user_id, max_retries, retry_delay):
+    """Move ``job_ids`` into the user's applied jobs in one transaction.
+    
+    Each job's snapshot is copied under ``users/{uid}/applied_jobs`` and the
+    job is deleted; the stats and counter updates ride in the same commit.
+    Jobs owned by another user are skipped, like in ``delete_jobs_bulk``.
+    Returns (applied_ids, errors, owner_ids).
+    """
+    refs = [db.collection('jobs').document(job_id) for job_id in job_ids]
+    applied_jobs = _user_ref(db, user_id).collection('applied_jobs')
+    
+    @firestore.transactional
+    def move_in_transaction(transaction):
+        snapshots = {snapshot.id: snapshot for snapshot in transaction.get_all(refs)}
+        delta = dict.fromkeys(COUNTER_FIELDS, 0)
+        counters = {}
+        applied = []
+        for job_ref in refs:
+            snapshot = snapshots.get(job_ref.id)
+            if snapshot is None or not snapshot.exists:
+                continue
+            job_data = snapshot.to_dict()
+            owner_id = job_data.get('user_id')
+            if owner_id not in (None, user_id):
+                continue
+            add_deltas(delta, contribution_delta(job_data, None))
+            if owner_id:
+                counters[owner_id] = counters.get(owner_id, 0) - 1
+            
+            job_data['id'] = job_ref.id
+            job_data['applied_at'] = firestore.SERVER_TIMESTAMP
+            job_data['application_status'] = 'applied'
+            transaction.set(applied_jobs.document(job_ref.id), job_data)
+            transaction.delete(job_ref)
+            applied.append(job_ref.id)
+        
+        if applied:
+            transaction.set(_stats_ref(db), _stats_update(delta), merge=True)
+            transaction.set(_user_ref(db, user_id), _user_counters_update(jobs=counters.pop(user_id, 0), applied=len(applied)), merge=True)
+            for owner_id, jobs in counters.items():
+                transaction.set(_user_ref(db, owner_id), _user_counters_update(jobs=jobs), merge=True)
+        return applied, list(counters)
+    
+    return _run_chunk(db, job_ids, move_in_transaction, max_retries, retry_delay)
+
+def _run_chunk(db, job_ids, in_transaction, max_retries, retry_delay):
+    """Run a transactional function over one chunk of job IDs, retrying transient errors.
+    
+    ``in_transaction`` returns (done_ids, owner_ids); IDs it skipped are
+    reported as not found. Returns (done_ids, errors, owner_ids).
+    """
+    last_error = None
+    for attempt in range(max_retries + 1):
+        try:
+            done, owner_ids = in_transaction(db.transaction())
+            missing = [{'id': job_id, 'error': 'Job not found'} for job_id in job_ids if job_id not in done]
+            return done, missing, owner_ids
+        except _retryable_errors() as e:
+            last_error = e
+            if attempt < max_retries:
+                time.sleep(retry_delay * (2 ** attempt))
+        except Exception as e:
+            last_error = e
+            break
+    return [], [{'id': job_id, 'error': str(last_error)} for job_id in job_ids], []
+
+@instrument
+def mark_jobs_applied_bulk(job_ids, user_id, max_writes=MAX_BATCH_WRITES, max_retries=3, retry_delay=0.5):
+    """Mark many jobs applied with one transaction per chunk.
+    
+    A job costs up to three writes (applied copy, delete, owner counter) and
+    every chunk adds the stats and applier counter writes, so chunks hold
+    ``(max_writes - 2) // 3`` jobs. Returns a report with ``applied``,
+    ``failed``, the applied ``ids`` and per-ID ``errors``.
+    """
     db = get_db()
+    job_ids = list(dict.fromkeys(job_id for job_id in job_ids if job_id))
+    chunk_size = max(1, (max_writes - 2) // 3)
+    report = {'applied': 0, 'failed': 0, 'ids': [], 'errors': []}
+    owner_ids = set()
+    
+    for start in range(0, len(job_ids), chunk_size):
+        applied, errors, owners = _mark_applied_chunk(db, job_ids[start:start + chunk_size], user_id, max_retries, retry_delay)
+        report['ids'].extend(applied)
+        report['errors'].extend(errors)
+        owner_ids.update(owners)
+        _remember_applied(user_id, applied)
+        # A chunk commits (and bumps the generation) only when it applied something
+        _unindex_jobs(applied, 1 if applied else 0)
+    
+    report['applied'] = len(report['ids'])
+    report['failed'] = len(report['errors'])
+    invalidate_user_stats(user_id)
+    for owner_id in owner_ids:
+        invalidate_user_stats(owner_id)
+    if report['failed']:
+        logger.warning(f"Bulk mark applied: {report['applied']} applied, {report['failed']} failed",
+                       extra={'applied': report['applied'], 'failed': report['failed']})
+    return report
+
+@instrument
+def mark_job_applied(job_id, user_id):
     try:
-        # Get the job data first
-        job_doc = db.collection('jobs').document(job_id).get()
-        if not job_doc.exists:
-            print(f"Job {job_id} not found")
+        report = mark_jobs_applied_bulk([job_id], user_id)
+        if not report['applied']:
+            logger.error(f"Error marking job {job_id} as applied: {report['errors'][0]['error'] if report['errors'] else 'no job ID'}")
             return False
         
-        job_data = job_doc.to_dict()
-        job_data['id'] = job_id
-        job_data['applied_at'] = firestore.SERVER_TIMESTAMP
-        job_data['application_status'] = 'applied'
-        
-        # Add to user's applied jobs with full job data
-        db.collection('users').document(user_id).collection('applied_jobs').document(job_id).set(job_data)
-        
-        # Remove from active jobs (delete from jobs collection)
-        db.collection('jobs').document(job_id).delete()
-        
-        print(f"Job {job_id} moved to applied jobs and removed from active jobs")
+        logger.debug(f"Job {job_id} moved to applied jobs and removed from active jobs")
         return True
     except Exception as e:
-        print(f"Error marking job as applied: {e}")
+        logger.error(f"Error marking job as applied: {e}")
         return False
 
+@instrument
 def delete_job(job_id, user_id):
-    db = get_db()
+    """Delete one of ``user_id``'s jobs through ``delete_jobs_bulk``.
+    
+    Jobs owned by someone else are left alone. Like a job that is already
+    gone, they are reported as deleted, so the answer doesn't reveal that
+    another user's job exists.
+    """
     try:
-        # Hard delete - actually remove from database
-        db.collection('jobs').document(job_id).delete()
-        print(f"Job {job_id} deleted from database")
+        report = delete_jobs_bulk([job_id], user_id)
+        errors = [error['error'] for error in report['errors'] if error['error'] != 'Job not found']
+        if errors:
+            logger.error(f"Error deleting job {job_id}: {errors[0]}")
+            return False
+        
+        logger.debug(f"Job {job_id} deleted from database")
         return True
     except Exception as e:
-        print(f"Error deleting job: {e}")
+        logger.error(f"Error deleting job: {e}")
         return False
 
+def _delete_jobs_chunk(db, job_ids, user_id, max_retries, retry_delay):
+    """Delete ``job_ids`` and apply their stats and counter changes in one transaction.
+    
+    With ``user_id`` set, jobs owned by someone else are skipped.
+    """
+    refs = [db.collection('jobs').document(job_id) for job_id in job_ids]
+    
+    @firestore.transactional
+    def delete_in_transaction(transaction):
+        snapshots = {snapshot.id: snapshot for snapshot in transaction.get_all(refs)}
+        delta = dict.fromkeys(COUNTER_FIELDS, 0)
+        counters = {}
+        deleted = []
+        for job_ref in refs:
+            snapshot = snapshots.get(job_ref.id)
+            if snapshot is None or not snapshot.exists:
+                continue
+            job_data = snapshot.to_dict()
+            owner_id = job_data.get('user_id')
+            if user_id and owner_id not in (None, user_id):
+                continue
+            add_deltas(delta, contribution_delta(job_data, None))
+            if owner_id:
+                counters[owner_id] = counters.get(owner_id, 0) - 1
+            transaction.delete(job_ref)
+            deleted.append(job_ref.id)
+        
+        if deleted:
+            transaction.set(_stats_ref(db), _stats_update(delta), merge=True)
+            for owner_id, jobs in counters.items():
+                transaction.set(_user_ref(db, owner_id), _user_counters_update(jobs=jobs), merge=True)
+        return deleted, list(counters)
+    
+    return _run_chunk(db, job_ids, delete_in_transaction, max_retries, retry_delay)
+
+@instrument
+def delete_jobs_bulk(job_ids, user_id=None, max_writes=MAX_BATCH_WRITES, max_retries=3, retry_delay=0.5):
+    """Delete many jobs with one transaction per chunk.
+    
+    A job costs up to two writes (delete, owner counter) plus one stats write
+    per chunk. Pass ``user_id`` to only delete that user's jobs. Returns a
+    report with ``deleted``, ``failed``, the deleted ``ids`` and per-ID
+    ``errors``.
+    """
+    db = get_db()
+    job_ids = list(dict.fromkeys(job_id for job_id in job_ids if job_id))
+    chunk_size = max(1, (max_writes - 1) // 2)
+    report = {'deleted': 0, 'failed': 0, 'ids': [], 'errors': []}
+    owner_ids = set()
+    
+    for start in range(0, len(job_ids), chunk_size):
+        deleted, errors, owners = _delete_jobs_chunk(db, job_ids[start:start + chunk_size], user_id, max_retries, retry_delay)
+        report['ids'].extend(deleted)
+        report['errors'].extend(errors)
+        owner_ids.update(owners)
+        _unindex_jobs(deleted, 1 if deleted else 0)
+    
+    report['deleted'] = len(report['ids'])
+    report['failed'] = len(report['errors'])
+    for owner_id in owner_ids | {user_id}:
+        invalidate_user_stats(owner_id)
+    if report['failed']:
+        logger.warning(f"Bulk delete: {report['deleted']} deleted, {report['failed']} failed",
+                       extra={'deleted': report['deleted'], 'failed': report['failed']})
+    return report
+
+@instrument
+def expire_stale_jobs(max_age_hours=JOB_MAX_AGE_HOURS, batch_size=JOB_SWEEP_BATCH, pause=JOB_SWEEP_PAUSE,
+                      max_batches=None):
+    """Delete jobs that haven't been scraped again within ``max_age_hours``.
+    
+    ``created_at`` is refreshed on every re-scrape, so this removes postings
+    no search has returned recently. Works through the backlog in batches of
+    ``batch_size`` with ``pause`` seconds between them. Returns a report with
+    ``deleted``, ``failed``, ``batches`` and the ``cutoff`` used.
+    """
+    db = get_db()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+    query = db.collection('jobs').where('created_at', '<', cutoff).select([]).limit(batch_size)
+    report = {'deleted': 0, 'failed': 0, 'batches': 0, 'cutoff': cutoff.isoformat()}
+    started = time.time()
+    
+    while True:
+        job_ids = [doc.id for doc in query.stream()]
+        if not job_ids:
+            break
+        result = delete_jobs_bulk(job_ids)
+        report['deleted'] += result['deleted']
+        report['failed'] += result['failed']
+        report['batches'] += 1
+        # Stop when nothing more can be removed, or the batch limit is reached
+        if not result['deleted'] or len(job_ids) < batch_size:
+            break
+        if max_batches and report['batches'] >= max_batches:
+            break
+        time.sleep(pause)
+    
+    report['elapsed'] = round(time.time() - started, 2)
+    logger.info(f"Expired {report['deleted']} stale jobs older than {report['cutoff']} ({report['failed']} failed)",
+                extra={'deleted': report['deleted'], 'failed': report['failed'], 'elapsed': report['elapsed']})
+    return report
+
+def _count(query):
+    # Server-side count aggregation: one RPC, billed per 1000 index entries instead of per document
+    return int(query.count().get()[0][0].value)
+
+def _compute_user_stats(db, user_id):
+    applied_query = _user_ref(db, user_id).collection('applied_jobs')
+    user_jobs_query = db.collection('jobs').where('user_id', '==', user_id)
+    try:
+        applied_count = _count(applied_query)
+        search_count = _count(user_jobs_query)
+    except (AttributeError, NotImplementedError, google_exceptions.GoogleAPICallError) as e:
+        # Backends without aggregation queries: use the counters maintained on write
+        logger.warning(f"Count aggregation unavailable ({e}); using maintained counters")
+        counters = _user_ref(db, user_id).get().to_dict() or {}
+        applied_count = counters.get('applied_count', 0)
+        search_count = counters.get('jobs_count', 0)
+    
+    return {
+        'applied_jobs': applied_count,
+        'searches_performed': search_count,
+        # Same read (and first-read rebuild) as the global stats endpoint
+        'total_jobs_available': get_global_stats().get('total_jobs', 0)
+    }
+
+@instrument
 def get_user_stats(user_id):
+    """Per-user stats, cached for USER_STATS_TTL seconds and invalidated by this user's writes"""
+    now = time.monotonic()
+    with _user_stats_lock:
+        cached = _user_stats_cache.get(user_id)
+        if cached and cached[0] > now:
+            return dict(cached[1])
+    
     db = get_db()
     try:
-        # Get applied jobs count
-        applied_jobs = db.collection('users').document(user_id).collection('applied_jobs').stream()
-        applied_count = len(list(applied_jobs))
-        
-        # Get user's job searches
-        user_jobs = db.collection('jobs').where('user_id', '==', user_id).stream()
-        search_count = len(list(user_jobs))
-        
-        # Get overall stats
-        all_jobs = db.collection('jobs').where('status', '==', 'active').stream()
-        total_jobs = len(list(all_jobs))
-        
-        return {
-            'applied_jobs': applied_count,
-            'searches_performed': search_count,
-            'total_jobs_available': total_jobs
-        }
+        stats = _compute_user_stats(db, user_id)
     except Exception as e:
-        print(f"Error getting user stats: {e}")
+        logger.error(f"Error getting user stats: {e}")
         return {}
+    
+    with _user_stats_lock:
+        _user_stats_cache[user_id] = (now + USER_STATS_TTL, stats)
+    return dict(stats)
+
+@instrument
+def rebuild_global_stats():
+    """Recompute the aggregates document from a full scan of active jobs.
+    
+    Use after bulk maintenance or to reset the company sketch, which only
+    grows between rebuilds. Returns the summarized stats.
+    """
+    db = get_db()
+    jobs = db.collection('jobs').where('status', '==', 'active').select(STATS_FIELDS).stream()
+    aggregates = aggregate_jobs(job.to_dict() for job in jobs)
+    aggregates['updated_at'] = firestore.SERVER_TIMESTAMP
+    aggregates['rebuilt_at'] = firestore.SERVER_TIMESTAMP
+    # Overwrites the document, so carry the generation forward instead of resetting it
+    previous = _stats_ref(db).get(field_paths=['generation'])
+    aggregates['generation'] = ((previous.to_dict() or {}).get('generation', 0) if previous.exists else 0) + 1
+    _stats_ref(db).set(aggregates)
+    _data_changed()
+    try:
+        # The jobs didn't change, so the index is just as current as before
+        _search_index().advance_data_generation(1)
+    except Exception as e:
+        logger.error(f"Error updating the search index generation: {e}")
+    return summarize(aggregates)
+
+def _search_index():
+    return _search_index_override if _search_index_override is not None else get_search_index()
+
+def _index_jobs(documents, commits):
+    """Add (doc_id, job_data) pairs that ``commits`` transactions just wrote to the search index"""
+    _data_changed()
+    try:
+        _search_index().add_many(documents, writes=commits)
+    except Exception as e:
+        logger.error(f"Error indexing jobs: {e}")
+
+def _unindex_jobs(doc_ids, commits):
+    _data_changed()
+    try:
+        _search_index().remove(doc_ids, writes=commits)
+    except Exception as e:
+        logger.error(f"Error removing jobs from the search index: {e}")
+
+@instrument
+def rebuild_search_index():
+    """Rebuild the search index from a full scan of active jobs; returns the job count"""
+    db = get_db()
+    # Read first: writes that land during the scan move the generation past it and trigger another sync
+    generation = _read_generation(db)
+    fields = list(dict.fromkeys(list(FIELD_WEIGHTS) + FILTER_FIELDS + RESULT_FIELDS))
+    jobs = db.collection('jobs').where('status', '==', 'active').select(fields).stream()
+    documents = [(doc.id, doc.to_dict()) for doc in jobs]
+    index = _search_index()
+    index.replace_all(documents, data_generation=generation)
+    if hasattr(index, 'flush'):
+        index.flush(force=True)
+    return len(documents)
+
+def _rebuild_in_background():
+    try:
+        rebuild_search_index()
+    except Exception as e:
+        logger.error(f"Error rebuilding the search index: {e}")
+
+def sync_search_index(force=False):
+    """Rebuild the search index in the background if other writers moved the data past it.
+    
+    Compares the stats document's generation with the index's
+    ``data_generation``, which this process's writes advance as they are
+    indexed, so only foreign writes or a stale saved index cause a rebuild.
+    Checks at most every SEARCH_INDEX_SYNC_INTERVAL seconds unless
+    ``force``. Returns the rebuild thread, or None if the index is current
+    or was checked recently.
+    """
+    now = time.monotonic()
+    with _index_sync_lock:
+        running = _index_sync['thread']
+        if running is not None and running.is_alive():
+            return running
+        checked = _index_sync['checked']
+        if not force and checked is not None and now - checked < SEARCH_INDEX_SYNC_INTERVAL:
+            return None
+        _index_sync['checked'] = now
+    generation = get_data_version()
+    if generation is None or generation == _search_index().data_generation:
+        return None
+    thread = threading.Thread(target=_rebuild_in_background, name='search-index-rebuild', daemon=True)
+    with _index_sync_lock:
+        _index_sync['thread'] = thread
+    thread.start()
+    return thread
+
+@instrument
+def ensure_search_index():
+    """Check on startup that the index saved to disk is current; rebuild it in the background if not.
+    
+    A saved index is trusted when its ``data_generation`` matches the stats
+    document, i.e. nobody wrote since it was saved.
+    """
+    return sync_search_index(force=True)
+
+@instrument
+def search_jobs(query, user_id=None, filters=None, limit=JOBS_PAGE_SIZE, offset=0):
+    """BM25-ranked search over active jobs, skipping ones the user applied to.
+    
+    Returns ``{'results': [...], 'total': int}``; raises ValueError for
+    unsupported filters.
+    """
+    limit = max(1, min(int(limit), MAX_JOBS_PAGE_SIZE))
+    filters = dict(filters or {})
+    if user_id:
+        filters['user_id'] = user_id
+    exclude = _applied_job_ids(get_db(), user_id) if user_id else ()
+    sync_search_index()
+    return _search_index().search(query, filters, limit=limit, offset=max(int(offset), 0), exclude=exclude)
 
+@instrument
+def get_job_facets(user_id=None, filters=None, top_n=FACET_TOP_N):
+    """Top location, company and job type values with counts for the active filters.
+    
+    Served from count tables the search index maintains on ingest, apply and
+    delete, without reading any job documents. Like search, they follow other
+    processes' writes through ``sync_search_index``. Raises ValueError for
+    unsupported filters.
+    """
+    filters = dict(filters or {})
+    if user_id:
+        filters['user_id'] = user_id
+    exclude = _applied_job_ids(get_db(), user_id) if user_id else ()
+    sync_search_index()
+    return _search_index().facets(filters, top_n=max(1, min(int(top_n), MAX_JOBS_PAGE_SIZE)), exclude=exclude)
+
+@instrument
 def get_global_stats():
+    """Global stats from the materialized aggregates document (a single read)"""
     db = get_db()
     try:
-        # Get all active jobs
-        jobs = db.collection('jobs').where('status', '==', 'active').stream()
-        jobs_list = list(jobs)
-        
-        total_jobs = len(jobs_list)
-        remote_jobs = len([j for j in jobs_list if j.to_dict().get('is_remote') == True])
-        
-        # Calculate average salary
-        salaries = []
-        for job in jobs_list:
-            job_data = job.to_dict()
-            if job_data.get('min_amount') and job_data.get('max_amount'):
-                try:
-                    min_sal = float(job_data['min_amount'])
-                    max_sal = float(job_data['max_amount'])
-                    salaries.append((min_sal + max_sal) / 2)
-                except:
-                    pass
-        
-        avg_salary = sum(salaries) / len(salaries) if salaries else 0
-        
-        # Get unique companies
-        companies = set()
-        for job in jobs_list:
-            company = job.to_dict().get('company')
-            if company:
-                companies.add(company)
-        
-        return {
-            'total_jobs': total_jobs,
-            'remote_jobs': remote_jobs,
-            'avg_salary': int(avg_salary),
-            'unique_companies': len(companies)
-        }
+        snapshot = _stats_ref(db).get()
+        if not snapshot.exists or 'rebuilt_at' not in snapshot.to_dict():
+            # Never rebuilt: deltas written since the upgrade leave out every
+            # job stored before it, so build the aggregates from a full scan once
+            return rebuild_global_stats()
+        return summarize(snapshot.to_dict())
     except Exception as e:
-        print(f"Error getting global stats: {e}")
-        return {} 
\ No newline at end of file
+        logger.error(f"Error getting global stats: {e}")
+        return {}
@@ -0,0 +1,125 @@
+"""Response compression and conditional GET helpers for the Flask apps.
+
+Dashboards poll ``/api/jobs`` and ``/api/stats`` although the data rarely
+changes between polls. Endpoints derive a strong ETag from a cheap data
+version (the job store's file signature, or the Firestore ingest
+generation) and call ``not_modified`` before doing any work, so an
+unchanged poll is answered with an empty 304.
+
+``init_app`` registers an ``after_request`` hook that gzips (or, when the
+optional ``brotli`` package is installed, brotli-compresses) JSON, NDJSON
+and CSV bodies the client accepts, including streamed ones. A compressed
+representation gets its own ETag suffix, as strong validators require.
+"""
+import hashlib
+import os
+import zlib
+from email.utils import formatdate
+
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression wouldn't pay for itself
+MIN_COMPRESS_SIZE = int(os.getenv('MIN_COMPRESS_SIZE', '500'))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain'}
+
+GZIP_LEVEL = 6
+
+
+def make_etag(*parts):
+    """Strong ETag value (without quotes) for a data version and request variant."""
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the request's validators match ``etag``, else None.
+
+    ``last_modified`` (Unix seconds) is only consulted when the client sent
+    no If-None-Match, as RFC 9110 requires.
+    """
+    matched = False
+    if request.if_none_match:
+        matched = any(request.if_none_match.contains(tag) for tag in (etag, f'{etag}-gzip', f'{etag}-br'))
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = int(last_modified) <= request.if_modified_since.timestamp()
+    if not matched:
+        return None
+    response = make_response('', 304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified and ask clients to revalidate before reuse."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _negotiate():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _compress_stream(chunks, encoding):
+    compress, finish = _compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def compress_response(response):
+    """``after_request`` hook: compress eligible bodies for clients that accept it."""
+    if request.method == 'HEAD' or response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate()
+    if encoding is None:
+        return response
+
+    if response.is_streamed or response.direct_passthrough:
+        # Keep streaming: compress chunk by chunk with no Content-Length
+        response.direct_passthrough = False
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_SIZE:
+            return response
+        compress, finish = _compressor(encoding)
+        response.set_data(compress(body) + finish())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
+    return app
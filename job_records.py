@@ -0,0 +1,153 @@
+"""Column-wise conversion of scraped job DataFrames into storable records.
+
+jobspy returns a DataFrame mixing numpy scalars, ``datetime.date`` objects
+and NaN/NaT. Firestore and JSON need plain Python values, so instead of
+walking rows with ``iterrows`` this module normalizes each column once for
+the whole frame and only then splits it into per-job dicts.
+
+It also owns the stable job key (jobspy's ``id``, else the canonical
+``job_url``) used both to dedupe a scrape and to derive Firestore document
+IDs, so re-scraping a posting updates its document instead of adding one.
+"""
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from startup import lazy_module
+
+# Only the frame helpers need pandas; importing it is deferred to their first call
+pd = lazy_module('pandas')
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Fields list views need; everything else (descriptions, company blurbs, ...) is detail-only
+JOB_SUMMARY_FIELDS = [
+    'title', 'company', 'location', 'job_url', 'job_url_direct', 'site', 'job_type',
+    'is_remote', 'min_amount', 'max_amount', 'currency', 'interval', 'date_posted',
+    'description_snippet',
+]
+
+# Length of the description excerpt stored for list cards
+SNIPPET_LENGTH = 200
+
+# Query parameters that track the visitor rather than identify the posting
+TRACKING_PARAMS = {'refid', 'trackingid', 'trk', 'src', 'from', 'ref', 'gclid', 'fbclid'}
+
+
+def _to_native(value):
+    # Fallback for columns that mix types; only used when a column can't be converted in one go
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _normalize_column(series):
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime(DATETIME_FORMAT)
+    else:
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind == 'date':
+            values = pd.to_datetime(series).dt.strftime(DATE_FORMAT)
+        elif kind in ('datetime', 'datetime64'):
+            values = pd.to_datetime(series).dt.strftime(DATETIME_FORMAT)
+        elif kind.startswith('mixed'):
+            values = series.map(_to_native, na_action='ignore')
+        else:
+            values = series
+
+    # astype(object) boxes numpy scalars into Python ints, floats and bools
+    values = values.astype(object).to_numpy(copy=True)
+    values[missing] = None
+    return values
+
+
+def normalize_job_frame(jobs):
+    """Return a copy of ``jobs`` holding only JSON/Firestore-safe Python values.
+
+    Dates become ISO strings, NaN/NaT/NA become None and numpy scalars become
+    their Python equivalents. Every column comes back with object dtype so
+    None survives.
+    """
+    columns = {column: _normalize_column(jobs[column]) for column in jobs.columns}
+    return pd.DataFrame(columns, index=jobs.index, columns=jobs.columns, dtype=object)
+
+
+def frame_to_documents(jobs):
+    """Convert a scraped jobs DataFrame into a list of Firestore-ready dicts."""
+    if jobs is None or jobs.empty:
+        return []
+    return normalize_job_frame(jobs).to_dict('records')
+
+
+def description_snippet(description):
+    """Short excerpt of a job description for list views, or None."""
+    if not isinstance(description, str) or not description.strip():
+        return None
+    description = ' '.join(description.split())
+    return description[:SNIPPET_LENGTH] + '...' if len(description) > SNIPPET_LENGTH else description
+
+
+def canonical_job_url(url):
+    """Normalize a posting URL so the same job always maps to the same string.
+
+    Lower-cases the host, drops ``www.``, fragments, trailing slashes and
+    tracking parameters, and sorts the remaining query parameters.
+    """
+    if not isinstance(url, str) or not url.strip():
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    scheme = 'https' if parts.scheme.lower() in ('http', 'https', '') else parts.scheme.lower()
+    return urlunsplit((scheme, host, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+
+def _present(value):
+    return value is not None and not (isinstance(value, float) and value != value) and str(value).strip() != ''
+
+
+def job_key(job):
+    """Return the stable identity of one job dict."""
+    if _present(job.get('id')):
+        return f"id:{str(job['id']).strip()}"
+    url = canonical_job_url(job.get('job_url'))
+    if url:
+        return f'url:{url}'
+    parts = [str(job.get(field)).strip().lower() if _present(job.get(field)) else '' for field in ('title', 'company', 'location')]
+    return 'text:' + '|'.join(parts)
+
+
+def job_keys(jobs):
+    """Vectorized ``job_key`` for every row of a jobs DataFrame."""
+    def text_column(column):
+        if column not in jobs.columns:
+            return pd.Series('', index=jobs.index, dtype=object)
+        return jobs[column].astype(object).where(jobs[column].notna(), '').astype(str).str.strip()
+
+    ids = text_column('id')
+    keys = ('id:' + ids).where(ids != '')
+    if 'job_url' in jobs.columns:
+        urls = jobs['job_url'].map(canonical_job_url, na_action='ignore')
+        keys = keys.fillna('url:' + urls.astype(object).where(urls.notna()))
+    fallback = 'text:' + text_column('title').str.lower() + '|' + text_column('company').str.lower() + '|' + text_column('location').str.lower()
+    return keys.fillna(fallback).astype(object)
+
+
+def job_document_id(job, user_id=None):
+    """Deterministic Firestore document ID for a job owned by ``user_id``.
+
+    Jobs are listed per user, so the owner is part of the ID: one user
+    re-scraping a posting upserts their document without taking it over
+    from another user who found the same posting.
+    """
+    return hashlib.sha1(f"{user_id or ''}\x1f{job_key(job)}".encode('utf-8')).hexdigest()
@@ -0,0 +1,170 @@
+"""Storage backends for server.py.
+
+``JobRepository`` is the set of job operations the dashboard needs. Every
+method mirrors a ``firebase_config`` function with the same arguments and
+return shape. ``FirestoreJobRepository`` delegates to those functions;
+``sqlite_repository.SQLiteJobRepository`` keeps everything in a local SQLite
+file, for single-node deployments and offline benchmarks.
+
+``open_repository`` picks the backend from ``STORAGE_BACKEND``:
+``firestore`` (the default) or ``sqlite`` (stored at ``SQLITE_PATH``).
+"""
+import os
+
+import firebase_config
+from firebase_config import JOBS_PAGE_SIZE, JOB_MAX_AGE_HOURS, JOB_SWEEP_BATCH, JOB_SWEEP_PAUSE
+from job_records import JOB_SUMMARY_FIELDS
+from search_index import FACET_TOP_N
+
+# 'firestore' or 'sqlite'
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore').lower()
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'scout4me.db')
+
+
+class JobRepository:
+    """Job storage operations; see the firebase_config function of the same name."""
+
+    name = None
+
+    def save_job(self, job_data, user_id=None):
+        """Upsert one job; returns its document ID, or None on failure."""
+        raise NotImplementedError
+
+    def save_jobs_bulk(self, jobs, user_id=None):
+        """Upsert many jobs; returns ``{'saved', 'failed', 'ids', 'errors'}``."""
+        raise NotImplementedError
+
+    def get_jobs_page(self, user_id=None, filters=None, page_size=JOBS_PAGE_SIZE, cursor=None,
+                      fields=JOB_SUMMARY_FIELDS):
+        """One page of active jobs the user hasn't applied to: ``{'jobs', 'next_cursor'}``."""
+        raise NotImplementedError
+
+    def get_jobs(self, user_id=None, filters=None):
+        raise NotImplementedError
+
+    def get_job(self, job_id, user_id=None):
+        raise NotImplementedError
+
+    def get_applied_jobs_page(self, user_id, page_size=JOBS_PAGE_SIZE, cursor=None):
+        raise NotImplementedError
+
+    def get_applied_jobs(self, user_id):
+        raise NotImplementedError
+
+    def mark_job_applied(self, job_id, user_id):
+        raise NotImplementedError
+
+    def mark_jobs_applied_bulk(self, job_ids, user_id):
+        """Returns ``{'applied', 'failed', 'ids', 'errors'}``."""
+        raise NotImplementedError
+
+    def delete_job(self, job_id, user_id):
+        raise NotImplementedError
+
+    def delete_jobs_bulk(self, job_ids, user_id=None):
+        """Returns ``{'deleted', 'failed', 'ids', 'errors'}``."""
+        raise NotImplementedError
+
+    def expire_stale_jobs(self, max_age_hours=JOB_MAX_AGE_HOURS, batch_size=JOB_SWEEP_BATCH,
+                          pause=JOB_SWEEP_PAUSE, max_batches=None):
+        raise NotImplementedError
+
+    def get_user_stats(self, user_id):
+        raise NotImplementedError
+
+    def get_global_stats(self):
+        raise NotImplementedError
+
+    def get_data_version(self):
+        """Value that changes whenever job data does, or None if unknown."""
+        raise NotImplementedError
+
+    def search_jobs(self, query, user_id=None, filters=None, limit=JOBS_PAGE_SIZE, offset=0):
+        raise NotImplementedError
+
+    def get_job_facets(self, user_id=None, filters=None, top_n=FACET_TOP_N):
+        raise NotImplementedError
+
+    def create_user(self, email, password, display_name):
+        """Register an account; returns its user ID, or None on failure."""
+        raise NotImplementedError
+
+    def verify_user_credentials(self, email, password):
+        """``{'uid', 'email', 'display_name'}`` for a known account, or None."""
+        raise NotImplementedError
+
+
+class FirestoreJobRepository(JobRepository):
+    """The firebase_config functions, against the Firestore client from ``get_db``."""
+
+    name = 'firestore'
+
+    def save_job(self, job_data, user_id=None):
+        return firebase_config.save_job_to_firebase(job_data, user_id)
+
+    def save_jobs_bulk(self, jobs, user_id=None):
+        return firebase_config.save_jobs_bulk(jobs, user_id)
+
+    def get_jobs_page(self, user_id=None, filters=None, page_size=JOBS_PAGE_SIZE, cursor=None,
+                      fields=JOB_SUMMARY_FIELDS):
+        return firebase_config.get_jobs_page(user_id, filters, page_size, cursor, fields=fields)
+
+    def get_jobs(self, user_id=None, filters=None):
+        return firebase_config.get_jobs_from_firebase(user_id, filters)
+
+    def get_job(self, job_id, user_id=None):
+        return firebase_config.get_job(job_id, user_id)
+
+    def get_applied_jobs_page(self, user_id, page_size=JOBS_PAGE_SIZE, cursor=None):
+        return firebase_config.get_applied_jobs_page(user_id, page_size, cursor)
+
+    def get_applied_jobs(self, user_id):
+        return firebase_config.get_applied_jobs_from_firebase(user_id)
+
+    def mark_job_applied(self, job_id, user_id):
+        return firebase_config.mark_job_applied(job_id, user_id)
+
+    def mark_jobs_applied_bulk(self, job_ids, user_id):
+        return firebase_config.mark_jobs_applied_bulk(job_ids, user_id)
+
+    def delete_job(self, job_id, user_id):
+        return firebase_config.delete_job(job_id, user_id)
+
+    def delete_jobs_bulk(self, job_ids, user_id=None):
+        return firebase_config.delete_jobs_bulk(job_ids, user_id)
+
+    def expire_stale_jobs(self, max_age_hours=JOB_MAX_AGE_HOURS, batch_size=JOB_SWEEP_BATCH,
+                          pause=JOB_SWEEP_PAUSE, max_batches=None):
+        return firebase_config.expire_stale_jobs(max_age_hours, batch_size, pause, max_batches)
+
+    def get_user_stats(self, user_id):
+        return firebase_config.get_user_stats(user_id)
+
+    def get_global_stats(self):
+        return firebase_config.get_global_stats()
+
+    def get_data_version(self):
+        return firebase_config.get_data_version()
+
+    def search_jobs(self, query, user_id=None, filters=None, limit=JOBS_PAGE_SIZE, offset=0):
+        return firebase_config.search_jobs(query, user_id, filters, limit, offset)
+
+    def get_job_facets(self, user_id=None, filters=None, top_n=FACET_TOP_N):
+        return firebase_config.get_job_facets(user_id, filters, top_n)
+
+    def create_user(self, email, password, display_name):
+        return firebase_config.create_user(email, password, display_name)
+
+    def verify_user_credentials(self, email, password):
+        return firebase_config.verify_user_credentials(email, password)
+
+
+def open_repository(backend=STORAGE_BACKEND, firebase_ready=False):
+    """Repository for ``backend``, or None when Firestore was asked for but isn't initialized."""
+    if backend == 'sqlite':
+        from sqlite_repository import SQLiteJobRepository
+        return SQLiteJobRepository(SQLITE_PATH)
+    if backend != 'firestore':
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; use 'firestore' or 'sqlite'")
+    return FirestoreJobRepository() if firebase_ready else None
@@ -0,0 +1,115 @@
+"""Incrementally maintained job statistics.
+
+``/api/stats`` used to scan every active job to count remote roles, average
+salaries and distinct companies. Instead, each write to the ``jobs``
+collection now applies the change in its contribution to a single aggregates
+document. This module holds the pure bookkeeping: per-job contributions,
+their deltas, and a HyperLogLog sketch for company cardinality.
+
+The sketch can only grow, so after deletes ``unique_companies`` counts every
+company seen since the last rebuild. ``python manage.py rebuild-stats``
+recomputes everything from scratch.
+"""
+import hashlib
+import math
+
+# Fields a job's contribution depends on; reads for stats only fetch these
+STATS_FIELDS = ['status', 'is_remote', 'min_amount', 'max_amount', 'company']
+
+COUNTER_FIELDS = ['total_jobs', 'remote_jobs', 'salary_sum', 'salary_count']
+
+# 2^10 registers: ~3% standard error, at most 1024 small integers in the document
+HLL_PRECISION = 10
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+
+def job_contribution(job):
+    """Return what one job adds to the aggregate counters."""
+    contribution = dict.fromkeys(COUNTER_FIELDS, 0)
+    if not job or job.get('status') != 'active':
+        return contribution
+
+    contribution['total_jobs'] = 1
+    if job.get('is_remote') == True:
+        contribution['remote_jobs'] = 1
+    if job.get('min_amount') and job.get('max_amount'):
+        try:
+            contribution['salary_sum'] = (float(job['min_amount']) + float(job['max_amount'])) / 2
+            contribution['salary_count'] = 1
+        except (TypeError, ValueError):
+            pass
+    return contribution
+
+
+def contribution_delta(old_job, new_job):
+    """Counter changes for replacing ``old_job`` with ``new_job`` (either may be None)."""
+    old = job_contribution(old_job)
+    new = job_contribution(new_job)
+    return {field: new[field] - old[field] for field in COUNTER_FIELDS}
+
+
+def add_deltas(total, delta):
+    for field in COUNTER_FIELDS:
+        total[field] = total.get(field, 0) + delta[field]
+    return total
+
+
+def _hll_register(value):
+    digest = int.from_bytes(hashlib.sha1(value.encode('utf-8')).digest()[:8], 'big')
+    index = digest >> (64 - HLL_PRECISION)
+    rest = digest & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+    return str(index), rank
+
+
+def company_registers(companies):
+    """Map companies to the HyperLogLog register updates they imply.
+
+    Registers are keyed by index as strings so they can live in a Firestore
+    map and be merged with ``firestore.Maximum``.
+    """
+    registers = {}
+    for company in companies:
+        if not company:
+            continue
+        index, rank = _hll_register(str(company).strip().lower())
+        if rank > registers.get(index, 0):
+            registers[index] = rank
+    return registers
+
+
+def estimate_cardinality(registers):
+    """HyperLogLog estimate of distinct companies from a register map."""
+    m = HLL_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    ranks = [int(registers.get(str(i), 0)) for i in range(m)]
+    estimate = alpha * m * m / sum(2.0 ** -rank for rank in ranks)
+    zeros = ranks.count(0)
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is far more accurate while most registers are empty
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def aggregate_jobs(jobs):
+    """Compute a full aggregates document from an iterable of job dicts."""
+    aggregates = dict.fromkeys(COUNTER_FIELDS, 0)
+    companies = []
+    for job in jobs:
+        add_deltas(aggregates, job_contribution(job))
+        if job.get('status') == 'active':
+            companies.append(job.get('company'))
+    aggregates['company_hll'] = company_registers(companies)
+    return aggregates
+
+
+def summarize(aggregates):
+    """Turn an aggregates document into the /api/stats response fields."""
+    aggregates = aggregates or {}
+    salary_count = aggregates.get('salary_count', 0)
+    return {
+        'total_jobs': max(int(aggregates.get('total_jobs', 0)), 0),
+        'remote_jobs': max(int(aggregates.get('remote_jobs', 0)), 0),
+        'avg_salary': int(aggregates.get('salary_sum', 0) / salary_count) if salary_count > 0 else 0,
+        'unique_companies': estimate_cardinality(aggregates.get('company_hll', {})),
+    }
@@ -0,0 +1,197 @@
+"""Columnar on-disk store for locally scraped jobs.
+
+``app.py`` and ``scout.py`` used to keep results in ``jobs.csv``, which every
+``/api/jobs`` request parsed from text. Jobs are now written once as an
+uncompressed Arrow IPC file with typed columns. Reads memory-map it, so a
+listing touches only the columns and rows it returns, and the table's
+buffers point straight into the page cache instead of being copied or parsed.
+
+The opened table is cached per process and reused until the file's mtime,
+size or inode changes, so repeated polls don't reopen it. ``iter_json``
+serializes a table one record batch at a time for streamed responses.
+
+``merge`` adds a search's results to the stored jobs by job key, so
+searches finishing at the same time don't replace each other's rows.
+
+CSV remains available as an export (``export_csv``) and as a one-off import
+for files written by older versions (``import_csv``).
+"""
+import csv
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from job_records import job_keys, normalize_job_frame
+
+logger = logging.getLogger(__name__)
+
+# Where app.py and scout.py keep scraped jobs
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'jobs.arrow')
+
+# Rows serialized per chunk of a streamed response
+JSON_BATCH_ROWS = int(os.getenv('JOB_STORE_JSON_BATCH_ROWS', '500'))
+
+
+def _column_array(values):
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing types (e.g. numbers and strings) are stored as text
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def frame_to_table(jobs):
+    """Convert a jobs DataFrame into an Arrow table with one typed column per field."""
+    jobs = normalize_job_frame(jobs)
+    arrays = [_column_array(jobs[column].tolist()) for column in jobs.columns]
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in jobs.columns])
+
+
+class JobStore:
+    """Arrow IPC file of jobs, replaced atomically on write and memory-mapped on read."""
+
+    def __init__(self, path=JOB_STORE_PATH):
+        self.path = path
+        self._cached = None
+        self._lock = threading.Lock()
+        # Serializes merges so concurrent searches don't drop each other's rows
+        self._write_lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def write(self, jobs):
+        """Replace the stored jobs with ``jobs`` (a DataFrame); returns the row count."""
+        table = frame_to_table(jobs)
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return table.num_rows
+
+    def merge(self, jobs):
+        """Add ``jobs`` to the stored jobs, keyed by ``job_keys``; returns the row count.
+
+        New rows come first and replace stored rows with the same key, so
+        searches running at the same time each keep their results instead
+        of the last one to finish overwriting the rest.
+        """
+        with self._write_lock:
+            if not self.exists():
+                return self.write(jobs)
+            stored = self.read().to_pandas()
+            stored = stored[~job_keys(stored).isin(set(job_keys(jobs)))]
+            return self.write(pd.concat([jobs, stored], ignore_index=True))
+
+    def read(self, columns=None, offset=0, limit=None):
+        """Memory-mapped view of the stored jobs.
+
+        ``columns`` projects to the named columns (missing ones are skipped)
+        and ``offset``/``limit`` select a row range; both are zero-copy.
+        Raises FileNotFoundError if nothing has been stored yet.
+        """
+        table = self._load()
+        if columns is not None:
+            table = table.select([column for column in columns if column in table.column_names])
+        return table.slice(offset, limit)
+
+    def signature(self):
+        """(mtime_ns, size, inode) of the stored file; changes on every write.
+
+        A single stat call, so it's cheap enough to version HTTP responses.
+        Raises FileNotFoundError if nothing has been stored yet.
+        """
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self):
+        signature = self.signature()
+        with self._lock:
+            if self._cached and self._cached[0] == signature:
+                self.counters['hits'] += 1
+                return self._cached[1]
+
+        with pa.memory_map(self.path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        with self._lock:
+            self.counters['misses'] += 1
+            self._cached = (signature, table)
+        return table
+
+    def columns(self):
+        return list(self._load().column_names)
+
+    def find(self, column, value):
+        """First stored job whose ``column`` equals ``value``, as a dict, or None."""
+        table = self.read()
+        if column not in table.column_names:
+            return None
+        values = table[column]
+        if not pa.types.is_string(values.type):
+            values = values.cast(pa.string())
+        matches = table.filter(pc.equal(values, str(value)))
+        return matches.slice(0, 1).to_pylist()[0] if matches.num_rows else None
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
+        with self._lock:
+            self._cached = None
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'cached_rows': self._cached[1].num_rows if self._cached else 0}
+
+    def export_csv(self, path_or_buffer):
+        """Write the stored jobs as CSV, in the format jobs.csv used to have."""
+        self.read().to_pandas().to_csv(path_or_buffer, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
+
+    def import_csv(self, csv_path):
+        """Load a jobs.csv written by an older version; returns the row count."""
+        return self.write(pd.read_csv(csv_path, encoding='utf-8'))
+
+
+def iter_json(table, ndjson=False, batch_size=JSON_BATCH_ROWS):
+    """Yield ``table`` as a JSON array (or NDJSON lines) in chunks of ``batch_size`` rows.
+
+    Only one chunk of Python objects exists at a time, so memory stays
+    bounded however many jobs are stored.
+    """
+    first = True
+    if not ndjson:
+        yield '['
+    for batch in table.to_batches(max_chunksize=batch_size):
+        rows = [json.dumps(row, default=str) for row in batch.to_pylist()]
+        if not rows:
+            continue
+        if ndjson:
+            yield '\n'.join(rows) + '\n'
+        else:
+            yield ('' if first else ',') + ','.join(rows)
+        first = False
+    if not ndjson:
+        yield ']'
+
+
+def migrate_legacy_csv(store, csv_path='jobs.csv'):
+    """Import ``csv_path`` into an empty store so upgrades keep the last results."""
+    if store.exists() or not os.path.exists(csv_path):
+        return 0
+    try:
+        rows = store.import_csv(csv_path)
+        logger.info(f"Imported {rows} jobs from {csv_path} into {store.path}")
+        return rows
+    except Exception as e:
+        logger.warning(f"Could not import {csv_path}: {str(e)}")
+        return 0
@@ -0,0 +1,73 @@
+"""Background expiry of stale job postings.
+
+Searches only return postings from the last few days, but nothing removed
+them from the job storage afterwards. The sweeper runs the storage
+repository's ``expire_stale_jobs`` every ``JOB_SWEEP_INTERVAL`` seconds on a
+daemon thread; ``python manage.py sweep`` runs the same pass on demand.
+
+One sweep per deployment is enough, so the thread only starts where
+``JOB_SWEEPER_ENABLED=1``: set it on a single process, or leave it off and
+run ``manage.py sweep`` from cron.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps; 0 disables the background sweeper
+JOB_SWEEP_INTERVAL = float(os.getenv('JOB_SWEEP_INTERVAL', '3600'))
+
+# Off by default: every worker and instance that turns it on sweeps on its own
+JOB_SWEEPER_ENABLED = os.getenv('JOB_SWEEPER_ENABLED', '0') == '1'
+
+_thread = None
+_stop = threading.Event()
+_lock = threading.Lock()
+_last_report = None
+
+
+def run_sweep(storage, **kwargs):
+    """Expire stale jobs in ``storage`` (a job_repository.JobRepository) once and remember the report."""
+    global _last_report
+    report = storage.expire_stale_jobs(**kwargs)
+    with _lock:
+        _last_report = report
+    logger.info(f"Job sweep reclaimed {report['deleted']} documents in {report['elapsed']}s")
+    return report
+
+
+def _loop(storage, interval):
+    while not _stop.wait(interval):
+        try:
+            run_sweep(storage)
+        except Exception:
+            logger.exception("Job sweep failed")
+
+
+def start_sweeper(storage, interval=JOB_SWEEP_INTERVAL):
+    """Start the sweeper thread once per process; returns it, or None if disabled."""
+    global _thread
+    if interval <= 0:
+        return None
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _stop.clear()
+            _thread = threading.Thread(target=_loop, args=(storage, interval), name='job-sweeper', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def stop_sweeper(timeout=None):
+    global _thread
+    _stop.set()
+    with _lock:
+        thread, _thread = _thread, None
+    if thread is not None:
+        thread.join(timeout)
+
+
+def last_sweep():
+    """Report of the most recent sweep in this process, or None."""
+    with _lock:
+        return dict(_last_report) if _last_report else None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Maintenance commands for the Scot4Me job store.
+
+Usage:
+    python manage.py rebuild-stats
+    python manage.py sweep [--max-age-hours N]
+    python manage.py rebuild-index
+    python manage.py profile-startup [module] [--top N]
+    python manage.py merge-profiles [path ...] [--route R] [--output FILE] [--top N]
+"""
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+
+
+def rebuild_stats(args):
+    from firebase_config import rebuild_global_stats
+    stats = rebuild_global_stats()
+    print(json.dumps(stats, indent=2))
+
+
+def sweep(args):
+    from job_repository import open_repository, STORAGE_BACKEND
+    storage = open_repository(STORAGE_BACKEND, firebase_ready=True)
+    report = storage.expire_stale_jobs(max_age_hours=args.max_age_hours, batch_size=args.batch_size, pause=args.pause)
+    print(json.dumps(report, indent=2))
+
+
+def rebuild_index(args):
+    from firebase_config import rebuild_search_index
+    print(f"Indexed {rebuild_search_index()} jobs")
+
+
+def profile_startup(args):
+    from startup import profile_imports
+    report = profile_imports(args.module, top=args.top)
+    print(f"import {report['module']}: {report['wall_ms']} ms wall clock (including interpreter start)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in report['imports']:
+        print(f"{row['cumulative_ms']:>14} {row['self_ms']:>9}  {row['module']}")
+
+
+def merge_profiles(args):
+    from collections import Counter
+    import profiling
+    merged = profiling.merge_profiles(args.paths or [profiling.PROFILE_DIR], route=args.route)
+    if not merged:
+        print("No profiles found")
+        return
+    for route, stacks in sorted(merged.items()):
+        print(f"\n{route}: {sum(stacks.values())} samples")
+        print(f"{'self':>8} {'total':>8}  frame")
+        for label, own, total in profiling.hottest_frames(stacks, top=args.top):
+            print(f"{own:>8} {total:>8}  {label}")
+    if args.output:
+        if args.output.endswith('.json'):
+            with open(args.output, 'w') as f:
+                json.dump(profiling.to_speedscope(merged), f)
+        else:
+            combined = sum(merged.values(), Counter())
+            with open(args.output, 'w') as f:
+                f.write(profiling.to_collapsed(combined))
+        print(f"\nMerged profile written to {args.output}")
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-stats', help='Recompute the aggregates document from all active jobs')
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    from firebase_config import JOB_MAX_AGE_HOURS, JOB_SWEEP_BATCH, JOB_SWEEP_PAUSE
+    expire = commands.add_parser('sweep', help='Delete jobs not re-scraped within the maximum age')
+    expire.add_argument('--max-age-hours', type=float, default=JOB_MAX_AGE_HOURS)
+    expire.add_argument('--batch-size', type=int, default=JOB_SWEEP_BATCH)
+    expire.add_argument('--pause', type=float, default=JOB_SWEEP_PAUSE, help='Seconds to wait between batches')
+    expire.set_defaults(handler=sweep)
+
+    index = commands.add_parser('rebuild-index', help='Rebuild the local full-text search index from all active jobs')
+    index.set_defaults(handler=rebuild_index)
+
+    profile = commands.add_parser('profile-startup', help='Report per-module import times for a cold start')
+    profile.add_argument('module', nargs='?', default='server')
+    profile.add_argument('--top', type=int, default=25)
+    profile.set_defaults(handler=profile_startup, needs_firebase=False)
+
+    merge = commands.add_parser('merge-profiles', help='Aggregate request profiles from all workers by route')
+    merge.add_argument('paths', nargs='*', help='Profile files or directories (default: PROFILE_DIR)')
+    merge.add_argument('--route', help='Only merge profiles of this route, e.g. /api/stats')
+    merge.add_argument('--output', help='Write the merged stacks: .json for speedscope, otherwise collapsed')
+    merge.add_argument('--top', type=int, default=20, help='Hottest frames to list per route')
+    merge.set_defaults(handler=merge_profiles, needs_firebase=False)
+
+    args = parser.parse_args(argv)
+
+    from firebase_config import initialize_firebase
+    if getattr(args, 'needs_firebase', True) and not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    args.handler(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,436 @@
+"""Request, scrape and Firestore metrics in Prometheus text format, plus structured logging.
+
+``init_app`` times every request by route and serves the registry at
+``/metrics``. ``observe_scrape`` records each job board's scrape duration and
+result count. ``trace_firestore`` wraps a Firestore client (or
+``fake_firestore.FakeFirestore``) so every RPC it sends is counted, along
+with the documents it read or wrote. The counts are attributed to the
+outermost ``instrument``-ed storage function on the stack (e.g.
+``get_global_stats``) and to the HTTP route that caused them. Each request's
+totals are also added to its log record.
+
+``configure_logging`` installs a root handler that appends ``extra`` fields to
+every record, as ``key=value`` pairs or as one JSON object per line with
+``LOG_FORMAT=json``.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import types
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to skip Firestore tracing and the /metrics endpoint
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+
+# Bearer token /metrics requires when set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Requests slower than this many seconds are logged at INFO instead of DEBUG
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '1.0'))
+
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in [*zip(names, values), *extra]]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observations per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(tuple(str(labels[name]) for name in self.labelnames), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'scout4me_http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route', 'status'])
+HTTP_FIRESTORE_RPCS = REGISTRY.counter(
+    'scout4me_http_firestore_rpcs_total', 'Firestore RPCs sent while serving each route', ['route'])
+HTTP_FIRESTORE_READS = REGISTRY.counter(
+    'scout4me_http_firestore_reads_total', 'Firestore documents read while serving each route', ['route'])
+HTTP_FIRESTORE_WRITES = REGISTRY.counter(
+    'scout4me_http_firestore_writes_total', 'Firestore documents written while serving each route', ['route'])
+
+SCRAPE_DURATION = REGISTRY.histogram(
+    'scout4me_scrape_site_duration_seconds', 'Time to scrape one job board', ['site', 'outcome'])
+SCRAPE_JOBS = REGISTRY.counter(
+    'scout4me_scrape_site_jobs_total', 'Jobs returned by each job board', ['site'])
+
+STORAGE_CALL_DURATION = REGISTRY.histogram(
+    'scout4me_storage_call_duration_seconds', 'Latency of storage functions', ['function'])
+FIRESTORE_RPCS = REGISTRY.counter(
+    'scout4me_firestore_rpcs_total', 'Firestore RPCs by storage function and operation', ['function', 'operation'])
+FIRESTORE_READS = REGISTRY.counter(
+    'scout4me_firestore_reads_total', 'Firestore documents read by storage function', ['function'])
+FIRESTORE_WRITES = REGISTRY.counter(
+    'scout4me_firestore_writes_total', 'Firestore documents written by storage function', ['function'])
+
+# Outermost instrumented storage function and the current request's Firestore totals
+_function = contextvars.ContextVar('metrics_function', default=None)
+_request_usage = contextvars.ContextVar('metrics_request_usage', default=None)
+
+UNATTRIBUTED = 'other'
+
+
+def instrument(function):
+    """Time ``function`` and attribute the Firestore RPCs it sends to its name.
+
+    Calls nested inside another instrumented function count toward the
+    outer one, so each RPC is attributed to the entry point that caused it.
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        token = _function.set(name) if _function.get() is None else None
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            STORAGE_CALL_DURATION.observe(time.perf_counter() - started, function=name)
+            if token is not None:
+                _function.reset(token)
+    return wrapper
+
+
+def observe_scrape(site, elapsed, jobs_count, outcome='ok'):
+    """Record one job board scrape; ``outcome`` is ok, error, timeout or cached."""
+    SCRAPE_DURATION.observe(elapsed, site=site, outcome=outcome)
+    SCRAPE_JOBS.inc(jobs_count, site=site)
+
+
+def _record(function, usage, operation, reads=0, writes=0):
+    FIRESTORE_RPCS.inc(function=function, operation=operation)
+    if reads:
+        FIRESTORE_READS.inc(reads, function=function)
+    if writes:
+        FIRESTORE_WRITES.inc(writes, function=function)
+    if usage is not None:
+        usage['rpcs'] += 1
+        usage['reads'] += reads
+        usage['writes'] += writes
+
+
+# Firestore client objects worth tracing, by class name without the fake_firestore prefix
+_TRACED_KINDS = {'Client', 'CollectionReference', 'DocumentReference', 'Query', 'AggregationQuery',
+                 'WriteBatch', 'Transaction'}
+
+
+def _kind(target):
+    name = type(target).__name__
+    if name == 'FakeFirestore':
+        return 'Client'
+    return name[len('Fake'):] if name.startswith('Fake') else name
+
+
+def _wrap(value):
+    return TracedFirestore(value) if _kind(value) in _TRACED_KINDS else value
+
+
+def _unwrap(value):
+    if isinstance(value, TracedFirestore):
+        return value._traced_target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    if isinstance(value, types.GeneratorType):
+        return (_unwrap(item) for item in value)
+    return value
+
+
+def _counted(results, function, usage, operation):
+    """Yield ``results``, recording one RPC and a read per result once the stream ends."""
+    reads = 0
+    try:
+        for result in results:
+            reads += 1
+            yield result
+    finally:
+        # Firestore bills a query that matches nothing as one read
+        _record(function, usage, operation, reads=max(reads, 1) if operation == 'query' else reads)
+
+
+class TracedFirestore:
+    """Proxy for a Firestore client object that counts the RPCs sent through it.
+
+    Calls that return references, queries, batches or transactions return
+    traced proxies too. Proxies are unwrapped before they are handed back to
+    the SDK, so ``firestore.transactional`` and ``isinstance`` checks inside
+    the client keep working.
+    """
+
+    def __init__(self, target):
+        object.__setattr__(self, '_traced_target', target)
+        object.__setattr__(self, '_traced_kind', _kind(target))
+
+    def __getattr__(self, name):
+        value = getattr(self._traced_target, name)
+        if not callable(value):
+            return _wrap(value)
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            return self._traced_call(name, value, _unwrap(args), {key: _unwrap(item) for key, item in kwargs.items()})
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._traced_target, name, value)
+
+    def __len__(self):
+        return len(self._traced_target)
+
+    def __eq__(self, other):
+        return self._traced_target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._traced_target)
+
+    def __repr__(self):
+        return f'<traced {self._traced_target!r}>'
+
+    def _traced_call(self, name, method, args, kwargs):
+        kind = self._traced_kind
+        function, usage = _function.get() or UNATTRIBUTED, _request_usage.get()
+
+        if kind == 'Transaction' and name in ('_begin', '_commit', '_rollback'):
+            if name == '_rollback' and not self._traced_target.in_progress:
+                return method(*args, **kwargs)
+            writes = len(self._traced_target) if name == '_commit' else 0
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record(function, usage, name[1:], writes=writes)
+        if kind in ('WriteBatch', 'Transaction') and name == 'commit':
+            writes = len(self._traced_target)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record(function, usage, 'commit', writes=writes)
+        if kind == 'DocumentReference' and name in ('set', 'create', 'update', 'delete'):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record(function, usage, 'commit', writes=1)
+        if kind == 'AggregationQuery' and name == 'get':
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record(function, usage, 'aggregate', reads=1)
+        if name in ('get', 'stream', 'get_all', 'list_documents') and kind != 'WriteBatch':
+            lookup = name == 'get_all' or kind == 'DocumentReference' or (
+                kind == 'Transaction' and _kind(args[0] if args else kwargs.get('ref_or_query')) == 'DocumentReference')
+            operation = 'lookup' if lookup else 'list' if name == 'list_documents' else 'query'
+            result = method(*args, **kwargs)
+            if hasattr(result, 'exists'):
+                _record(function, usage, operation, reads=1)
+                return result
+            if isinstance(result, list):
+                _record(function, usage, operation, reads=max(len(result), 1) if operation == 'query' else len(result))
+                return result
+            return _counted(result, function, usage, operation)
+        return _wrap(method(*args, **kwargs))
+
+
+def trace_firestore(db):
+    """``db`` wrapped in ``TracedFirestore``; unchanged when it is None or METRICS_ENABLED is off."""
+    if db is None or not METRICS_ENABLED or isinstance(db, TracedFirestore):
+        return db
+    return TracedFirestore(db)
+
+
+def request_usage():
+    """Firestore RPCs, reads and writes the current request has caused so far, or None outside one."""
+    usage = _request_usage.get()
+    return dict(usage) if usage is not None else None
+
+
+def init_app(app):
+    """Time every request of ``app`` and serve the registry at ``/metrics``."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        _request_usage.set({'rpcs': 0, 'reads': 0, 'writes': 0})
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(elapsed, method=request.method, route=route, status=response.status_code)
+        usage = _request_usage.get() or {'rpcs': 0, 'reads': 0, 'writes': 0}
+        if usage['rpcs']:
+            HTTP_FIRESTORE_RPCS.inc(usage['rpcs'], route=route)
+            HTTP_FIRESTORE_READS.inc(usage['reads'], route=route)
+            HTTP_FIRESTORE_WRITES.inc(usage['writes'], route=route)
+        logger.log(logging.INFO if elapsed >= SLOW_REQUEST_SECONDS else logging.DEBUG,
+                   f"{request.method} {request.path} {response.status_code}",
+                   extra={'route': route, 'status': response.status_code, 'duration_ms': round(elapsed * 1000, 1),
+                          'firestore_rpcs': usage['rpcs'], 'firestore_reads': usage['reads'],
+                          'firestore_writes': usage['writes']})
+        return response
+
+    @app.teardown_request
+    def reset_request_metrics(exc=None):
+        # Worker threads are reused across requests
+        _request_usage.set(None)
+
+    @app.route('/metrics')
+    def metrics():
+        if not METRICS_ENABLED:
+            return Response('Metrics are disabled\n', status=404, mimetype='text/plain')
+        if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """``time level logger: message key=value ...``"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = ' '.join(f'{key}={value}' for key, value in _extra_fields(record).items())
+        return f'{line} {fields}' if fields else line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with ``extra`` fields at the top level."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """Send log records to stderr as key=value text or JSON (``LOG_FORMAT``), unless logging is already set up."""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if (fmt or LOG_FORMAT) == 'json' else KeyValueFormatter())
+    root.addHandler(handler)
+    root.setLevel(level or LOG_LEVEL)
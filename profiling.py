@@ -0,0 +1,354 @@
+"""Opt-in sampling profiler for individual requests.
+
+A profiled request gets a sampler thread that records the request thread's
+Python stack every ``PROFILE_INTERVAL`` seconds until the request is torn
+down. The samples cover scraping, pandas, JSON encoding, compression and
+waits on Firestore. A request is profiled when it carries
+``X-Profile: <PROFILE_TOKEN>``, or at random for a ``PROFILE_SAMPLE_RATE``
+fraction of requests to ``PROFILE_ROUTES``. A search queued by a profiled
+``/api/search-jobs`` request is profiled on its worker thread too.
+
+Each profile is written to ``PROFILE_DIR`` as collapsed stacks (one
+``frame;frame;frame count`` line per distinct stack, the input of
+flamegraph.pl and speedscope) or as a speedscope JSON file. The file name
+starts with the route, so ``python manage.py merge-profiles`` can aggregate
+the dumps of every worker by route.
+
+The sampler caps its own cost. It backs off so that taking samples uses at
+most ``PROFILE_MAX_OVERHEAD`` of the wall time, stops after
+``PROFILE_MAX_SECONDS``, and at most ``PROFILE_MAX_CONCURRENT`` randomly
+sampled requests are profiled at once.
+"""
+import functools
+import glob
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Fraction of requests to PROFILE_ROUTES profiled at random (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+
+# Route rules eligible for random sampling, e.g. "/api/search-jobs,/api/stats"; empty means all
+PROFILE_ROUTES = [route for route in os.getenv('PROFILE_ROUTES', '').split(',') if route]
+
+# Requests sending this value in PROFILE_HEADER are always profiled; unset disables the header
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_HEADER = 'X-Profile'
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+# collapsed or speedscope
+PROFILE_FORMAT = os.getenv('PROFILE_FORMAT', 'collapsed')
+
+# Seconds between samples, before backing off to respect PROFILE_MAX_OVERHEAD
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+
+# Largest fraction of wall time the sampler may spend taking samples
+PROFILE_MAX_OVERHEAD = float(os.getenv('PROFILE_MAX_OVERHEAD', '0.05'))
+
+# Sampling stops after this many seconds; the profile is marked truncated
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '60'))
+
+PROFILE_MAX_CONCURRENT = int(os.getenv('PROFILE_MAX_CONCURRENT', '2'))
+
+FORMATS = {'collapsed': '.collapsed', 'speedscope': '.speedscope.json'}
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+_slots = threading.BoundedSemaphore(PROFILE_MAX_CONCURRENT)
+_current = threading.local()
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_label(code):
+    filename = code.co_filename
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames in the collapsed format
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def route_slug(route):
+    """File-name-safe form of a route or profile name, e.g. ``/api/stats`` -> ``api_stats``."""
+    return re.sub(r'[^A-Za-z0-9-]+', '_', route).strip('_') or 'root'
+
+
+class Profile:
+    """Samples one thread's stack until ``stop``.
+
+    ``stacks`` counts each distinct stack (root first) seen by the sampler.
+    """
+
+    def __init__(self, name, interval=PROFILE_INTERVAL, max_overhead=PROFILE_MAX_OVERHEAD,
+                 max_seconds=PROFILE_MAX_SECONDS):
+        self.name = name
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampler_seconds = 0.0
+        self.elapsed = 0.0
+        self.truncated = False
+        self.started_at = time.time()
+        # Where end() writes the profile (default: profile_path) and whether it holds a sampling slot
+        self.path = None
+        self.holds_slot = False
+        self._stopped = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self, thread_id=None):
+        """Sample ``thread_id`` (default: the calling thread) on a daemon thread; returns self."""
+        target = thread_id if thread_id is not None else threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(target,), name=f'profile-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, target):
+        while not self._stopped.is_set():
+            began = time.perf_counter()
+            if began - self._started > self.max_seconds:
+                self.truncated = True
+                return
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                return
+            self.stacks[_stack(frame)] += 1
+            self.samples += 1
+            cost = time.perf_counter() - began
+            self.sampler_seconds += cost
+            # Sleep long enough that sampling stays under max_overhead of the wall time
+            self._stopped.wait(max(self.interval, cost / self.max_overhead - cost))
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.elapsed = time.perf_counter() - self._started
+        return self
+
+    @property
+    def overhead(self):
+        return self.sampler_seconds / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return {'profile': self.name, 'samples': self.samples, 'elapsed_s': round(self.elapsed, 4),
+                'overhead': round(self.overhead, 4), 'truncated': self.truncated}
+
+    def write(self, directory=None, fmt=None, path=None):
+        """Write the profile as ``fmt`` (default PROFILE_FORMAT) and return the file path."""
+        fmt = fmt or PROFILE_FORMAT
+        if path is None:
+            path = profile_path(self.name, directory, fmt, self.started_at)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if fmt == 'speedscope':
+            content = json.dumps(to_speedscope({self.name: self.stacks}))
+        else:
+            content = to_collapsed(self.stacks)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+
+def profile_path(name, directory=None, fmt=None, started_at=None):
+    """``<route>.<pid>.<milliseconds>.<ext>`` in ``directory`` (default PROFILE_DIR)."""
+    directory, fmt = directory or PROFILE_DIR, fmt or PROFILE_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown profile format {fmt!r}; expected one of {sorted(FORMATS)}')
+    millis = int((started_at or time.time()) * 1000)
+    return os.path.join(directory, f'{route_slug(name)}.{os.getpid()}.{millis}{FORMATS[fmt]}')
+
+
+def to_collapsed(stacks):
+    return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+
+def to_speedscope(profiles):
+    """Speedscope JSON for ``{name: stacks}``, one sampled profile per name weighted by sample count."""
+    frames, index = [], {}
+    documents = []
+    for name, stacks in profiles.items():
+        samples, weights = [], []
+        for stack, count in stacks.most_common():
+            sample = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({'name': label})
+                sample.append(index[label])
+            samples.append(sample)
+            weights.append(count)
+        documents.append({'type': 'sampled', 'name': name, 'unit': 'none', 'startValue': 0,
+                          'endValue': sum(weights), 'samples': samples, 'weights': weights})
+    return {'$schema': SPEEDSCOPE_SCHEMA, 'exporter': 'scout4me', 'shared': {'frames': frames},
+            'profiles': documents}
+
+
+def read_profile(path):
+    """Stacks in a collapsed or speedscope file, merged across the profiles it holds."""
+    stacks = Counter()
+    with open(path) as f:
+        if path.endswith(FORMATS['speedscope']):
+            document = json.load(f)
+            names = [frame['name'] for frame in document['shared']['frames']]
+            for profile in document['profiles']:
+                for sample, weight in zip(profile['samples'], profile['weights']):
+                    stacks[tuple(names[i] for i in sample)] += weight
+            return stacks
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[tuple(stack.split(';'))] += int(count)
+    return stacks
+
+
+def _route_of(path):
+    # Files are named <route>.<pid>.<milliseconds>.<ext>
+    return os.path.basename(path).split('.', 1)[0]
+
+
+def merge_profiles(paths, route=None):
+    """Aggregate dump files (or directories of them) into ``{route: stacks}``."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '*.collapsed')) +
+                            glob.glob(os.path.join(path, '*.speedscope.json')))
+        elif os.path.isfile(path):
+            files.append(path)
+    merged = {}
+    for path in files:
+        name = _route_of(path)
+        if route and name != route_slug(route):
+            continue
+        merged.setdefault(name, Counter()).update(read_profile(path))
+    return merged
+
+
+def hottest_frames(stacks, top=20):
+    """``(frame, self_samples, total_samples)`` for the ``top`` frames with the most samples on-CPU."""
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for label in set(stack):
+            total[label] += count
+    return [(label, count, total[label]) for label, count in own.most_common(top)]
+
+
+def current():
+    """The Profile of the request running on this thread, or None."""
+    return getattr(_current, 'profile', None)
+
+
+def begin(name, forced=False):
+    """Start profiling the calling thread as ``name``; returns the Profile or None.
+
+    Random samples are skipped while PROFILE_MAX_CONCURRENT profiles are
+    running. Forced ones (admin header, searches queued by a profiled
+    request) always run.
+    """
+    if not forced and not _slots.acquire(blocking=False):
+        return None
+    profile = Profile(name).start()
+    profile.holds_slot = not forced
+    _current.profile = profile
+    return profile
+
+
+def end(profile):
+    """Stop ``profile``, write it to PROFILE_DIR and return the file path."""
+    _current.profile = None
+    profile.stop()
+    if profile.holds_slot:
+        _slots.release()
+    try:
+        path = profile.write(path=profile.path)
+    except OSError as e:
+        logger.error(f"Could not write profile {profile.name}: {e}")
+        return None
+    logger.info(f"Profiled {profile.name}: {profile.samples} samples in {profile.elapsed:.2f}s",
+                extra={**profile.summary(), 'path': path})
+    return path
+
+
+def propagate(function, name=None):
+    """``function`` profiled on whichever thread runs it when the current request is profiled.
+
+    Returns ``function`` unchanged otherwise, e.g. to follow a search from
+    ``/api/search-jobs`` onto its queue worker.
+    """
+    profile = current()
+    if profile is None:
+        return function
+    name = f'{profile.name}.{name or function.__name__}'
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        worker_profile = begin(name, forced=True)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            end(worker_profile)
+    return wrapper
+
+
+def _wants_profile(route):
+    from flask import request
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return 'forced'
+    if PROFILE_SAMPLE_RATE and (not PROFILE_ROUTES or route in PROFILE_ROUTES) \
+            and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sampled'
+    return None
+
+
+def init_app(app):
+    """Profile requests of ``app`` that ask for it or are sampled (see module docstring)."""
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        route = request.url_rule.rule if request.url_rule else None
+        reason = _wants_profile(route) if route else None
+        if reason is None:
+            return
+        profile = begin(route, forced=reason == 'forced')
+        if profile is not None:
+            profile.path = profile_path(route, started_at=profile.started_at)
+            g.profile = profile
+
+    @app.after_request
+    def name_profile(response):
+        profile = g.get('profile')
+        if profile is not None and request.headers.get(PROFILE_HEADER):
+            response.headers['X-Profile-File'] = os.path.basename(profile.path)
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc=None):
+        # Runs after after_request hooks, so compression is included in the samples
+        profile = g.pop('profile', None)
+        if profile is not None:
+            end(profile)
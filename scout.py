@@ -1,8 +1,8 @@
-import csv
-from jobspy import scrape_jobs
+from scrape_engine import scrape_jobs_parallel
+from job_store import JobStore
 
-jobs = scrape_jobs(
-    site_name=["indeed", "linkedin", "zip_recruiter", "google"], # "glassdoor", "bayt", "naukri", "bdjobs"
+jobs, site_reports = scrape_jobs_parallel(
+    sites=["indeed", "linkedin", "zip_recruiter", "google"], # "glassdoor", "bayt", "naukri", "bdjobs"
     search_term="Generative AI engineer",
     google_search_term="Generative AI engineer jobs near San Francisco, CA since yesterday",
     location="Dallas, TX",
@@ -13,6 +13,10 @@ jobs = scrape_jobs(
     # linkedin_fetch_description=True # gets more info such as description, direct job url (slower)
     # proxies=["208.195.175.46:65095", "208.195.175.45:65095", "localhost"],
 )
+for report in site_reports:
+    print(f"{report['site']}: {report['jobs_count']} jobs in {report['elapsed']}s" + (f" ({report['error']})" if report['error'] else ""))
 print(f"Found {len(jobs)} jobs")
 print(jobs.head())
-jobs.to_csv("jobs.csv", quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False) # to_excel
\ No newline at end of file
+store = JobStore()
+store.write(jobs)
+store.export_csv("jobs.csv") # to_excel
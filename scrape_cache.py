@@ -0,0 +1,180 @@
+"""TTL + LRU cache for scrape results.
+
+Users often repeat a search within minutes. scrape_engine consults this
+cache per site before calling jobspy, keyed on the normalized query, so a
+repeat search only scrapes the boards whose cached results expired or failed.
+
+Entries live in memory (size-bounded, least recently used evicted first) and
+optionally in a directory of pickles that survives restarts.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from startup import lazy_module
+
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached scrape stays fresh; 0 disables caching
+SCRAPE_CACHE_TTL = int(os.getenv('SCRAPE_CACHE_TTL', '600'))
+
+# Maximum number of (query, site) results kept in memory
+SCRAPE_CACHE_SIZE = int(os.getenv('SCRAPE_CACHE_SIZE', '256'))
+
+# Optional directory for the on-disk tier
+SCRAPE_CACHE_DIR = os.getenv('SCRAPE_CACHE_DIR')
+
+
+def _normalize_text(value):
+    return ' '.join(str(value or '').lower().split())
+
+
+def make_key(search_term, location, hours_old, results_wanted, sites,
+             google_search_term=None, country_indeed='USA', **extra_kwargs):
+    """Return a stable cache key for a normalized scrape query.
+
+    Every argument that reaches jobspy is part of the key, so searches that
+    differ only in the Google query, the Indeed country or extra jobspy
+    options never share results.
+    """
+    query = {
+        'search_term': _normalize_text(search_term),
+        'location': _normalize_text(location),
+        'hours_old': int(hours_old) if hours_old is not None else None,
+        'results_wanted': int(results_wanted),
+        'sites': sorted(_normalize_text(site) for site in sites),
+        'google_search_term': _normalize_text(google_search_term) if google_search_term else None,
+        'country_indeed': _normalize_text(country_indeed),
+        'extra': extra_kwargs,
+    }
+    encoded = json.dumps(query, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class ScrapeCache:
+    """Thread-safe TTL + LRU cache of scrape result DataFrames."""
+
+    def __init__(self, ttl=SCRAPE_CACHE_TTL, max_entries=SCRAPE_CACHE_SIZE, cache_dir=SCRAPE_CACHE_DIR):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key):
+        """Return a copy of the cached DataFrame for ``key``, or None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, jobs = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return jobs.copy()
+                del self._entries[key]
+                self.counters['expired'] += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            stored_at, jobs = entry
+            self.counters['disk_hits'] += 1
+            self._store(key, jobs, stored_at)
+        return jobs.copy()
+
+    def put(self, key, jobs):
+        """Cache ``jobs`` under ``key`` in memory and, if configured, on disk."""
+        if not self.enabled:
+            return
+        now = time.time()
+        jobs = jobs.copy()
+        with self._lock:
+            self._store(key, jobs, now)
+        self._write_disk(key, jobs)
+
+    def _store(self, key, jobs, stored_at):
+        self._entries[key] = (stored_at, jobs)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _read_disk(self, key, now):
+        """(stored_at, jobs) from the disk tier, or None on a miss.
+
+        The stat and the load share one try, so a file removed or replaced
+        by another process in between is a miss rather than an error.
+        """
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at > self.ttl:
+                os.remove(path)
+                return None
+            return stored_at, pd.read_pickle(path)
+        except OSError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable scrape cache file {path}: {str(e)}")
+            return None
+
+    def _write_disk(self, key, jobs):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            jobs.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write scrape cache file {path}: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hit_rate = (self.counters['hits'] + self.counters['disk_hits']) / lookups if lookups else 0
+            return {**self.counters, 'entries': len(self._entries), 'hit_rate': round(hit_rate, 3)}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """Return the process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ScrapeCache()
+        return _default_cache
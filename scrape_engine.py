@@ -0,0 +1,176 @@
+"""Parallel job board scraping shared by server.py, app.py and scout.py.
+
+jobspy's ``scrape_jobs`` accepts several sites at once but only returns when
+the slowest board is done. This module runs one ``scrape_jobs`` call per site
+on a small thread pool of its own per search, gives every site its own
+timeout, counted from when its scrape starts, and merges the frames as they
+complete, so one slow board no longer sets the latency for
+the others. Each site's results go through scrape_cache, so repeated
+queries only re-scrape the boards whose cached results expired or failed.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metrics import observe_scrape
+from scrape_cache import get_scrape_cache, make_key
+from startup import lazy_module
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_module('pandas')
+
+DEFAULT_SITES = ["indeed", "linkedin", "zip_recruiter", "google"]
+
+# Seconds each site may take before its results are abandoned
+DEFAULT_SITE_TIMEOUT = float(os.getenv('SCRAPE_SITE_TIMEOUT', '60'))
+
+# Per-site overrides, e.g. SCRAPE_SITE_TIMEOUTS="linkedin=45,google=20"
+SITE_TIMEOUTS = {}
+for _entry in os.getenv('SCRAPE_SITE_TIMEOUTS', '').split(','):
+    if '=' in _entry:
+        _site, _seconds = _entry.split('=', 1)
+        SITE_TIMEOUTS[_site.strip()] = float(_seconds)
+
+# Upper bound on concurrent site scrapes within one search. Each search gets
+# its own pool: a timed-out scrape keeps its thread busy until jobspy returns,
+# and in a shared pool those threads would queue up later searches.
+MAX_WORKERS = int(os.getenv('SCRAPE_MAX_WORKERS', '8'))
+
+# Seconds between deadline checks while some sites are still queued
+_QUEUED_POLL_INTERVAL = 0.05
+
+
+def _scrape_site(scraper, site, scrape_kwargs, started_at):
+    started = started_at[site] = time.monotonic()
+    jobs = scraper(site_name=[site], **scrape_kwargs)
+    return jobs, time.monotonic() - started
+
+
+def scrape_jobs_parallel(search_term, location, results_wanted=20, hours_old=72,
+                         sites=None, google_search_term=None, country_indeed='USA',
+                         site_timeouts=None, on_site_done=None, scraper=None, cache=None, **extra_kwargs):
+    """Scrape every site concurrently and merge the results.
+
+    Args:
+        sites: Job boards to query, defaults to ``DEFAULT_SITES``.
+        site_timeouts: Optional ``{site: seconds}`` overriding ``SITE_TIMEOUTS``.
+        on_site_done: Optional callback ``(report, completed, total)`` invoked as
+            each site finishes, fails or times out.
+        scraper: Callable with jobspy's ``scrape_jobs`` signature. Defaults to
+            jobspy itself; ImportError propagates if jobspy is not installed.
+        cache: ``ScrapeCache`` to consult per site, defaults to the shared
+            one. Pass False to always scrape.
+
+    Returns:
+        A ``(jobs, site_reports)`` tuple. ``jobs`` is a DataFrame of all sites
+        that finished in time, ``site_reports`` a list of dicts with ``site``,
+        ``jobs_count``, ``elapsed``, ``error`` and ``cached`` for every
+        requested site.
+    """
+    sites = list(sites or DEFAULT_SITES)
+    if cache is None:
+        cache = get_scrape_cache()
+    if not cache or not cache.enabled:
+        cache = None
+    # The default Google query is derived from fields already in the key
+    cache_keys = {site: make_key(search_term, location, hours_old, results_wanted, [site],
+                                 google_search_term, country_indeed, **extra_kwargs)
+                  for site in sites}
+    timeouts = {**SITE_TIMEOUTS, **(site_timeouts or {})}
+    scrape_kwargs = {
+        'search_term': search_term,
+        'google_search_term': google_search_term or f"{search_term} jobs near {location} since yesterday",
+        'location': location,
+        'results_wanted': results_wanted,
+        'hours_old': hours_old,
+        'country_indeed': country_indeed,
+        **extra_kwargs,
+    }
+
+    frames = {}
+    reports = {}
+
+    def record(site, jobs_count, elapsed, error=None, cached=False):
+        report = {'site': site, 'jobs_count': jobs_count, 'elapsed': round(elapsed, 3), 'error': error, 'cached': cached}
+        reports[site] = report
+        observe_scrape(site, elapsed, jobs_count,
+                       'cached' if cached else 'timeout' if error == 'timed out' else 'error' if error else 'ok')
+        if error:
+            logger.warning(f"Scraping {site} failed after {elapsed:.1f}s: {error}")
+        elif not cached:
+            logger.info(f"Scraped {jobs_count} jobs from {site} in {elapsed:.1f}s")
+        if on_site_done:
+            on_site_done(report, len(reports), len(sites))
+
+    to_scrape = []
+    for site in sites:
+        jobs = cache.get(cache_keys[site]) if cache else None
+        if jobs is None:
+            to_scrape.append(site)
+            continue
+        if not jobs.empty:
+            frames[site] = jobs
+        record(site, len(jobs), 0, cached=True)
+
+    if to_scrape and scraper is None:
+        from jobspy import scrape_jobs as scraper
+
+    if not to_scrape:
+        return _merge(sites, frames, reports)
+
+    executor = ThreadPoolExecutor(max_workers=min(len(to_scrape), MAX_WORKERS), thread_name_prefix='scrape')
+    # Filled in by each task as it starts, so time spent queued doesn't count against a site
+    started_at = {}
+    futures = {executor.submit(_scrape_site, scraper, site, scrape_kwargs, started_at): site for site in to_scrape}
+
+    def deadline(future):
+        site = futures[future]
+        started = started_at.get(site)
+        return started + timeouts.get(site, DEFAULT_SITE_TIMEOUT) if started is not None else None
+
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        deadlines = {future: deadline(future) for future in pending}
+        expired = {future for future, at in deadlines.items() if at is not None and at <= now}
+        for future in expired:
+            # The worker thread cannot be interrupted; its result is simply dropped
+            site = futures[future]
+            record(site, 0, now - started_at[site], 'timed out')
+        pending -= expired
+        if not pending:
+            break
+
+        upcoming = [at for future, at in deadlines.items() if future in pending and at is not None]
+        timeout = min(upcoming) - now if upcoming else _QUEUED_POLL_INTERVAL
+        if len(upcoming) < len(pending):
+            # Queued sites have no deadline yet, so check back once they may have started
+            timeout = min(timeout, _QUEUED_POLL_INTERVAL)
+        done, pending = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            site = futures[future]
+            try:
+                jobs, elapsed = future.result()
+            except Exception as e:
+                record(site, 0, time.monotonic() - started_at.get(site, now), str(e))
+                continue
+            if jobs is None:
+                jobs = pd.DataFrame()
+            if cache:
+                cache.put(cache_keys[site], jobs)
+            if not jobs.empty:
+                frames[site] = jobs
+            record(site, len(jobs), elapsed)
+
+    # Don't wait for abandoned scrapes; their threads exit when jobspy returns
+    executor.shutdown(wait=False)
+    return _merge(sites, frames, reports)
+
+
+def _merge(sites, frames, reports):
+    # Keep the requested site order so merged output is stable between runs
+    ordered = [frames[site] for site in sites if site in frames]
+    jobs = pd.concat(ordered, ignore_index=True) if ordered else pd.DataFrame()
+    return jobs, [reports[site] for site in sites]
@@ -0,0 +1,399 @@
+"""In-memory inverted index with BM25 ranking for job search.
+
+The dashboard used to download every job and substring-match it in the
+browser. Instead, jobs are indexed as they are ingested (and removed when
+applied, deleted or expired), and ``/api/search`` ranks matches with BM25
+over title, company, skills and description, with title and company terms
+weighted higher. Exact-match filters (owner, location, company, job type,
+remote) are applied while scoring.
+
+The index also keeps per-owner count tables and value-to-document sets for
+the filter fields, so ``facets`` can answer the dashboard's filter dropdowns
+without anyone scanning the jobs.
+
+The index lives in memory and a background thread pickles it to
+``SEARCH_INDEX_PATH`` every ``SEARCH_INDEX_SAVE_INTERVAL`` seconds while it
+changes, so writes never wait for a save and a restart reloads it instead of
+rescanning Firestore. ``data_generation`` records which write generation
+of the stored jobs the index reflects: callers advance it together with the
+writes they apply, and it is saved with the index, so a reloaded index is
+only rebuilt when other writers have moved the stored generation past it. ``python manage.py rebuild-index`` rebuilds it from
+scratch.
+"""
+import atexit
+import heapq
+from collections import Counter
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Where the index is persisted; empty disables persistence
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'search_index.pkl')
+
+# Seconds between background saves while the index changes
+SEARCH_INDEX_SAVE_INTERVAL = float(os.getenv('SEARCH_INDEX_SAVE_INTERVAL', '30'))
+
+# Term frequency multiplier per indexed field
+FIELD_WEIGHTS = {'title': 3, 'company': 2, 'skills': 2, 'description': 1}
+
+# Fields results can be filtered on with exact matches
+FILTER_FIELDS = ['user_id', 'location', 'company', 'job_type', 'is_remote']
+
+# Filter fields the dashboard offers as dropdowns
+FACET_FIELDS = ['location', 'company', 'job_type']
+
+# Values returned per facet unless the caller asks for more
+FACET_TOP_N = int(os.getenv('FACET_TOP_N', '25'))
+
+# Fields returned with each hit, enough to render a job card
+RESULT_FIELDS = [
+    'title', 'company', 'location', 'job_url', 'job_url_direct', 'site', 'job_type', 'is_remote',
+    'min_amount', 'max_amount', 'currency', 'interval', 'date_posted', 'description_snippet',
+]
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has in is it of on or our the to we with you your will this that'.split()
+)
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+
+def tokenize(text):
+    """Lower-case word tokens of ``text``; keeps terms like c++ and c#."""
+    if not isinstance(text, str):
+        text = '' if text is None else str(text)
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _facet_value(value):
+    if value is None or value == '':
+        return None
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return str(value)
+
+
+def _field_text(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    return value
+
+
+class SearchIndex:
+    """Thread-safe BM25 index of job documents keyed by document ID."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.generation = 0
+        # Write generation of the stored jobs this index reflects, None if unknown
+        self.data_generation = None
+        self._set_state({}, {}, {}, 0)
+
+    def _set_state(self, postings, lengths, docs, total_length):
+        # Facet tables are derived from the stored fields rather than persisted
+        self._postings = postings
+        self._lengths = lengths
+        self._docs = docs
+        self._total_length = total_length
+        self._values = {field: {} for field in FILTER_FIELDS}
+        self._counts = {}
+        for doc_id, (_, stored) in docs.items():
+            self._count(doc_id, stored, 1)
+
+    def _count(self, doc_id, stored, step):
+        for field in FILTER_FIELDS:
+            value = _facet_value(stored.get(field))
+            if value is None:
+                continue
+            ids = self._values[field].setdefault(value, set())
+            if step > 0:
+                ids.add(doc_id)
+            else:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._values[field][value]
+        # One table for everyone (key None) and one per owner
+        for owner in {None, _facet_value(stored.get('user_id'))}:
+            tables = self._counts.setdefault(owner, {field: Counter() for field in FACET_FIELDS})
+            for field in FACET_FIELDS:
+                value = _facet_value(stored.get(field))
+                if value is not None:
+                    tables[field][value] += step
+                    if tables[field][value] <= 0:
+                        del tables[field][value]
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def _terms(self, job):
+        frequencies = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(_field_text(job.get(field))):
+                frequencies[token] = frequencies.get(token, 0) + weight
+        return frequencies
+
+    def add(self, doc_id, job):
+        """Index ``job`` under ``doc_id``, replacing any previous version."""
+        self.add_many([(doc_id, job)])
+
+    def add_many(self, jobs, writes=0):
+        """Index an iterable of (doc_id, job) pairs, applied by ``writes`` commits to the stored jobs."""
+        prepared = [(doc_id, self._terms(job), {field: job.get(field) for field in FILTER_FIELDS + RESULT_FIELDS})
+                    for doc_id, job in jobs]
+        with self._lock:
+            for doc_id, terms, stored in prepared:
+                self._remove(doc_id)
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = frequency
+                length = sum(terms.values())
+                self._lengths[doc_id] = length
+                self._total_length += length
+                self._docs[doc_id] = (terms, stored)
+                self._count(doc_id, stored, 1)
+            if prepared:
+                self.generation += 1
+            self.advance_data_generation(writes)
+
+    def remove(self, doc_ids, writes=0):
+        """Drop ``doc_ids`` (an iterable), removed by ``writes`` commits; unknown IDs are ignored."""
+        with self._lock:
+            removed = sum(self._remove(doc_id) for doc_id in doc_ids)
+            if removed:
+                self.generation += 1
+            self.advance_data_generation(writes)
+            return removed
+
+    def advance_data_generation(self, writes):
+        """Count ``writes`` commits to the stored jobs as reflected in the index."""
+        with self._lock:
+            if writes and self.data_generation is not None:
+                self.data_generation += writes
+                self.generation += 1
+
+    def _remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return 0
+        for term in entry[0]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        self._count(doc_id, entry[1], -1)
+        return 1
+
+    def clear(self):
+        with self._lock:
+            self._set_state({}, {}, {}, 0)
+            self.data_generation = None
+            self.generation += 1
+
+    def replace_all(self, jobs, data_generation=None):
+        """Swap in an index of (doc_id, job) pairs, built without blocking searches.
+
+        ``data_generation`` is the write generation the pairs were read at.
+        """
+        fresh = SearchIndex()
+        fresh.add_many(jobs)
+        with self._lock:
+            self._postings, self._lengths, self._docs = fresh._postings, fresh._lengths, fresh._docs
+            self._total_length, self._values, self._counts = fresh._total_length, fresh._values, fresh._counts
+            self.data_generation = data_generation
+            self.generation += 1
+
+    def _matches(self, doc_id, filters):
+        stored = self._docs[doc_id][1]
+        return all(stored.get(field) == value for field, value in filters.items())
+
+    def search(self, query, filters=None, limit=20, offset=0, exclude=()):
+        """Rank documents matching any term of ``query``.
+
+        ``filters`` maps FILTER_FIELDS to required values and ``exclude``
+        holds document IDs to skip. Returns ``{'results': [...], 'total':
+        int}`` where each result carries ``id``, ``score`` and RESULT_FIELDS.
+        """
+        filters = self._validate_filters(filters)
+        terms = set(tokenize(query))
+
+        with self._lock:
+            count = len(self._lengths)
+            if not terms or not count:
+                return {'results': [], 'total': 0}
+            average_length = self._total_length / count
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+            if filters or exclude:
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if doc_id not in exclude and self._matches(doc_id, filters)}
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))[offset:]
+            results = [{'id': doc_id, 'score': round(score, 4), **{field: self._docs[doc_id][1].get(field) for field in RESULT_FIELDS}}
+                       for doc_id, score in top]
+        return {'results': results, 'total': len(scores)}
+
+    def _validate_filters(self, filters):
+        filters = {field: value for field, value in (filters or {}).items() if value not in (None, '')}
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+        return filters
+
+    def _facet_counts(self, facet, filters, exclude):
+        owner = filters.get('user_id')
+        if set(filters) <= {'user_id'}:
+            # Common case, no other filters: read the maintained table
+            counts = Counter(self._counts.get(owner, {}).get(facet, {}))
+            for doc_id in exclude:
+                entry = self._docs.get(doc_id)
+                if entry and (owner is None or entry[1].get('user_id') == owner):
+                    value = _facet_value(entry[1].get(facet))
+                    if value is not None:
+                        counts[value] -= 1
+            return +counts
+        
+        matching = sorted((self._values[field].get(_facet_value(value), set()) for field, value in filters.items()), key=len)
+        candidates = matching[0].intersection(*matching[1:])
+        counts = Counter()
+        for doc_id in candidates:
+            if doc_id not in exclude:
+                value = _facet_value(self._docs[doc_id][1].get(facet))
+                if value is not None:
+                    counts[value] += 1
+        return counts
+
+    def facets(self, filters=None, top_n=FACET_TOP_N, exclude=()):
+        """Most common values of each FACET_FIELDS field among documents matching ``filters``.
+
+        Each facet ignores the filter on itself, so a dropdown keeps listing
+        its alternatives. Returns ``{facet: [{'value': ..., 'count': n}]}``
+        with at most ``top_n`` values per facet, most frequent first.
+        """
+        filters = self._validate_filters(filters)
+        with self._lock:
+            counts = {facet: self._facet_counts(facet, {f: v for f, v in filters.items() if f != facet}, exclude)
+                      for facet in FACET_FIELDS}
+        return {
+            facet: [{'value': value, 'count': count}
+                    for value, count in heapq.nsmallest(top_n, values.items(), key=lambda item: (-item[1], str(item[0])))]
+            for facet, values in counts.items()
+        }
+
+    def save(self, path):
+        """Pickle the index to ``path`` atomically."""
+        with self._lock:
+            state = {'postings': self._postings, 'lengths': self._lengths, 'docs': self._docs,
+                     'total_length': self._total_length, 'data_generation': self.data_generation}
+            payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Replace the index with the one saved at ``path``; returns False if there is none."""
+        try:
+            with open(path, 'rb') as file:
+                state = pickle.load(file)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            self._set_state(state['postings'], state['lengths'], state['docs'], state['total_length'])
+            # Indexes saved before the generation was recorded are never trusted as current
+            self.data_generation = state.get('data_generation')
+            self.generation += 1
+        return True
+
+
+class PersistentSearchIndex(SearchIndex):
+    """SearchIndex that saves itself to disk a while after it changes."""
+
+    def __init__(self, path=SEARCH_INDEX_PATH, save_interval=SEARCH_INDEX_SAVE_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.save_interval = save_interval
+        self._saved_generation = 0
+        self._last_save = None
+        self._saver = None
+        self._stop_saving = threading.Event()
+
+    def load(self, path=None):
+        loaded = super().load(path or self.path)
+        self._saved_generation = self.generation
+        return loaded
+
+    def flush(self, force=False):
+        """Save if the index changed and ``save_interval`` has passed (or ``force``)."""
+        if not self.path or self.generation == self._saved_generation:
+            return False
+        if not force and self._last_save is not None and time.monotonic() - self._last_save < self.save_interval:
+            return False
+        generation = self.generation
+        try:
+            self.save(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save search index to {self.path}: {str(e)}")
+            return False
+        self._saved_generation = generation
+        self._last_save = time.monotonic()
+        return True
+
+    def start_autosave(self):
+        """Flush every ``save_interval`` seconds on a daemon thread; returns it, or None without a path."""
+        with self._lock:
+            if self._saver is None and self.path and self.save_interval > 0:
+                self._stop_saving.clear()
+                self._saver = threading.Thread(target=self._autosave, name='search-index-saver', daemon=True)
+                self._saver.start()
+            return self._saver
+
+    def stop_autosave(self, timeout=None):
+        self._stop_saving.set()
+        with self._lock:
+            saver, self._saver = self._saver, None
+        if saver is not None:
+            saver.join(timeout)
+
+    def _autosave(self):
+        while not self._stop_saving.wait(self.save_interval):
+            self.flush(force=True)
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the process-wide index, loaded from SEARCH_INDEX_PATH on first use."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = PersistentSearchIndex()
+            if _default_index.path:
+                try:
+                    _default_index.load()
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable search index {_default_index.path}: {str(e)}")
+            # Writes only update memory; saving happens off their threads
+            _default_index.start_autosave()
+            atexit.register(_default_index.flush, True)
+        return _default_index
@@ -0,0 +1,131 @@
+"""Background queue for job searches.
+
+Each search gets its own ID and status dict instead of sharing one global,
+so the web tier can enqueue a search, return immediately and let clients
+poll progress while other users search at the same time. At most
+``MAX_QUEUED_SEARCHES`` searches wait for a worker; past that
+``submit_search`` raises ``QueueFull`` and callers ask the client to retry.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Number of searches that may run at once; the rest wait in the queue
+SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', '4'))
+
+# Searches that may wait for a worker before new ones are refused
+MAX_QUEUED_SEARCHES = int(os.getenv('MAX_QUEUED_SEARCHES', '16'))
+
+# Finished searches are forgotten after this many seconds
+FINISHED_TTL = int(os.getenv('SEARCH_STATUS_TTL', '3600'))
+
+FINISHED_STATES = ('completed', 'failed')
+
+_searches = {}
+_lock = threading.Lock()
+_executor = None
+
+
+class QueueFull(Exception):
+    """Raised by ``submit_search`` when every worker is busy and the queue is full."""
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='search')
+    return _executor
+
+
+def _prune(now):
+    expired = [
+        search_id for search_id, status in _searches.items()
+        if status['state'] in FINISHED_STATES and now - status['finished_at'] > FINISHED_TTL
+    ]
+    for search_id in expired:
+        del _searches[search_id]
+
+
+def submit_search(run, params, owner=None):
+    """Enqueue ``run(params, status)`` and return the new search ID.
+
+    ``run`` reports progress by updating the ``status`` dict it is given
+    (``progress``, ``message``, ``jobs_count``, ``errors``, ``current_site``).
+    The queue owns ``state`` and the timestamps. Raises ``QueueFull`` when
+    ``SEARCH_WORKERS + MAX_QUEUED_SEARCHES`` searches are already pending.
+    """
+    search_id = uuid.uuid4().hex
+    now = time.time()
+    status = {
+        'search_id': search_id,
+        'owner': owner,
+        'state': 'queued',
+        'is_running': False,
+        'progress': 0,
+        'message': 'Waiting for a free worker...',
+        'jobs_count': 0,
+        'errors': [],
+        'current_site': '',
+        'params': params,
+        'submitted_at': now,
+        'started_at': None,
+        'finished_at': None,
+    }
+    with _lock:
+        _prune(now)
+        pending = sum(1 for s in _searches.values() if s['state'] not in FINISHED_STATES)
+        if pending >= SEARCH_WORKERS + MAX_QUEUED_SEARCHES:
+            raise QueueFull(f'{pending} searches are already pending')
+        _searches[search_id] = status
+        executor = _get_executor()
+    executor.submit(_run_search, run, params, status)
+    return search_id
+
+
+def _run_search(run, params, status):
+    status['state'] = 'running'
+    status['is_running'] = True
+    status['started_at'] = time.time()
+    try:
+        run(params, status)
+        status['state'] = 'failed' if status['errors'] and not status['jobs_count'] else 'completed'
+    except Exception as e:
+        logger.error(f"Search {status['search_id']} failed: {str(e)}")
+        logger.error(traceback.format_exc())
+        status['errors'].append(str(e))
+        status['message'] = f'Job search failed: {str(e)}'
+        status['state'] = 'failed'
+    finally:
+        status['is_running'] = False
+        status['finished_at'] = time.time()
+
+
+def get_search_status(search_id):
+    """Return a snapshot of one search's status, or None if it is unknown."""
+    with _lock:
+        status = _searches.get(search_id)
+        if status is None:
+            return None
+        return {**status, 'errors': list(status['errors'])}
+
+
+def latest_search(owner=None):
+    """Return a snapshot of the most recently submitted search for ``owner``."""
+    with _lock:
+        candidates = [s for s in _searches.values() if owner is None or s['owner'] == owner]
+        if not candidates:
+            return None
+        status = max(candidates, key=lambda s: s['submitted_at'])
+        return {**status, 'errors': list(status['errors'])}
+
+
+def running_count():
+    """Number of searches currently queued or running."""
+    with _lock:
+        return sum(1 for s in _searches.values() if s['state'] not in FINISHED_STATES)
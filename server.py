@@ -1,8 +1,21 @@
 from flask import Flask, render_template, send_from_directory, jsonify, request, session, redirect, url_for
-import pandas as pd
 import os
-from firebase_config import initialize_firebase, get_db, create_user, verify_user_credentials, verify_user_token, save_job_to_firebase, get_jobs_from_firebase, mark_job_applied, delete_job, get_user_stats, get_global_stats
-from flask_session import Session
+from firebase_config import initialize_firebase, create_user, verify_user_credentials, JOBS_PAGE_SIZE, ensure_search_index
+from job_repository import open_repository, STORAGE_BACKEND
+from session_store import CompactSessionInterface, SessionStore, STORE_KEY, session_secret_key, store_key
+from scrape_engine import scrape_jobs_parallel
+from job_records import frame_to_documents, JOB_SUMMARY_FIELDS
+from scrape_cache import get_scrape_cache
+from search_queue import QueueFull, submit_search, get_search_status
+from job_sweeper import JOB_SWEEPER_ENABLED, start_sweeper, last_sweep
+from search_index import SearchIndex, FACET_TOP_N
+import http_cache
+from http_cache import make_etag, not_modified, with_validators
+from startup import STARTUP_WARM_UP, warm_up, warm_up_report
+import metrics
+import profiling
+import logging
+import threading
 import uuid
 from dotenv import load_dotenv
 import datetime
@@ -10,16 +23,85 @@ import datetime
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
+metrics.configure_logging()
+logger = logging.getLogger(__name__)
+
+# Largest job_ids list the bulk endpoints accept in one request
+MAX_BULK_JOB_IDS = 1000
 
-# Initialize Firebase
-firebase_initialized = initialize_firebase()
-if not firebase_initialized:
-    print("⚠️  Firebase initialization failed. Some features may not work.")
-    print("Please check your environment variables in Render.")
+app = Flask(__name__)
+# Sessions are signed cookies carrying the user ID, so the key must be secret
+app.secret_key = session_secret_key()
+# Signed cookie sessions carry identity only; demo results live in demo_results
+app.session_interface = CompactSessionInterface()
+demo_results = SessionStore()
+# Compress JSON responses for clients that accept gzip/brotli
+http_cache.init_app(app)
+# Per-route latency and Firestore usage, served at /metrics
+metrics.init_app(app)
+# Sampling profiles of requests sent with X-Profile or picked by PROFILE_SAMPLE_RATE
+profiling.init_app(app)
+
+# Firebase and the job storage are opened by the first request, not at import
+firebase_initialized = False
+storage = None
+_storage_opened = False
+_storage_lock = threading.Lock()
+# Run by the background warm-up once storage is open
+startup_tasks = []
+
+def open_storage():
+    """Initialize Firebase and open the job storage once per process; returns the storage"""
+    global firebase_initialized, storage, _storage_opened
+    if _storage_opened:
+        return storage
+    with _storage_lock:
+        if _storage_opened:
+            return storage
+        firebase_initialized = STORAGE_BACKEND == 'firestore' and initialize_firebase()
+        # Job storage: Firestore, a local SQLite file (STORAGE_BACKEND=sqlite), or None for demo mode
+        storage = open_repository(STORAGE_BACKEND, firebase_ready=firebase_initialized)
+        if storage is None:
+            logger.warning("Firebase initialization failed; serving demo data. Check the Firebase environment variables")
+        elif storage.name == 'sqlite':
+            logger.info(f"Storing jobs in SQLite at {storage.path}")
+        elif STARTUP_WARM_UP:
+            # Rebuild the search index from Firestore after the warm-up imports, off this request
+            startup_tasks.append(ensure_search_index)
+        else:
+            ensure_search_index()
+        if storage is not None and JOB_SWEEPER_ENABLED:
+            # Expire postings nobody has re-scraped in JOB_MAX_AGE_HOURS
+            start_sweeper(storage)
+        _storage_opened = True
+    if STARTUP_WARM_UP:
+        # Import pandas, the Firestore client and jobspy before a request needs them
+        warm_up(tasks=startup_tasks)
+    return storage
+
+def use_storage(repository):
+    """Serve requests from ``repository`` instead of the configured backend (benchmarks, tests)"""
+    global storage, _storage_opened
+    with _storage_lock:
+        storage = repository
+        _storage_opened = True
+
+@app.before_request
+def ensure_storage():
+    open_storage()
+
+def get_demo_jobs():
+    return demo_results.get(session.get(STORE_KEY), 'demo_jobs', [])
+
+def set_demo_jobs(jobs):
+    demo_results.set(store_key(session), 'demo_jobs', jobs)
+
+def data_etag(user_id):
+    """ETag for this request against the current data version, or None if unknown"""
+    version = storage.get_data_version()
+    if version is None:
+        return None
+    return make_etag(version, user_id, request.full_path)
 
 @app.route('/')
 def index():
@@ -44,8 +126,8 @@ def signup():
         if not all([name, email, password]):
             return jsonify({'success': False, 'error': 'All fields are required'}), 400
 
-        # Create user in Firebase
-        user_id = create_user(email, password, name)
+        # Create the user in Firebase Auth, or in the SQLite file when that is the storage
+        user_id = storage.create_user(email, password, name) if storage is not None else create_user(email, password, name)
         
         if user_id:
             return jsonify({'success': True, 'message': 'User created successfully'})
@@ -65,8 +147,11 @@ def login():
         if not all([email, password]):
             return jsonify({'success': False, 'error': 'Email and password are required'}), 400
 
-        # Try Firebase authentication first
-        user_info = verify_user_credentials(email, password)
+        # Try the storage backend's accounts first
+        if storage is not None:
+            user_info = storage.verify_user_credentials(email, password)
+        else:
+            user_info = verify_user_credentials(email, password)
         
         if user_info:
             session['user_id'] = user_info['uid']
@@ -89,6 +174,7 @@ def login():
 
 @app.route('/api/logout', methods=['POST'])
 def logout():
+    demo_results.discard(session.get(STORE_KEY))
     session.clear()
     return jsonify({'success': True})
 
@@ -106,6 +192,57 @@ def check_session():
     else:
         return jsonify({'success': False}), 401
 
+def run_search(params, status):
+    """Scrape all job boards and save the results; runs on a search_queue worker"""
+    search_term = params['search_term']
+    location = params['location']
+    
+    # Scrape every job board in parallel using jobspy
+    try:
+        logger.info(f"Starting job search for: {search_term} in {location}",
+                    extra={'search_term': search_term, 'location': location})
+        status['message'] = f'Searching for {search_term} jobs in {location}...'
+        
+        def on_site_done(report, completed, total):
+            status['progress'] = int(70 * completed / total)
+            status['current_site'] = report['site']
+            if report['error']:
+                status['errors'].append(f"{report['site']}: {report['error']}")
+        
+        jobs, site_reports = scrape_jobs_parallel(
+            search_term=search_term,
+            location=location,
+            results_wanted=params['results_wanted'],
+            hours_old=params['hours_old'],
+            on_site_done=on_site_done,
+        )
+        
+        logger.info(f"Found {len(jobs)} jobs", extra={'jobs': len(jobs)})
+        
+        # Save jobs to the storage backend in batched commits
+        status['message'] = f'Found {len(jobs)} jobs. Saving...'
+        user_id = params['user_id']
+        # Documents are keyed by jobspy's id / job_url, so re-scrapes upsert in place
+        job_documents = frame_to_documents(jobs)
+        
+        report = storage.save_jobs_bulk(job_documents, user_id)
+        jobs_saved = report['saved']
+        status['jobs_count'] = jobs_saved
+        for error in report['errors'][:10]:
+            status['errors'].append(f"Failed to save job {error['id']}: {error['error']}")
+        
+        status['progress'] = 100
+        status['message'] = f'Successfully scraped and saved {jobs_saved} jobs'
+        
+    except ImportError as e:
+        logger.error(f"jobspy import error: {e}")
+        status['errors'].append('jobspy not available')
+        status['message'] = 'Search failed: jobspy not available'
+    except Exception as e:
+        logger.exception(f"jobspy scraping error: {e}")
+        status['errors'].append(str(e))
+        status['message'] = f'Search failed: {str(e)[:50]}...'
+
 @app.route('/api/search-jobs', methods=['POST'])
 def search_jobs():
     try:
@@ -117,9 +254,9 @@ def search_jobs():
         results_wanted = data.get('results_wanted', 20)
         hours_old = data.get('hours_old', 72)
         
-        # If Firebase is not initialized, return demo response
-        if not firebase_initialized:
-            # Add some demo jobs to the session for display
+        # Without a storage backend, return demo response
+        if storage is None:
+            # Add some demo jobs for this session to display
             demo_jobs = [
                 {
                     'id': f'demo-search-{uuid.uuid4()}',
@@ -168,8 +305,8 @@ def search_jobs():
                 }
             ]
             
-            # Store demo jobs in session for display
-            session['demo_jobs'] = session.get('demo_jobs', []) + demo_jobs
+            # Keep demo jobs server-side for display; the session only holds their key
+            set_demo_jobs(get_demo_jobs() + demo_jobs)
             
             return jsonify({
                 'success': True,
@@ -177,83 +314,60 @@ def search_jobs():
                 'message': f'Demo mode: Added {len(demo_jobs)} sample jobs for "{search_term}"'
             })
         
-        # Simple direct scraping using jobspy
+        # Scrapes are expensive, so only signed-in users may queue them
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+        
+        # Queue the scrape so the request returns immediately; clients poll /api/search-status/<id>
+        # A profiled request also profiles the scrape on its queue worker
         try:
-            from jobspy import scrape_jobs
-            
-            print(f"Starting job search for: {search_term} in {location}")
-            
-            jobs = scrape_jobs(
-                site_name=["indeed", "linkedin", "zip_recruiter", "google"],
-                search_term=search_term,
-                google_search_term=f"{search_term} jobs near {location} since yesterday",
-                location=location,
-                results_wanted=results_wanted,
-                hours_old=hours_old,
-                country_indeed='USA',
-            )
-            
-            print(f"Found {len(jobs)} jobs")
-            
-            # Save jobs to Firebase
-            user_id = session.get('user_id')
-            jobs_saved = 0
-            
-            for _, row in jobs.iterrows():
-                job_data = row.to_dict()
-                job_data['id'] = str(uuid.uuid4())  # Generate unique ID
-                
-                # Convert datetime.date objects to strings for Firestore compatibility
-                for key, value in job_data.items():
-                    if hasattr(value, 'date'):  # Check if it's a datetime.date object
-                        job_data[key] = value.isoformat() if value else None
-                    elif pd.isna(value):  # Handle NaN values
-                        job_data[key] = None
-                    elif isinstance(value, (datetime.date, datetime.datetime)):  # Additional datetime checks
-                        job_data[key] = value.isoformat() if value else None
-                
-                if save_job_to_firebase(job_data, user_id):
-                    jobs_saved += 1
-            
-            return jsonify({
-                'success': True,
-                'jobs_count': jobs_saved,
-                'message': f'Successfully scraped and saved {jobs_saved} jobs to Firebase'
-            })
-            
-        except ImportError as e:
-            print(f"jobspy import error: {e}")
-            # If jobspy is not available, return demo response
-            return jsonify({
-                'success': True,
-                'jobs_count': 5,
-                'message': 'Demo mode: Added 5 sample jobs (jobspy not available)'
-            })
-        except Exception as e:
-            print(f"jobspy scraping error: {e}")
-            # If scraping fails, return demo response
-            return jsonify({
-                'success': True,
-                'jobs_count': 3,
-                'message': f'Demo mode: Added 3 sample jobs (scraping failed: {str(e)[:50]}...)'
-            })
+            search_id = submit_search(profiling.propagate(run_search), {
+                'search_term': search_term,
+                'location': location,
+                'results_wanted': results_wanted,
+                'hours_old': hours_old,
+                'user_id': user_id,
+            }, owner=user_id)
+        except QueueFull:
+            response = jsonify({'success': False, 'error': 'Too many searches are queued, please try again shortly'})
+            response.headers['Retry-After'] = '30'
+            return response, 429
+        
+        return jsonify({
+            'success': True,
+            'search_id': search_id,
+            'status_url': f'/api/search-status/{search_id}',
+            'message': f'Search for "{search_term}" queued'
+        }), 202
             
     except Exception as e:
-        print(f"Search failed: {str(e)}")
+        logger.error(f"Search failed: {str(e)}")
         return jsonify({
             'success': False,
             'error': f'Search failed: {str(e)}'
         }), 500
 
+@app.route('/api/search-status/<search_id>')
+def search_status(search_id):
+    status = get_search_status(search_id)
+    
+    # Searches are only visible to the user who started them
+    if status is None or status['owner'] != session.get('user_id'):
+        return jsonify({'success': False, 'error': 'Unknown search ID'}), 404
+    
+    status.pop('params', None)
+    return jsonify({'success': True, **status})
+
 @app.route('/api/jobs')
 def get_jobs():
     try:
-        # If Firebase is not initialized, return demo data
-        if not firebase_initialized:
-            # Get demo jobs from session
-            demo_jobs = session.get('demo_jobs', [])
+        # Without a storage backend, return demo data
+        if storage is None:
+            # Get this session's demo jobs
+            demo_jobs = get_demo_jobs()
             
-            # If no demo jobs in session, return default demo jobs
+            # If there are no demo jobs yet, return default demo jobs
             if not demo_jobs:
                 demo_jobs = [
                     {
@@ -282,9 +396,15 @@ def get_jobs():
                     }
                 ]
             
-            return jsonify(demo_jobs)
+            return jsonify({'jobs': demo_jobs, 'next_cursor': None})
         
         user_id = session.get('user_id')
+
+        # Unchanged data since the client's copy: answer 304 without querying jobs
+        etag = data_etag(user_id)
+        unchanged = not_modified(etag) if etag else None
+        if unchanged is not None:
+            return unchanged
         
         # Get filters from query parameters
         filters = {}
@@ -295,18 +415,94 @@ def get_jobs():
         if request.args.get('job_type'):
             filters['job_type'] = request.args.get('job_type')
 
+        # Paging: ?page_size=N&cursor=<next_cursor from the previous page>
+        try:
+            page_size = int(request.args.get('page_size', JOBS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'page_size must be an integer'}), 400
+        cursor = request.args.get('cursor') or None
+
+        # Listings carry summary fields only; ?view=full returns whole documents
+        view = request.args.get('view', 'summary')
+        if view not in ('summary', 'full'):
+            return jsonify({'error': 'view must be "summary" or "full"'}), 400
+        fields = JOB_SUMMARY_FIELDS if view == 'summary' else None
+
         # If user is authenticated, get their jobs
-        if user_id:
-            jobs = get_jobs_from_firebase(user_id, filters)
-        else:
-            # For testing: get all jobs if no user is authenticated
-            jobs = get_jobs_from_firebase(None, filters)
-        
-        # Limit to first 50 jobs to prevent browser issues
-        if len(jobs) > 50:
-            jobs = jobs[:50]
+        # For testing: get all jobs if no user is authenticated
+        try:
+            page = storage.get_jobs_page(user_id or None, filters, page_size, cursor, fields=fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
             
-        return jsonify(jobs)
+        return with_validators(jsonify(page), etag) if etag else jsonify(page)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job_detail(job_id):
+    """Full record of one job, fetched when its details are opened"""
+    try:
+        if storage is None:
+            demo_jobs = get_demo_jobs()
+            job = next((job for job in demo_jobs if job.get('id') == job_id), None)
+        else:
+            job = storage.get_job(job_id, session.get('user_id'))
+
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/search')
+def search():
+    """Ranked full-text search: ?q=...&location=&company=&job_type=&is_remote=&limit=&offset="""
+    try:
+        query = request.args.get('q', '').strip()
+        filters = {key: request.args.get(key) for key in ('location', 'company', 'job_type') if request.args.get(key)}
+        if request.args.get('is_remote'):
+            filters['is_remote'] = request.args.get('is_remote').lower() in ('1', 'true', 'yes')
+        try:
+            limit = int(request.args.get('limit', JOBS_PAGE_SIZE))
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+
+        if storage is None:
+            # Demo mode: rank the session's sample jobs
+            index = SearchIndex()
+            index.add_many((job['id'], job) for job in get_demo_jobs())
+            return jsonify({'query': query, **index.search(query, filters, limit=limit, offset=offset)})
+
+        # For testing: search all jobs if no user is authenticated
+        results = storage.search_jobs(query, session.get('user_id') or None, filters, limit, offset)
+        return jsonify({'query': query, **results})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/facets')
+def facets():
+    """Top values with counts for the filter dropdowns: ?location=&company=&job_type=&top="""
+    try:
+        filters = {key: request.args.get(key) for key in ('location', 'company', 'job_type') if request.args.get(key)}
+        try:
+            top_n = int(request.args.get('top', FACET_TOP_N))
+        except ValueError:
+            return jsonify({'error': 'top must be an integer'}), 400
+
+        if storage is None:
+            # Demo mode: count the session's sample jobs
+            index = SearchIndex()
+            index.add_many((job['id'], job) for job in get_demo_jobs())
+            return jsonify(index.facets(filters, top_n=top_n))
+
+        # For testing: count all jobs if no user is authenticated
+        return jsonify(storage.get_job_facets(session.get('user_id') or None, filters, top_n))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -318,7 +514,12 @@ def test_search():
             'success': True,
             'message': 'Search endpoint is working',
             'firebase_initialized': firebase_initialized,
-            'jobspy_available': 'jobspy' in globals() or 'jobspy' in locals()
+            'storage_backend': storage.name if storage is not None else None,
+            'jobspy_available': 'jobspy' in globals() or 'jobspy' in locals(),
+            'scrape_cache': get_scrape_cache().stats(),
+            'last_sweep': last_sweep(),
+            'demo_sessions': demo_results.stats(),
+            'warm_up': warm_up_report()
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -330,8 +531,21 @@ def get_applied_jobs():
         if not user_id:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        applied_jobs = get_applied_jobs_from_firebase(user_id)
-        return jsonify(applied_jobs)
+        # Paging works the same as /api/jobs
+        try:
+            page_size = int(request.args.get('page_size', JOBS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'page_size must be an integer'}), 400
+        
+        # Demo mode keeps no applied jobs: marking one just drops it from the list
+        if storage is None:
+            return jsonify({'jobs': [], 'next_cursor': None})
+        
+        try:
+            page = storage.get_applied_jobs_page(user_id, page_size, request.args.get('cursor') or None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(page)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -342,15 +556,33 @@ def get_stats():
         if not user_id:
             return jsonify({'error': 'Not authenticated'}), 401
 
+        # Without a storage backend, summarize this session's demo jobs
+        if storage is None:
+            demo_jobs = get_demo_jobs()
+            return jsonify({
+                'total_jobs': len(demo_jobs),
+                'remote_jobs': sum(1 for job in demo_jobs if job.get('location') == 'Remote'),
+                'avg_salary': 0,
+                'unique_companies': len({job.get('company') for job in demo_jobs}),
+                'applied_jobs': 0,
+                'searches_performed': 0,
+                'total_jobs_available': len(demo_jobs)
+            })
+
+        etag = data_etag(user_id)
+        unchanged = not_modified(etag) if etag else None
+        if unchanged is not None:
+            return unchanged
+
         # Get user-specific stats
-        user_stats = get_user_stats(user_id)
+        user_stats = storage.get_user_stats(user_id)
         
         # Get global stats
-        global_stats = get_global_stats()
+        global_stats = storage.get_global_stats()
         
         # Combine stats
         stats = {**global_stats, **user_stats}
-        return jsonify(stats)
+        return with_validators(jsonify(stats), etag) if etag else jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -367,16 +599,16 @@ def mark_applied():
         if not job_id:
             return jsonify({'success': False, 'error': 'Job ID is required'}), 400
 
-        # If Firebase is not initialized, return demo response
-        if not firebase_initialized:
-            # Remove from demo jobs in session
-            demo_jobs = session.get('demo_jobs', [])
+        # Without a storage backend, return demo response
+        if storage is None:
+            # Remove from this session's demo jobs
+            demo_jobs = get_demo_jobs()
             demo_jobs = [job for job in demo_jobs if job.get('id') != job_id]
-            session['demo_jobs'] = demo_jobs
+            set_demo_jobs(demo_jobs)
             
             return jsonify({'success': True, 'message': 'Job marked as applied (demo mode)'})
 
-        success = mark_job_applied(job_id, user_id)
+        success = storage.mark_job_applied(job_id, user_id)
         
         if success:
             return jsonify({'success': True, 'message': 'Job marked as applied'})
@@ -386,6 +618,37 @@ def mark_applied():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/mark-applied-bulk', methods=['POST'])
+def mark_applied_bulk():
+    """Mark many jobs applied at once; returns per-ID results"""
+    try:
+        data = request.get_json() or {}
+        job_ids = data.get('job_ids')
+        user_id = session.get('user_id')
+        
+        if not user_id:
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+        
+        if not isinstance(job_ids, list) or not job_ids or not all(isinstance(job_id, str) for job_id in job_ids):
+            return jsonify({'success': False, 'error': 'job_ids must be a non-empty list of job IDs'}), 400
+        if len(job_ids) > MAX_BULK_JOB_IDS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BULK_JOB_IDS} job IDs per request'}), 400
+
+        # Without a storage backend, return demo response
+        if storage is None:
+            demo_jobs = get_demo_jobs()
+            wanted = set(job_ids)
+            applied = [job['id'] for job in demo_jobs if job.get('id') in wanted]
+            set_demo_jobs([job for job in demo_jobs if job.get('id') not in wanted])
+            errors = [{'id': job_id, 'error': 'Job not found'} for job_id in dict.fromkeys(job_ids) if job_id not in applied]
+            return jsonify({'success': True, 'applied': len(applied), 'failed': len(errors), 'ids': applied, 'errors': errors})
+
+        report = storage.mark_jobs_applied_bulk(job_ids, user_id)
+        return jsonify({'success': True, **report})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/delete-job', methods=['POST'])
 def delete_job_api():
     try:
@@ -399,16 +662,16 @@ def delete_job_api():
         if not job_id:
             return jsonify({'success': False, 'error': 'Job ID is required'}), 400
 
-        # If Firebase is not initialized, return demo response
-        if not firebase_initialized:
-            # Remove from demo jobs in session
-            demo_jobs = session.get('demo_jobs', [])
+        # Without a storage backend, return demo response
+        if storage is None:
+            # Remove from this session's demo jobs
+            demo_jobs = get_demo_jobs()
             demo_jobs = [job for job in demo_jobs if job.get('id') != job_id]
-            session['demo_jobs'] = demo_jobs
+            set_demo_jobs(demo_jobs)
             
             return jsonify({'success': True, 'message': 'Job deleted successfully (demo mode)'})
 
-        success = delete_job(job_id, user_id)
+        success = storage.delete_job(job_id, user_id)
         
         if success:
             return jsonify({'success': True, 'message': 'Job deleted successfully'})
@@ -418,11 +681,43 @@ def delete_job_api():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/delete-jobs-bulk', methods=['POST'])
+def delete_jobs_bulk_api():
+    """Delete many of the user's jobs at once; returns per-ID results"""
+    try:
+        data = request.get_json() or {}
+        job_ids = data.get('job_ids')
+        user_id = session.get('user_id')
+        
+        if not user_id:
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+        
+        if not isinstance(job_ids, list) or not job_ids or not all(isinstance(job_id, str) for job_id in job_ids):
+            return jsonify({'success': False, 'error': 'job_ids must be a non-empty list of job IDs'}), 400
+        if len(job_ids) > MAX_BULK_JOB_IDS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BULK_JOB_IDS} job IDs per request'}), 400
+
+        # Without a storage backend, return demo response
+        if storage is None:
+            demo_jobs = get_demo_jobs()
+            wanted = set(job_ids)
+            deleted = [job['id'] for job in demo_jobs if job.get('id') in wanted]
+            set_demo_jobs([job for job in demo_jobs if job.get('id') not in wanted])
+            errors = [{'id': job_id, 'error': 'Job not found'} for job_id in dict.fromkeys(job_ids) if job_id not in deleted]
+            return jsonify({'success': True, 'deleted': len(deleted), 'failed': len(errors), 'ids': deleted, 'errors': errors})
+
+        report = storage.delete_jobs_bulk(job_ids, user_id)
+        return jsonify({'success': True, **report})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 8000))
     host = os.getenv('HOST', '0.0.0.0')
     
-    print("Starting Scot4Me Job Board Server...")
-    print(f"Open your browser and go to: http://localhost:{port}")
-    print("Press Ctrl+C to stop the server")
+    logger.info("Starting Scot4Me Job Board Server...")
+    logger.info(f"Open your browser and go to: http://localhost:{port}")
+    logger.info("Press Ctrl+C to stop the server")
+    open_storage()
     app.run(debug=True, host=host, port=port) 
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""Compact cookie sessions plus a bounded server-side store for per-session data.
+
+server.py used Flask-Session's filesystem backend: every request read and
+rewrote a pickle file, and demo mode kept appending result lists to the
+session. The session is now Flask's signed cookie and holds identity only
+(user ID, name, and a random key for this store). ``CompactSessionInterface``
+refuses to write a cookie larger than ``SESSION_COOKIE_MAX_BYTES``, so result
+sets can't creep back into it.
+
+Larger per-session data goes in ``SessionStore``, an in-memory map keyed by
+that random key. Entries expire after ``SESSION_STORE_TTL`` seconds without
+use, at most ``SESSION_STORE_MAX_ENTRIES`` sessions are kept (the least
+recently used are evicted first), and stored lists are capped at
+``SESSION_STORE_MAX_ITEMS`` items, keeping the newest.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSessionInterface
+
+# Largest session cookie the app may write, in bytes
+SESSION_COOKIE_MAX_BYTES = int(os.getenv('SESSION_COOKIE_MAX_BYTES', '1024'))
+
+SESSION_STORE_TTL = float(os.getenv('SESSION_STORE_TTL', '3600'))
+SESSION_STORE_MAX_ENTRIES = int(os.getenv('SESSION_STORE_MAX_ENTRIES', '1000'))
+SESSION_STORE_MAX_ITEMS = int(os.getenv('SESSION_STORE_MAX_ITEMS', '200'))
+
+# Session field holding the key of the session's SessionStore entry
+STORE_KEY = 'sid'
+
+# Placeholder keys from old .env templates; anyone could forge sessions signed with them
+KNOWN_INSECURE_KEYS = {'', 'your-secret-key-here'}
+
+logger = logging.getLogger(__name__)
+
+
+class SessionTooLarge(ValueError):
+    pass
+
+
+class CompactSessionInterface(SecureCookieSessionInterface):
+    """Signed cookie sessions that reject payloads over ``max_bytes``."""
+
+    def __init__(self, max_bytes=SESSION_COOKIE_MAX_BYTES):
+        self.max_bytes = max_bytes
+
+    def save_session(self, app, session, response):
+        if session.modified and session:
+            size = len(self.get_signing_serializer(app).dumps(dict(session)))
+            if size > self.max_bytes:
+                raise SessionTooLarge(f"Session cookie would be {size} bytes (limit {self.max_bytes}); "
+                                      "keep result sets in a SessionStore instead")
+        super().save_session(app, session, response)
+
+
+def session_secret_key(value=None):
+    """The key to sign session cookies with: ``value`` (default ``FLASK_SECRET_KEY``).
+
+    The cookie carries the user ID, so a guessable key lets anyone log in as
+    any user. When the key is unset or a known placeholder, a random key is
+    generated for this process and a warning logged: sessions then don't
+    survive restarts and aren't shared between workers.
+    """
+    value = os.getenv('FLASK_SECRET_KEY', '') if value is None else value
+    if value not in KNOWN_INSECURE_KEYS:
+        return value
+    logger.warning("FLASK_SECRET_KEY is not set; using a random per-process key. "
+                   "Set it to a long random value so sessions survive restarts and work across workers")
+    return secrets.token_hex(32)
+
+
+def store_key(session):
+    """The session's SessionStore key, created on first use."""
+    if STORE_KEY not in session:
+        session[STORE_KEY] = secrets.token_urlsafe(16)
+    return session[STORE_KEY]
+
+
+class SessionStore:
+    """Per-session values in memory, with idle expiry and size caps."""
+
+    def __init__(self, ttl=SESSION_STORE_TTL, max_entries=SESSION_STORE_MAX_ENTRIES,
+                 max_items=SESSION_STORE_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'expired': 0, 'evicted': 0}
+
+    def _purge(self, now):
+        # Entries are kept in last-used order, so expired ones are at the front
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[key]
+            self.counters['expired'] += 1
+
+    def get(self, key, name, default=None):
+        if key is None:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries[key] = (now + self.ttl, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1].get(name, default)
+
+    def set(self, key, name, value):
+        if isinstance(value, list) and len(value) > self.max_items:
+            value = value[-self.max_items:]
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            values = self._entries.pop(key, (None, {}))[1]
+            values[name] = value
+            self._entries[key] = (now + self.ttl, values)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evicted'] += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'sessions': len(self._entries)}
@@ -0,0 +1,521 @@
+"""SQLite implementation of job_repository.JobRepository.
+
+Single-node deployments and offline benchmarks get a real indexed store
+instead of the session demo lists. Each job is one row: the full document is
+kept as JSON in ``data``, and the fields the dashboard filters and pages on
+are copied into indexed columns. Listings are then one indexed range scan
+per page, and applied jobs are excluded in the same query.
+
+The database runs in WAL mode, so readers never block the writer, and each
+thread gets its own connection. Writes are grouped into one transaction per
+``SQLITE_BATCH_ROWS`` jobs, and every write transaction bumps a generation
+counter that versions the data for HTTP validators. Full-text search and
+facets use an in-memory ``SearchIndex``, built from the table on first use
+and updated after each of this process's commits. When the generation shows
+another process wrote to the file, the index is rebuilt before it is used.
+
+Accounts live in the same file, since Firebase Auth isn't set up in this
+mode: passwords are stored as salted werkzeug hashes.
+"""
+import contextlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from firebase_config import (JOBS_PAGE_SIZE, MAX_JOBS_PAGE_SIZE, JOB_MAX_AGE_HOURS, JOB_SWEEP_BATCH,
+                             JOB_SWEEP_PAUSE, encode_cursor, decode_cursor)
+from job_records import JOB_SUMMARY_FIELDS, job_document_id, description_snippet
+from job_repository import JobRepository, SQLITE_PATH
+from search_index import SearchIndex, FACET_TOP_N
+
+logger = logging.getLogger(__name__)
+
+# Jobs written per transaction by the bulk operations
+SQLITE_BATCH_ROWS = int(os.getenv('SQLITE_BATCH_ROWS', '500'))
+
+# Document fields copied into columns of their own
+COLUMNS = ['user_id', 'status', 'location', 'company', 'job_type', 'is_remote', 'min_amount', 'max_amount',
+           'created_at']
+
+# Columns get_jobs_page and friends accept as filters
+FILTER_COLUMNS = {'location', 'company', 'job_type', 'is_remote'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    status TEXT,
+    location TEXT,
+    company TEXT,
+    job_type TEXT,
+    is_remote INTEGER,
+    min_amount REAL,
+    max_amount REAL,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, status, id);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs (location, status, id);
+CREATE INDEX IF NOT EXISTS jobs_company ON jobs (company, status, id);
+CREATE INDEX IF NOT EXISTS jobs_job_type ON jobs (job_type, status, id);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+
+CREATE TABLE IF NOT EXISTS applied_jobs (
+    user_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    applied_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, job_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    display_name TEXT,
+    password_hash TEXT NOT NULL,
+    created_at TEXT
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _column_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+class SQLiteJobRepository(JobRepository):
+    """Jobs, applied jobs and stats in one SQLite database file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH, batch_rows=SQLITE_BATCH_ROWS):
+        self.path = path
+        self.batch_rows = max(1, int(batch_rows))
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._index = None
+        # Generation the in-memory index reflects; writes by other processes move the stored one
+        self._index_generation = None
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: write transactions are opened explicitly in _transaction
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """One write transaction that also bumps the data generation."""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        with self._lock:
+            # Our callers apply this write to the index themselves; any other write forces a rebuild
+            if self._index_generation == generation - 1:
+                self._index_generation = generation
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    # Search index
+
+    def _search_index(self):
+        """The in-memory index, rebuilt when another process has written since it was built."""
+        conn = self._connect()
+        with self._lock:
+            conn.execute('BEGIN')
+            try:
+                generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+                if self._index is None or self._index_generation != generation:
+                    rows = conn.execute("SELECT id, data FROM jobs WHERE status = 'active'")
+                    index = SearchIndex()
+                    index.replace_all((row['id'], json.loads(row['data'])) for row in rows)
+                    self._index, self._index_generation = index, generation
+            finally:
+                conn.execute('COMMIT')
+            return self._index
+
+    def _index_jobs(self, documents):
+        with self._lock:
+            if self._index is not None:
+                self._index.add_many(documents)
+
+    def _unindex_jobs(self, job_ids):
+        with self._lock:
+            if self._index is not None and job_ids:
+                self._index.remove(job_ids)
+
+    # Writes
+
+    def _prepare(self, job_data, user_id, now):
+        job_data = dict(job_data)
+        job_data['created_at'] = now
+        job_data['user_id'] = user_id
+        job_data['status'] = 'active'
+        if 'description' in job_data:
+            job_data['description_snippet'] = description_snippet(job_data['description'])
+        return job_data
+
+    def _upsert(self, conn, chunk):
+        """Merge ``chunk`` of (doc_id, job_data) pairs over the stored documents; returns the merged pairs."""
+        ids = [doc_id for doc_id, _ in chunk]
+        previous = {row['id']: json.loads(row['data']) for row in
+                    conn.execute(f'SELECT id, data FROM jobs WHERE id IN ({_placeholders(ids)})', ids)}
+        merged = [(doc_id, {**previous.get(doc_id, {}), **job_data}) for doc_id, job_data in chunk]
+        conn.executemany(
+            f"INSERT INTO jobs (id, {', '.join(COLUMNS)}, data) VALUES (?, {_placeholders(COLUMNS)}, ?) "
+            f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in COLUMNS)}, "
+            "data = excluded.data",
+            [(doc_id, *(_column_value(job.get(column)) for column in COLUMNS), json.dumps(job, default=str))
+             for doc_id, job in merged])
+        return merged
+
+    def save_job(self, job_data, user_id=None):
+        report = self.save_jobs_bulk([job_data], user_id)
+        if not report['saved']:
+            logger.error(f"Error saving job: {report['errors'][0]['error'] if report['errors'] else 'no job'}")
+            return None
+        return report['ids'][0]
+
+    def save_jobs_bulk(self, jobs, user_id=None):
+        report = {'saved': 0, 'failed': 0, 'ids': [], 'errors': []}
+        now = _now()
+        documents = {}
+        for job_data in jobs:
+            documents[job_document_id(job_data, user_id)] = self._prepare(job_data, user_id, now)
+
+        items = list(documents.items())
+        for start in range(0, len(items), self.batch_rows):
+            chunk = items[start:start + self.batch_rows]
+            try:
+                with self._transaction() as conn:
+                    merged = self._upsert(conn, chunk)
+            except sqlite3.Error as e:
+                report['errors'].extend({'id': doc_id, 'error': str(e)} for doc_id, _ in chunk)
+                continue
+            report['ids'].extend(doc_id for doc_id, _ in chunk)
+            self._index_jobs(merged)
+
+        report['saved'] = len(report['ids'])
+        report['failed'] = len(report['errors'])
+        if report['failed']:
+            logger.warning(f"Bulk save: {report['saved']} saved, {report['failed']} failed")
+        return report
+
+    def _run_batches(self, job_ids, move):
+        """Apply ``move(conn, rows)`` to existing jobs, one transaction per batch.
+
+        ``rows`` maps each found job ID to its document and ``move`` returns
+        the IDs it changed. Returns (ids, errors).
+        """
+        job_ids = list(dict.fromkeys(job_id for job_id in job_ids if job_id))
+        done, errors = [], []
+        for start in range(0, len(job_ids), self.batch_rows):
+            chunk = job_ids[start:start + self.batch_rows]
+            try:
+                with self._transaction() as conn:
+                    rows = {row['id']: json.loads(row['data']) for row in
+                            conn.execute(f'SELECT id, data FROM jobs WHERE id IN ({_placeholders(chunk)})', chunk)}
+                    changed = move(conn, rows)
+            except sqlite3.Error as e:
+                errors.extend({'id': job_id, 'error': str(e)} for job_id in chunk)
+                continue
+            done.extend(changed)
+            errors.extend({'id': job_id, 'error': 'Job not found'} for job_id in chunk if job_id not in changed)
+            self._unindex_jobs(changed)
+        return done, errors
+
+    def mark_jobs_applied_bulk(self, job_ids, user_id):
+        def move(conn, rows):
+            now = _now()
+            applied = []
+            for job_id, job_data in rows.items():
+                # Jobs owned by someone else are left alone, like in delete_jobs_bulk
+                if job_data.get('user_id') not in (None, user_id):
+                    continue
+                job_data.update({'id': job_id, 'applied_at': now, 'application_status': 'applied'})
+                applied.append((user_id, job_id, now, json.dumps(job_data, default=str)))
+            conn.executemany('INSERT OR REPLACE INTO applied_jobs (user_id, job_id, applied_at, data) VALUES (?, ?, ?, ?)',
+                             applied)
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for _, job_id, _, _ in applied])
+            return [job_id for _, job_id, _, _ in applied]
+
+        applied, errors = self._run_batches(job_ids, move)
+        return {'applied': len(applied), 'failed': len(errors), 'ids': applied, 'errors': errors}
+
+    def mark_job_applied(self, job_id, user_id):
+        report = self.mark_jobs_applied_bulk([job_id], user_id)
+        if not report['applied']:
+            logger.error(f"Error marking job {job_id} as applied: "
+                         f"{report['errors'][0]['error'] if report['errors'] else 'no job ID'}")
+            return False
+        return True
+
+    def delete_jobs_bulk(self, job_ids, user_id=None):
+        def move(conn, rows):
+            # With user_id set, jobs owned by someone else are left alone
+            deleted = [job_id for job_id, job_data in rows.items()
+                       if not user_id or job_data.get('user_id') in (None, user_id)]
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in deleted])
+            return deleted
+
+        deleted, errors = self._run_batches(job_ids, move)
+        return {'deleted': len(deleted), 'failed': len(errors), 'ids': deleted, 'errors': errors}
+
+    def delete_job(self, job_id, user_id):
+        # Like the Firestore version: other users' jobs are left alone, and
+        # they, like missing jobs, are still reported as deleted
+        report = self.delete_jobs_bulk([job_id], user_id)
+        errors = [error['error'] for error in report['errors'] if error['error'] != 'Job not found']
+        if errors:
+            logger.error(f"Error deleting job: {errors[0]}")
+            return False
+        return True
+
+    def expire_stale_jobs(self, max_age_hours=JOB_MAX_AGE_HOURS, batch_size=JOB_SWEEP_BATCH,
+                          pause=JOB_SWEEP_PAUSE, max_batches=None):
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).isoformat()
+        report = {'deleted': 0, 'failed': 0, 'batches': 0, 'cutoff': cutoff}
+        started = time.time()
+        conn = self._connect()
+
+        while True:
+            job_ids = [row['id'] for row in
+                       conn.execute('SELECT id FROM jobs WHERE created_at < ? LIMIT ?', (cutoff, batch_size))]
+            if not job_ids:
+                break
+            result = self.delete_jobs_bulk(job_ids)
+            report['deleted'] += result['deleted']
+            report['failed'] += result['failed']
+            report['batches'] += 1
+            if not result['deleted'] or len(job_ids) < batch_size:
+                break
+            if max_batches and report['batches'] >= max_batches:
+                break
+            time.sleep(pause)
+
+        report['elapsed'] = round(time.time() - started, 2)
+        return report
+
+    # Reads
+
+    def _where(self, user_id, filters):
+        """WHERE clause and parameters for active jobs the user hasn't applied to."""
+        clauses, params = ["status = 'active'"], []
+        if user_id:
+            clauses.append('user_id = ?')
+            clauses.append('id NOT IN (SELECT job_id FROM applied_jobs WHERE user_id = ?)')
+            params += [user_id, user_id]
+        for key, value in (filters or {}).items():
+            if not value:
+                continue
+            if key not in FILTER_COLUMNS:
+                raise ValueError(f'Unsupported filter: {key}')
+            clauses.append(f'{key} = ?')
+            params.append(_column_value(value))
+        return ' AND '.join(clauses), params
+
+    @staticmethod
+    def _job(row, fields=None):
+        job_data = json.loads(row['data'])
+        if fields is not None:
+            job_data = {field: job_data[field] for field in fields if field in job_data}
+        job_data['id'] = row['id']
+        return job_data
+
+    def get_jobs_page(self, user_id=None, filters=None, page_size=JOBS_PAGE_SIZE, cursor=None,
+                      fields=JOB_SUMMARY_FIELDS):
+        page_size = max(1, min(int(page_size), MAX_JOBS_PAGE_SIZE))
+        where, params = self._where(user_id, filters)
+        if cursor:
+            where += ' AND id > ?'
+            params.append(decode_cursor(cursor))
+        try:
+            rows = self._connect().execute(f'SELECT id, data FROM jobs WHERE {where} ORDER BY id LIMIT ?',
+                                           params + [page_size + 1]).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting jobs page: {e}")
+            return {'jobs': [], 'next_cursor': None}
+        next_cursor = encode_cursor(rows[page_size - 1]['id']) if len(rows) > page_size else None
+        return {'jobs': [self._job(row, fields) for row in rows[:page_size]], 'next_cursor': next_cursor}
+
+    def get_jobs(self, user_id=None, filters=None):
+        where, params = self._where(user_id, filters)
+        rows = self._connect().execute(f'SELECT id, data FROM jobs WHERE {where} ORDER BY id', params)
+        return [self._job(row) for row in rows]
+
+    def get_job(self, job_id, user_id=None):
+        row = self._connect().execute('SELECT id, data FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_data = self._job(row)
+        if user_id and job_data.get('user_id') not in (None, user_id):
+            return None
+        return job_data
+
+    def get_applied_jobs_page(self, user_id, page_size=JOBS_PAGE_SIZE, cursor=None):
+        page_size = max(1, min(int(page_size), MAX_JOBS_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else ''
+        if not user_id:
+            return {'jobs': [], 'next_cursor': None}
+        rows = self._connect().execute(
+            'SELECT job_id, data FROM applied_jobs WHERE user_id = ? AND job_id > ? ORDER BY job_id LIMIT ?',
+            (user_id, after, page_size + 1)).fetchall()
+        jobs = []
+        for row in rows[:page_size]:
+            job_data = json.loads(row['data'])
+            job_data['id'] = row['job_id']
+            job_data.setdefault('application_status', 'applied')
+            jobs.append(job_data)
+        next_cursor = encode_cursor(rows[page_size - 1]['job_id']) if len(rows) > page_size else None
+        return {'jobs': jobs, 'next_cursor': next_cursor}
+
+    def get_applied_jobs(self, user_id):
+        applied_jobs, cursor = [], None
+        while True:
+            page = self.get_applied_jobs_page(user_id, MAX_JOBS_PAGE_SIZE, cursor)
+            applied_jobs.extend(page['jobs'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return applied_jobs
+
+    def _applied_job_ids(self, user_id):
+        if not user_id:
+            return set()
+        rows = self._connect().execute('SELECT job_id FROM applied_jobs WHERE user_id = ?', (user_id,))
+        return {row['job_id'] for row in rows}
+
+    # Stats
+
+    def get_user_stats(self, user_id):
+        conn = self._connect()
+        try:
+            return {
+                'applied_jobs': conn.execute('SELECT COUNT(*) FROM applied_jobs WHERE user_id = ?',
+                                             (user_id,)).fetchone()[0],
+                'searches_performed': conn.execute('SELECT COUNT(*) FROM jobs WHERE user_id = ?',
+                                                   (user_id,)).fetchone()[0],
+                'total_jobs_available': conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'active'").fetchone()[0],
+            }
+        except sqlite3.Error as e:
+            logger.error(f"Error getting user stats: {e}")
+            return {}
+
+    def get_global_stats(self):
+        """Same fields as firebase_config.get_global_stats, counted exactly."""
+        try:
+            row = self._connect().execute("""
+                SELECT COUNT(*) AS total_jobs,
+                       COALESCE(SUM(is_remote = 1), 0) AS remote_jobs,
+                       AVG(CASE WHEN min_amount AND max_amount THEN (min_amount + max_amount) / 2 END) AS avg_salary,
+                       COUNT(DISTINCT NULLIF(lower(trim(company)), '')) AS unique_companies
+                FROM jobs WHERE status = 'active'
+            """).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting global stats: {e}")
+            return {}
+        return {
+            'total_jobs': row['total_jobs'],
+            'remote_jobs': row['remote_jobs'],
+            'avg_salary': int(row['avg_salary'] or 0),
+            'unique_companies': row['unique_companies'],
+        }
+
+    def get_data_version(self):
+        try:
+            return self._connect().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading data version: {e}")
+            return None
+
+    # Search
+
+    def search_jobs(self, query, user_id=None, filters=None, limit=JOBS_PAGE_SIZE, offset=0):
+        limit = max(1, min(int(limit), MAX_JOBS_PAGE_SIZE))
+        filters = dict(filters or {})
+        if user_id:
+            filters['user_id'] = user_id
+        return self._search_index().search(query, filters, limit=limit, offset=max(int(offset), 0),
+                                           exclude=self._applied_job_ids(user_id))
+
+    def get_job_facets(self, user_id=None, filters=None, top_n=FACET_TOP_N):
+        filters = dict(filters or {})
+        if user_id:
+            filters['user_id'] = user_id
+        return self._search_index().facets(filters, top_n=max(1, min(int(top_n), MAX_JOBS_PAGE_SIZE)),
+                                           exclude=self._applied_job_ids(user_id))
+
+    # Users
+
+    def create_user(self, email, password, display_name):
+        user_id = uuid.uuid4().hex
+        try:
+            self._connect().execute(
+                'INSERT INTO users (id, email, display_name, password_hash, created_at) VALUES (?, ?, ?, ?, ?)',
+                (user_id, email.strip().lower(), display_name, generate_password_hash(password), _now()))
+        except sqlite3.IntegrityError:
+            logger.error("Error creating user: email already registered")
+            return None
+        except sqlite3.Error as e:
+            logger.error(f"Error creating user: {e}")
+            return None
+        return user_id
+
+    def verify_user_credentials(self, email, password):
+        try:
+            row = self._connect().execute('SELECT id, email, display_name, password_hash FROM users WHERE email = ?',
+                                          (email.strip().lower(),)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error verifying credentials: {e}")
+            return None
+        if row is None or not check_password_hash(row['password_hash'], password):
+            return None
+        return {'uid': row['id'], 'email': row['email'], 'display_name': row['display_name'] or 'User'}
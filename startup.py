@@ -0,0 +1,128 @@
+"""Startup cost: lazy imports, import profiling and warm-up.
+
+Importing server.py used to load pandas and the Firebase Admin SDK (about a
+second together) and initialize Firebase before the first request could be
+served. jobspy, which is even heavier, was first imported inside the first
+search. Cold starts on autoscaled and serverless instances paid for all of it.
+
+Heavy dependencies are now bound with ``lazy_module`` and imported on first
+use. ``warm_up`` imports them on a background thread once the app is up,
+then runs startup tasks such as the search index build, so the first request
+that needs them doesn't pay for either.
+``profile_imports`` (``python manage.py profile-startup``) imports a module
+in a fresh interpreter under ``-X importtime`` and reports the slowest imports.
+"""
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Modules warm_up imports off the request path
+WARM_UP_MODULES = [name for name in os.getenv(
+    'STARTUP_WARM_UP_MODULES', 'pandas,firebase_admin.firestore,jobspy').split(',') if name]
+
+# Set to 0 to skip the background warm-up (e.g. on short-lived serverless workers)
+STARTUP_WARM_UP = os.getenv('STARTUP_WARM_UP', '1') != '0'
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+_warm_up_report = {}
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._lazy_name), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._lazy_name in sys.modules else 'not loaded'
+        return f'<lazy module {self._lazy_name!r} ({state})>'
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def _timed(function):
+    started = time.perf_counter()
+    try:
+        function()
+        return round((time.perf_counter() - started) * 1000, 1)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def _import_all(modules, tasks=()):
+    for name in modules:
+        result = _timed(lambda: importlib.import_module(name))
+        with _warm_up_lock:
+            _warm_up_report[name] = result
+    # Tasks run after the imports they are likely to need
+    for task in tasks:
+        result = _timed(task)
+        with _warm_up_lock:
+            _warm_up_report[task.__name__] = result
+    logger.info(f"Warm-up finished: {_warm_up_report}")
+
+
+def warm_up(modules=None, background=True, tasks=()):
+    """Import ``modules`` (default WARM_UP_MODULES), then call ``tasks``, once per process.
+
+    With ``background`` this runs on a daemon thread, which is returned;
+    otherwise it runs inline. Failures, such as jobspy not being installed,
+    are recorded in ``warm_up_report`` instead of raised.
+    """
+    global _warm_up_thread
+    modules = WARM_UP_MODULES if modules is None else modules
+    if not background:
+        _import_all(modules, tasks)
+        return None
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_import_all, args=(modules, tasks), name='warm-up',
+                                               daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
+
+
+def warm_up_report():
+    """Milliseconds each warmed-up module took to import, or the error it raised."""
+    with _warm_up_lock:
+        return dict(_warm_up_report)
+
+
+def profile_imports(module='server', top=25):
+    """Import ``module`` in a fresh interpreter under ``-X importtime``.
+
+    Returns ``{'module', 'wall_ms', 'imports'}`` where ``imports`` lists the
+    ``top`` slowest imports by cumulative time (including their own imports)
+    with ``self_ms`` and ``cumulative_ms``.
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        imports.append({
+            'module': name.strip(),
+            'self_ms': round(int(self_us) / 1000, 1),
+            'cumulative_ms': round(int(cumulative_us) / 1000, 1),
+        })
+    imports.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return {'module': module, 'wall_ms': wall_ms, 'imports': imports[:top]}
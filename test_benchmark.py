@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import benchmark
+
+
+def test_scale_up_gives_repeats_new_ids():
+    jobs = benchmark.load_recorded().head(3)
+
+    scaled = benchmark.scale_up(jobs, 7)
+
+    assert len(scaled) == 7
+    assert scaled['id'].is_unique
+    assert list(scaled['title'][3:6]) == list(jobs['title'])
+
+
+def test_run_benchmark_times_every_operation():
+    report = benchmark.run_benchmark([40], repeat=2, ops=2, bulk=5)
+
+    results = report['runs'][0]['results']
+    assert results['ingest']['jobs'] == 40
+    assert {'jobs_first_page', 'jobs_not_modified', 'jobs_walk_all', 'stats', 'mark_applied', 'delete',
+            'mark_applied_bulk', 'delete_bulk'} <= set(results)
+    assert results['jobs_not_modified']['per_op']['reads'] == 0
+    assert results['delete_bulk']['jobs'] == 5
+
+
+def test_compare_flags_regressions():
+    baseline = {'runs': [{'rows': 10, 'results': {'stats': {'p50_ms': 2.0}, 'delete': {'p50_ms': 1.0}}}]}
+    report = {'runs': [{'rows': 10, 'results': {'stats': {'p50_ms': 3.0}, 'delete': {'p50_ms': 1.1}}}]}
+
+    assert benchmark.compare(report, baseline, threshold=1.25) == [
+        {'rows': 10, 'operation': 'stats', 'baseline': 2.0, 'current': 3.0, 'ratio': 1.5}]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
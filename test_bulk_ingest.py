@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+import datetime
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions
+
+import firebase_config
+import job_sweeper
+from job_records import job_document_id
+from job_repository import FirestoreJobRepository
+
+
+def make_jobs(count):
+    return [{'id': f'job-{i}', 'title': f'Engineer {i}', 'company': 'Acme'} for i in range(count)]
+
+
+def test_bulk_save_chunks_to_commit_limit(db):
+    report = firebase_config.save_jobs_bulk(make_jobs(1200), user_id='u1')
+
+    assert report['saved'] == 1200
+    assert report['failed'] == 0
+    assert db.stats['commits'] == 3
+    saved = list(db.collection('jobs').where('user_id', '==', 'u1').stream())
+    assert len(saved) == 1200
+    assert saved[0].to_dict()['status'] == 'active'
+
+
+def test_bulk_save_chunks_by_size(db):
+    jobs = [{'id': str(i), 'description': 'x' * 1000} for i in range(10)]
+    report = firebase_config.save_jobs_bulk(jobs, max_bytes=3000)
+
+    assert report['saved'] == 10
+    assert db.stats['commits'] == 5
+
+
+def test_bulk_save_retries_transient_failures(db):
+    db.fail_next_commits = 2
+    report = firebase_config.save_jobs_bulk(make_jobs(10), retry_delay=0)
+
+    assert report['saved'] == 10
+    assert report['failed'] == 0
+
+
+def test_bulk_save_fails_the_chunk_without_bisecting_when_retries_run_out(db):
+    db.fail_next_commits = 100
+    report = firebase_config.save_jobs_bulk(make_jobs(10), max_retries=3, retry_delay=0)
+
+    assert report['saved'] == 0
+    assert report['failed'] == 10
+    assert 100 - db.fail_next_commits == 4
+
+
+def test_bulk_save_isolates_bad_documents(db, monkeypatch):
+    original_commit = db._commit
+
+    def commit(writes, read_versions=None):
+        if any(data.get('id') == 'job-3' for _, _, data, _ in writes):
+            raise exceptions.InvalidArgument('document too large')
+        return original_commit(writes, read_versions)
+
+    monkeypatch.setattr(db, '_commit', commit)
+    report = firebase_config.save_jobs_bulk(make_jobs(8), retry_delay=0)
+
+    assert report['saved'] == 7
+    assert report['errors'] == [{'id': job_document_id({'id': 'job-3'}), 'error': '400 document too large'}]
+
+
+def test_rescrapes_upsert_the_same_documents(db):
+    firebase_config.save_jobs_bulk(make_jobs(5), user_id='u1')
+    changed = make_jobs(5)
+    changed[0]['title'] = 'Staff Engineer'
+    report = firebase_config.save_jobs_bulk(changed + changed[:2], user_id='u1')
+
+    assert report['saved'] == 5
+    jobs = {doc.id: doc.to_dict() for doc in db.collection('jobs').stream()}
+    assert len(jobs) == 5
+    assert jobs[job_document_id(changed[0], 'u1')]['title'] == 'Staff Engineer'
+
+    # Another user finding the same postings gets their own documents
+    firebase_config.save_jobs_bulk(make_jobs(5), user_id='u2')
+    assert len(list(db.collection('jobs').stream())) == 10
+
+
+
+def test_concurrent_ingests_of_different_jobs_do_not_conflict(db, monkeypatch):
+    # Both ingests read their jobs before either commits
+    barrier, get_all, commit, aborted = threading.Barrier(2), db.get_all, db._commit, []
+
+    def read_then_wait(*args, **kwargs):
+        snapshots = list(get_all(*args, **kwargs))
+        barrier.wait(timeout=5)
+        return iter(snapshots)
+
+    def record_aborts(writes, read_versions=None):
+        try:
+            return commit(writes, read_versions)
+        except exceptions.Aborted:
+            aborted.append(writes)
+            raise
+
+    monkeypatch.setattr(db, 'get_all', read_then_wait)
+    monkeypatch.setattr(db, '_commit', record_aborts)
+    threads = [threading.Thread(target=firebase_config.save_jobs_bulk, args=(make_jobs(5), user_id))
+               for user_id in ('u1', 'u2')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert aborted == []
+    assert db.collection('stats').document('global').get().to_dict()['total_jobs'] == 10
+
+
+def test_mark_applied_is_one_read_and_one_commit(db):
+    firebase_config.save_jobs_bulk(make_jobs(1), user_id='u1')
+    job_id = job_document_id(make_jobs(1)[0], 'u1')
+    db.reset_stats()
+
+    assert firebase_config.mark_job_applied(job_id, 'u1')
+    # Begin, one batched read and the commit
+    assert db.stats['rpcs'] == 3
+    assert db.stats['reads'] == 1
+    assert db.stats['commits'] == 1
+    assert not db.collection('jobs').document(job_id).get().exists
+    assert not firebase_config.mark_job_applied(job_id, 'u1')
+
+
+def test_bulk_mark_applied_chunks_and_reports_each_id(db):
+    jobs = make_jobs(400)
+    firebase_config.save_jobs_bulk(jobs, user_id='u1')
+    job_ids = [job_document_id(job, 'u1') for job in jobs]
+    db.reset_stats()
+
+    report = firebase_config.mark_jobs_applied_bulk(job_ids + ['missing'], 'u1')
+
+    assert report['applied'] == 400
+    assert report['errors'] == [{'id': 'missing', 'error': 'Job not found'}]
+    assert db.stats['commits'] == 3
+    assert db.collection('jobs').count().get()[0][0].value == 0
+    user = db.collection('users').document('u1').get().to_dict()
+    assert user['jobs_count'] == 0
+    assert user['applied_count'] == 400
+    assert db.collection('stats').document('global').get().to_dict()['total_jobs'] == 0
+
+
+def test_bulk_mark_applied_reports_failed_chunks(db):
+    firebase_config.save_jobs_bulk(make_jobs(3), user_id='u1')
+    db.fail_next_commits = 10
+    report = firebase_config.mark_jobs_applied_bulk([job_document_id(job, 'u1') for job in make_jobs(3)], 'u1',
+                                                    max_retries=1, retry_delay=0)
+
+    assert report['applied'] == 0
+    assert report['failed'] == 3
+
+
+
+def test_bulk_mark_applied_skips_other_users_jobs(db):
+    firebase_config.save_jobs_bulk(make_jobs(1), user_id='u2')
+    other = job_document_id(make_jobs(1)[0], 'u2')
+
+    report = firebase_config.mark_jobs_applied_bulk([other], 'u1')
+
+    assert report['errors'] == [{'id': other, 'error': 'Job not found'}]
+    assert db.collection('jobs').document(other).get().exists
+    assert db.collection('users').document('u2').get().to_dict()['jobs_count'] == 1
+
+
+def age_jobs(db, job_ids, hours):
+    old = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours)
+    for job_id in job_ids:
+        db.collection('jobs').document(job_id).update({'created_at': old})
+
+
+def test_bulk_delete_only_removes_the_users_jobs(db):
+    firebase_config.save_jobs_bulk(make_jobs(300), user_id='u1')
+    firebase_config.save_jobs_bulk(make_jobs(1), user_id='u2')
+    own = [job_document_id(job, 'u1') for job in make_jobs(300)]
+    other = job_document_id(make_jobs(1)[0], 'u2')
+    db.reset_stats()
+
+    report = firebase_config.delete_jobs_bulk(own + [other], user_id='u1')
+
+    assert report['deleted'] == 300
+    assert report['errors'] == [{'id': other, 'error': 'Job not found'}]
+    assert db.stats['commits'] == 2
+    assert db.collection('users').document('u1').get().to_dict()['jobs_count'] == 0
+    assert db.collection('stats').document('global').get().to_dict()['total_jobs'] == 1
+
+
+def test_delete_job_leaves_other_users_jobs_alone(db):
+    firebase_config.save_jobs_bulk(make_jobs(1), user_id='u2')
+    other = job_document_id(make_jobs(1)[0], 'u2')
+
+    firebase_config.delete_job(other, 'u1')
+
+    assert db.collection('jobs').document(other).get().exists
+    assert db.collection('stats').document('global').get().to_dict()['total_jobs'] == 1
+    assert firebase_config.delete_job(other, 'u2')
+    assert not db.collection('jobs').document(other).get().exists
+
+
+def test_expire_stale_jobs_deletes_old_postings_in_batches(db):
+    firebase_config.save_jobs_bulk(make_jobs(25), user_id='u1')
+    stale = [job_document_id(job, 'u1') for job in make_jobs(25)[:20]]
+    age_jobs(db, stale, hours=100)
+
+    report = firebase_config.expire_stale_jobs(max_age_hours=72, batch_size=8, pause=0)
+
+    assert report['deleted'] == 20
+    assert report['batches'] == 3
+    assert db.collection('jobs').count().get()[0][0].value == 5
+    assert db.collection('stats').document('global').get().to_dict()['total_jobs'] == 5
+
+
+def test_sweeper_runs_in_the_background(db):
+    firebase_config.save_jobs_bulk(make_jobs(3), user_id='u1')
+    age_jobs(db, [job_document_id(job, 'u1') for job in make_jobs(3)], hours=10000)
+
+    job_sweeper.start_sweeper(FirestoreJobRepository(), interval=0.01)
+    try:
+        deadline = time.time() + 5
+        while job_sweeper.last_sweep() is None and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        job_sweeper.stop_sweeper(timeout=5)
+
+    assert job_sweeper.last_sweep()['deleted'] == 3
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+
+import pandas as pd
+import pytest
+from flask import Flask, Response, jsonify
+
+import firebase_config
+import http_cache
+from http_cache import make_etag, not_modified, with_validators
+from job_records import job_document_id
+from job_store import JobStore, iter_json
+
+ROWS = [{'id': f'job-{i}', 'title': f'Engineer {i}', 'company': 'Acme'} for i in range(200)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(pd.DataFrame(ROWS))
+    return store
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    http_cache.init_app(app)
+    reads = []
+
+    @app.route('/jobs')
+    def jobs():
+        signature = store.signature()
+        etag, last_modified = make_etag(*signature), signature[0] // 1_000_000_000
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+        reads.append(1)
+        return with_validators(Response(iter_json(store.read()), mimetype='application/json'), etag, last_modified)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    client = app.test_client()
+    client.reads = reads
+    return client
+
+
+def test_gzip_is_negotiated_for_streamed_json(client):
+    response = client.get('/jobs', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == ROWS
+    assert response.headers['ETag'].endswith('-gzip"')
+
+
+def test_identity_and_small_bodies_are_not_compressed(client):
+    plain = client.get('/jobs')
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(plain.data) == ROWS
+
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    assert small.get_json() == {'ok': True}
+
+
+def test_matching_etag_returns_304_without_reading(client, store):
+    first = client.get('/jobs', headers={'Accept-Encoding': 'gzip'})
+    assert client.reads == [1]
+
+    # Either representation's tag revalidates the resource
+    for etag in (first.headers['ETag'], first.headers['ETag'].replace('-gzip', '')):
+        again = client.get('/jobs', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+        assert again.status_code == 304
+        assert again.data == b''
+    assert client.reads == [1]
+
+    store.write(pd.DataFrame(ROWS[:10]))
+    changed = client.get('/jobs', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert len(changed.get_json()) == 10
+
+
+def test_if_modified_since(client):
+    first = client.get('/jobs')
+
+    again = client.get('/jobs', headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+    assert again.status_code == 304
+    assert client.reads == [1]
+
+
+def test_data_version_is_a_cached_read_bumped_by_writes(db):
+    assert firebase_config.get_data_version() == 0
+    db.reset_stats()
+    assert firebase_config.get_data_version() == 0
+    assert db.stats['rpcs'] == 0
+
+    job = {'id': 'a', 'company': 'Acme'}
+    firebase_config.save_jobs_bulk([job], user_id='u1')
+    after_save = firebase_config.get_data_version()
+    assert after_save > 0
+
+    assert firebase_config.mark_job_applied(job_document_id(job, 'u1'), 'u1')
+    after_apply = firebase_config.get_data_version()
+    assert after_apply > after_save
+
+    firebase_config.rebuild_global_stats()
+    assert firebase_config.get_data_version() > after_apply
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
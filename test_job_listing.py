@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import firebase_config
+from job_records import job_document_id
+
+
+def make_jobs(count, **fields):
+    return [{'id': f'job-{i}', 'title': f'Engineer {i}', 'company': 'Acme', **fields} for i in range(count)]
+
+
+def walk_pages(user_id, page_size, filters=None):
+    seen, cursor = [], None
+    while True:
+        page = firebase_config.get_jobs_page(user_id, filters, page_size, cursor)
+        seen.extend(job['id'] for job in page['jobs'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return seen
+
+
+def test_pages_cover_every_job_once(db):
+    firebase_config.save_jobs_bulk(make_jobs(23), user_id='u1')
+    firebase_config.save_jobs_bulk(make_jobs(5), user_id='u2')
+
+    seen = walk_pages('u1', page_size=10)
+
+    assert len(seen) == 23
+    assert len(set(seen)) == 23
+
+
+def test_a_page_reads_only_one_page_of_documents(db):
+    firebase_config.save_jobs_bulk(make_jobs(200), user_id='u1')
+    db.reset_stats()
+
+    page = firebase_config.get_jobs_page('u1', page_size=20)
+
+    assert len(page['jobs']) == 20
+    assert page['next_cursor']
+    assert db.stats['reads'] <= 22
+
+
+def test_applied_jobs_are_skipped_without_short_pages(db):
+    jobs = make_jobs(12)
+    firebase_config.save_jobs_bulk(jobs, user_id='u1')
+    first_page = firebase_config.get_jobs_page('u1', page_size=5)
+    for job in first_page['jobs'][:3]:
+        firebase_config.mark_job_applied(job['id'], 'u1')
+    # Applied copies exist even if an old scrape re-creates the job document
+    firebase_config.save_jobs_bulk(jobs, user_id='u1')
+
+    page = firebase_config.get_jobs_page('u1', page_size=5)
+    applied = {job['id'] for job in first_page['jobs'][:3]}
+    assert len(page['jobs']) == 5
+    assert not applied & {job['id'] for job in page['jobs']}
+    assert len(walk_pages('u1', page_size=5)) == 9
+
+
+def test_filters_and_invalid_cursor(db):
+    firebase_config.save_jobs_bulk(make_jobs(4, location='Remote') + [{'id': 'x', 'location': 'Dallas'}], user_id='u1')
+
+    assert walk_pages('u1', 2, {'location': 'Dallas'}) == [job_document_id({'id': 'x'}, 'u1')]
+    with pytest.raises(ValueError):
+        firebase_config.get_jobs_page('u1', cursor='not-a-cursor')
+
+
+
+def test_listing_projects_summary_fields_and_detail_returns_full_job(db):
+    description = 'Build things. ' * 100
+    firebase_config.save_jobs_bulk(make_jobs(1, description=description), user_id='u1')
+
+    job = firebase_config.get_jobs_page('u1')['jobs'][0]
+    assert 'description' not in job
+    assert job['title'] == 'Engineer 0'
+    assert len(job['description_snippet']) <= 203
+
+    detail = firebase_config.get_job(job['id'], 'u1')
+    assert detail['description'] == description
+    assert firebase_config.get_job(job['id'], 'u2') is None
+    assert firebase_config.get_jobs_page('u1', fields=None)['jobs'][0]['description'] == description
+
+
+
+def test_applied_jobs_are_paged_from_snapshots(db):
+    firebase_config.save_jobs_bulk(make_jobs(25), user_id='u1')
+    for job in firebase_config.get_jobs_page('u1', page_size=25, fields=None)['jobs']:
+        firebase_config.mark_job_applied(job['id'], 'u1')
+    db.reset_stats()
+
+    page = firebase_config.get_applied_jobs_page('u1', page_size=10)
+
+    assert len(page['jobs']) == 10
+    assert all(job['title'].startswith('Engineer') for job in page['jobs'])
+    assert all(job['application_status'] == 'applied' for job in page['jobs'])
+    assert db.stats['rpcs'] == 1
+    assert len(firebase_config.get_applied_jobs_from_firebase('u1')) == 25
+
+
+def test_legacy_applied_entries_are_enriched_with_one_batched_read(db):
+    firebase_config.save_jobs_bulk(make_jobs(3), user_id='u1')
+    applied = db.collection('users').document('u1').collection('applied_jobs')
+    for job in firebase_config.get_jobs_page('u1', fields=None)['jobs']:
+        applied.document(job['id']).set({'status': 'interviewing'})
+    db.reset_stats()
+
+    jobs = firebase_config.get_applied_jobs_page('u1')['jobs']
+
+    assert {job['title'] for job in jobs} == {'Engineer 0', 'Engineer 1', 'Engineer 2'}
+    assert {job['application_status'] for job in jobs} == {'interviewing'}
+    assert db.stats['rpcs'] == 2
+
+
+
+def test_applied_ids_are_cached_and_written_through(db):
+    firebase_config.save_jobs_bulk(make_jobs(6), user_id='u1')
+    first, second = firebase_config.get_jobs_page('u1', page_size=2)['jobs']
+    firebase_config.mark_job_applied(first['id'], 'u1')
+    firebase_config.get_jobs_page('u1')
+    db.reset_stats()
+
+    firebase_config.mark_job_applied(second['id'], 'u1')
+    db.reset_stats()
+    page = firebase_config.get_jobs_page('u1')
+
+    assert {job['id'] for job in page['jobs']}.isdisjoint({first['id'], second['id']})
+    assert len(page['jobs']) == 4
+    # One query for the page; the applied subcollection isn't reread
+    assert db.stats['rpcs'] == 1
+
+
+def test_applied_job_ids_membership():
+    applied = firebase_config.AppliedJobIds(['c', 'a', 'b', 'a'])
+
+    assert list(applied) == ['a', 'b', 'c']
+    assert 'b' in applied and 'd' not in applied
+    assert 'd' in applied.union(['d'])
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from job_records import canonical_job_url, frame_to_documents, job_key, job_keys, normalize_job_frame
+
+
+def sample_jobs():
+    return pd.DataFrame({
+        'id': ['in-1', 'li-2'],
+        'title': ['AI Engineer', np.nan],
+        'date_posted': [datetime.date(2025, 8, 4), None],
+        'min_amount': [100000.0, np.nan],
+        'is_remote': [True, False],
+        'vacancy_count': pd.array([3, None], dtype='Int64'),
+        'scraped_at': pd.to_datetime(['2025-08-04 10:30:00', None]),
+    })
+
+
+def test_documents_contain_only_python_values():
+    documents = frame_to_documents(sample_jobs())
+
+    assert documents[0] == {
+        'id': 'in-1',
+        'title': 'AI Engineer',
+        'date_posted': '2025-08-04',
+        'min_amount': 100000.0,
+        'is_remote': True,
+        'vacancy_count': 3,
+        'scraped_at': '2025-08-04T10:30:00',
+    }
+    assert documents[1]['title'] is None
+    assert documents[1]['date_posted'] is None
+    assert documents[1]['min_amount'] is None
+    assert documents[1]['vacancy_count'] is None
+    assert documents[1]['scraped_at'] is None
+    for value in documents[0].values():
+        assert type(value) in (str, float, int, bool)
+
+
+def test_mixed_columns_fall_back_per_cell():
+    jobs = pd.DataFrame({'posted': [datetime.date(2025, 1, 2), 'yesterday', np.float64(1.5)]})
+    assert normalize_job_frame(jobs)['posted'].tolist() == ['2025-01-02', 'yesterday', 1.5]
+
+
+def test_empty_frame():
+    assert frame_to_documents(pd.DataFrame()) == []
+
+
+def test_job_keys_match_per_job_keys():
+    jobs = pd.DataFrame({
+        'id': ['in-1', None, np.nan],
+        'job_url': ['https://x.com/a', 'HTTP://WWW.Indeed.com/viewjob?utm_source=mail&jk=42#top', None],
+        'title': ['A', 'B', 'Data Scientist '],
+        'company': ['X', 'Y', 'Acme'],
+        'location': ['Remote', None, 'Dallas'],
+    })
+    keys = job_keys(jobs).tolist()
+
+    assert keys == ['id:in-1', 'url:https://indeed.com/viewjob?jk=42', 'text:data scientist|acme|dallas']
+    assert keys == [job_key(job) for job in jobs.to_dict('records')]
+
+
+def test_canonical_job_url_ignores_tracking_noise():
+    assert canonical_job_url('https://www.linkedin.com/jobs/view/123/?trk=abc') == canonical_job_url('https://linkedin.com/jobs/view/123')
+    assert canonical_job_url('') is None
+
+
+if __name__ == "__main__":
+    test_documents_contain_only_python_values()
+    test_mixed_columns_fall_back_per_cell()
+    test_empty_frame()
+    test_job_keys_match_per_job_keys()
+    test_canonical_job_url_ignores_tracking_noise()
+    print("✅ job record tests passed")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import threading
+
+import pytest
+
+import firebase_config
+from job_records import job_document_id
+from job_stats import company_registers, estimate_cardinality
+
+
+JOBS = [
+    {'id': 'a', 'company': 'Acme', 'is_remote': True, 'min_amount': 100000.0, 'max_amount': 120000.0},
+    {'id': 'b', 'company': 'Acme', 'is_remote': False, 'min_amount': None, 'max_amount': None},
+    {'id': 'c', 'company': 'Globex', 'is_remote': False, 'min_amount': 80000.0, 'max_amount': 100000.0},
+]
+
+
+def test_stats_are_a_single_read_after_ingest(db):
+    # The first read of an empty database builds and marks the stats doc
+    assert firebase_config.get_global_stats()['total_jobs'] == 0
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    db.reset_stats()
+
+    stats = firebase_config.get_global_stats()
+
+    assert stats == {'total_jobs': 3, 'remote_jobs': 1, 'avg_salary': 100000, 'unique_companies': 2}
+    assert db.stats['reads'] == 1
+
+
+def test_reingest_updates_instead_of_double_counting(db):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.save_jobs_bulk([{**JOBS[0], 'is_remote': False}], user_id='u1')
+
+    stats = firebase_config.get_global_stats()
+    assert stats['total_jobs'] == 3
+    assert stats['remote_jobs'] == 0
+
+
+def test_apply_and_delete_keep_counters_in_sync(db):
+    firebase_config.get_global_stats()
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+
+    assert firebase_config.mark_job_applied(job_document_id(JOBS[0], 'u1'), 'u1')
+    assert firebase_config.delete_job(job_document_id(JOBS[2], 'u1'), 'u1')
+    assert firebase_config.delete_job('missing', 'u1')
+
+    stats = firebase_config.get_global_stats()
+    assert stats['total_jobs'] == 1
+    assert stats['remote_jobs'] == 0
+    assert stats['avg_salary'] == 0
+
+    # The company sketch only grows; a rebuild brings it back to the truth
+    assert stats['unique_companies'] == 2
+    assert firebase_config.rebuild_global_stats()['unique_companies'] == 1
+
+
+def test_stats_written_before_the_first_rebuild_are_rebuilt_on_read(db):
+    for job in JOBS[:2]:
+        db.collection('jobs').add({**job, 'status': 'active'})
+    # Deltas from an ingest that predates the rebuilt_at marker
+    db.collection('stats').document('global').set({'total_jobs': 1, 'generation': 1})
+
+    assert firebase_config.get_user_stats('u1')['total_jobs_available'] == 2
+    assert firebase_config.get_global_stats()['total_jobs'] == 2
+    firebase_config.save_jobs_bulk(JOBS[2:], user_id='u1')
+    assert firebase_config.get_global_stats()['total_jobs'] == 3
+
+
+def test_concurrent_ingests_of_the_same_jobs_count_them_once(db, monkeypatch):
+    # Every ingest reads the jobs before any of them commits
+    barrier, waited, get_all = threading.Barrier(4), threading.local(), db.get_all
+
+    def read_then_wait(*args, **kwargs):
+        snapshots = list(get_all(*args, **kwargs))
+        if not getattr(waited, 'done', False):
+            waited.done = True
+            barrier.wait(timeout=5)
+        return iter(snapshots)
+
+    monkeypatch.setattr(db, 'get_all', read_then_wait)
+    threads = [threading.Thread(target=firebase_config.save_jobs_bulk, args=(JOBS, 'u1')) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert firebase_config.get_global_stats()['total_jobs'] == 3
+
+
+def test_stats_are_built_on_first_read(db):
+    for job in JOBS:
+        db.collection('jobs').add({**job, 'status': 'active'})
+
+    assert firebase_config.get_global_stats()['total_jobs'] == 3
+    assert db.collection('stats').document('global').get().exists
+
+
+def test_user_stats_use_counts_and_cache_until_a_write(db):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.save_jobs_bulk(JOBS[:1], user_id='u2')
+
+    assert firebase_config.get_user_stats('u1') == {'applied_jobs': 0, 'searches_performed': 3, 'total_jobs_available': 4}
+    db.reset_stats()
+    firebase_config.get_user_stats('u1')
+    assert db.stats['rpcs'] == 0
+
+    firebase_config.mark_job_applied(job_document_id(JOBS[1], 'u1'), 'u1')
+    assert firebase_config.get_user_stats('u1') == {'applied_jobs': 1, 'searches_performed': 2, 'total_jobs_available': 3}
+
+
+def test_user_stats_fall_back_to_maintained_counters(db, monkeypatch):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.mark_job_applied(job_document_id(JOBS[0], 'u1'), 'u1')
+    firebase_config.delete_job(job_document_id(JOBS[1], 'u1'), 'u1')
+
+    def no_count(self, alias=None):
+        raise NotImplementedError('count')
+
+    monkeypatch.setattr(type(db.collection('jobs')), 'count', no_count)
+    monkeypatch.setattr(type(db.collection('jobs').where('a', '==', 1)), 'count', no_count)
+    firebase_config.invalidate_user_stats('u1')
+
+    assert firebase_config.get_user_stats('u1') == {'applied_jobs': 1, 'searches_performed': 1, 'total_jobs_available': 1}
+
+
+def test_company_sketch_accuracy():
+    companies = [f'Company {i}' for i in range(5000)]
+    estimate = estimate_cardinality(company_registers(companies + companies[:100]))
+    assert abs(estimate - 5000) / 5000 < 0.1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
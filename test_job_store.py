@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import datetime
+import json
+
+import pandas as pd
+import pytest
+
+from job_store import JobStore, iter_json, migrate_legacy_csv
+
+
+def make_frame(count):
+    return pd.DataFrame({
+        'id': [f'job-{i}' for i in range(count)],
+        'title': [f'Engineer {i}' for i in range(count)],
+        'min_amount': [100000.0 if i % 2 else float('nan') for i in range(count)],
+        'is_remote': [bool(i % 3) for i in range(count)],
+        'date_posted': [datetime.date(2024, 1, 1 + i % 28) for i in range(count)],
+        'description': ['x' * 50 for _ in range(count)],
+    })
+
+
+def test_round_trip_keeps_types(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    assert store.write(make_frame(4)) == 4
+
+    jobs = store.read().to_pylist()
+
+    assert jobs[0] == {'id': 'job-0', 'title': 'Engineer 0', 'min_amount': None, 'is_remote': False,
+                       'date_posted': '2024-01-01', 'description': 'x' * 50}
+    assert jobs[1]['min_amount'] == 100000.0
+    assert jobs[1]['is_remote'] is True
+
+
+def test_projection_and_row_ranges(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(make_frame(100))
+
+    page = store.read(columns=['id', 'title', 'not_stored'], offset=40, limit=10)
+
+    assert page.column_names == ['id', 'title']
+    assert page.num_rows == 10
+    assert page['id'][0].as_py() == 'job-40'
+
+
+def test_find_export_and_clear(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(make_frame(3))
+
+    assert store.find('id', 'job-2')['title'] == 'Engineer 2'
+    assert store.find('id', 'missing') is None
+    store.export_csv(str(tmp_path / 'jobs.csv'))
+    assert len(pd.read_csv(tmp_path / 'jobs.csv')) == 3
+    store.clear()
+    assert not store.exists()
+    with pytest.raises(FileNotFoundError):
+        store.read()
+
+
+def test_mixed_columns_are_stored_as_text(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(pd.DataFrame({'id': ['a', 'b'], 'salary': [120000, 'competitive']}))
+
+    assert [job['salary'] for job in store.read().to_pylist()] == ['120000', 'competitive']
+
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    make_frame(5).to_csv(tmp_path / 'jobs.csv', index=False)
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+
+    assert migrate_legacy_csv(store, str(tmp_path / 'jobs.csv')) == 5
+    assert migrate_legacy_csv(store, str(tmp_path / 'jobs.csv')) == 0
+    assert store.read().num_rows == 5
+
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(make_frame(3))
+
+    first = store.read()
+    assert store.read(columns=['id']).num_rows == 3
+    assert store.stats()['hits'] == 1
+
+    store.write(make_frame(5))
+    assert store.read().num_rows == 5
+    assert store.stats()['misses'] == 2
+    assert first.num_rows == 3
+
+
+def test_merge_keeps_other_searches_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    assert store.merge(make_frame(3)) == 3
+
+    update = make_frame(5).iloc[2:].assign(title='Updated')
+    assert store.merge(update) == 5
+
+    jobs = {job['id']: job['title'] for job in store.read(columns=['id', 'title']).to_pylist()}
+    assert jobs == {'job-0': 'Engineer 0', 'job-1': 'Engineer 1', 'job-2': 'Updated',
+                    'job-3': 'Updated', 'job-4': 'Updated'}
+
+
+def test_iter_json_streams_batches(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.arrow'))
+    store.write(make_frame(7))
+    table = store.read(columns=['id', 'min_amount'])
+
+    chunks = list(iter_json(table, batch_size=3))
+    assert len(chunks) == 5
+    assert json.loads(''.join(chunks)) == table.to_pylist()
+
+    lines = ''.join(iter_json(table, ndjson=True, batch_size=3)).splitlines()
+    assert [json.loads(line) for line in lines] == table.to_pylist()
+    assert ''.join(iter_json(table.slice(0, 0))) == '[]'
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
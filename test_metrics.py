@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+
+import pytest
+
+import firebase_config
+import metrics
+import server
+from job_records import job_document_id
+from job_repository import FirestoreJobRepository
+
+
+def make_jobs(count):
+    return [{'id': f'job-{i}', 'title': f'Engineer {i}', 'company': 'Acme'} for i in range(count)]
+
+
+def totals(function):
+    rpcs = sum(value for (name, _), value in metrics.FIRESTORE_RPCS._values.items() if name == function)
+    return rpcs, metrics.FIRESTORE_READS.value(function=function), metrics.FIRESTORE_WRITES.value(function=function)
+
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.Registry()
+    requests = registry.counter('requests_total', 'Requests', ['route'])
+    latency = registry.histogram('latency_seconds', 'Latency', ['route'], buckets=(0.1, 1))
+    requests.inc(route='/a"b')
+    latency.observe(0.5, route='/a')
+    latency.observe(2, route='/a')
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/a\\"b"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'latency_seconds_sum{route="/a"} 2.5' in lines
+    assert 'latency_seconds_count{route="/a"} 2' in lines
+
+
+def test_firestore_traffic_is_counted_per_function(db):
+    before = totals('save_jobs_bulk'), totals('get_jobs_page')
+    db.reset_stats()
+
+    firebase_config.save_jobs_bulk(make_jobs(30), 'u1')
+    firebase_config.get_jobs_page('u1', page_size=10)
+
+    saved, listed = totals('save_jobs_bulk'), totals('get_jobs_page')
+    assert saved[0] - before[0][0] + listed[0] - before[1][0] == db.stats['rpcs']
+    assert saved[1] - before[0][1] + listed[1] - before[1][1] == db.stats['reads']
+    assert saved[2] - before[0][2] == db.stats['writes']
+
+
+def test_nested_calls_are_attributed_to_the_entry_point(db):
+    firebase_config.save_jobs_bulk(make_jobs(3), 'u1')
+    before = totals('mark_job_applied'), totals('mark_jobs_applied_bulk')
+
+    assert firebase_config.mark_job_applied(job_document_id(make_jobs(1)[0], 'u1'), 'u1')
+
+    assert totals('mark_job_applied')[2] > before[0][2]
+    assert totals('mark_jobs_applied_bulk') == before[1]
+
+
+def test_metrics_endpoint_reports_routes_and_their_firestore_usage(db):
+    firebase_config.save_jobs_bulk(make_jobs(5), 'u1')
+    server.use_storage(FirestoreJobRepository())
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'u1'
+    before = metrics.HTTP_FIRESTORE_READS.value(route='/api/jobs')
+
+    assert client.get('/api/jobs').status_code == 200
+    assert metrics.request_usage() is None
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert metrics.HTTP_FIRESTORE_READS.value(route='/api/jobs') >= before + 5
+    assert 'scout4me_http_request_duration_seconds_count{method="GET",route="/api/jobs",status="200"}' in body
+    assert 'scout4me_firestore_reads_total{function="get_jobs_page"}' in body
+
+
+def test_json_logs_carry_extra_fields():
+    record = logging.LogRecord('server', logging.INFO, __file__, 1, 'Found %d jobs', (3,), None)
+    record.jobs = 3
+
+    entry = json.loads(metrics.JsonFormatter().format(record))
+
+    assert entry['message'] == 'Found 3 jobs'
+    assert entry['jobs'] == 3
+    assert metrics.KeyValueFormatter().format(record).endswith('Found 3 jobs jobs=3')
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
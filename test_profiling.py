@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import time
+from collections import Counter
+
+import pytest
+from flask import Flask, jsonify
+
+import profiling
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_samples_the_target_thread_within_its_overhead_budget():
+    profile = profiling.Profile('busy', interval=0.001, max_overhead=0.05).start()
+    busy_loop(0.2)
+    profile.stop()
+
+    assert profile.samples > 5
+    assert any('busy_loop (test_profiling.py' in stack[-1] for stack in profile.stacks)
+    assert profile.overhead < 0.1
+
+
+def test_profile_stops_after_max_seconds():
+    profile = profiling.Profile('long', interval=0.001, max_seconds=0.05).start()
+    busy_loop(0.15)
+    profile.stop()
+
+    assert profile.truncated
+    assert profile.samples < 100
+
+
+def test_dumps_round_trip_and_merge_by_route(tmp_path):
+    first = Counter({('main', 'handler', 'json'): 3, ('main', 'handler'): 1})
+    second = Counter({('main', 'handler', 'json'): 2, ('main', 'firestore'): 4})
+    (tmp_path / 'api_stats.1.100.collapsed').write_text(profiling.to_collapsed(first))
+    (tmp_path / 'api_stats.2.200.speedscope.json').write_text(json.dumps(profiling.to_speedscope({'/api/stats': second})))
+    (tmp_path / 'api_jobs.1.300.collapsed').write_text(profiling.to_collapsed(Counter({('main',): 1})))
+
+    merged = profiling.merge_profiles([str(tmp_path)])
+
+    assert set(merged) == {'api_stats', 'api_jobs'}
+    assert merged['api_stats'] == first + second
+    assert profiling.merge_profiles([str(tmp_path)], route='/api/jobs') == {'api_jobs': Counter({('main',): 1})}
+    assert profiling.hottest_frames(merged['api_stats'], top=1) == [('json', 5, 5)]
+
+
+def test_admin_header_profiles_a_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    app = Flask(__name__)
+    profiling.init_app(app)
+    workers = []
+
+    @app.route('/api/slow')
+    def slow():
+        busy_loop(0.05)
+        workers.append(threading.Thread(target=profiling.propagate(lambda: busy_loop(0.02), 'worker')))
+        workers[-1].start()
+        return jsonify(True)
+
+    client = app.test_client()
+    assert client.get('/api/slow').headers.get('X-Profile-File') is None
+    workers[-1].join()
+    assert list(tmp_path.iterdir()) == []
+
+    response = client.get('/api/slow', headers={'X-Profile': 'secret'})
+    workers[-1].join()
+
+    assert (tmp_path / response.headers['X-Profile-File']).exists()
+    assert set(profiling.merge_profiles([str(tmp_path)])) == {'api_slow', 'api_slow_worker'}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
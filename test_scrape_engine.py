@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+import os
+import time
+
+import pandas as pd
+
+from scrape_cache import ScrapeCache, make_key
+import scrape_engine
+from scrape_engine import scrape_jobs_parallel
+
+
+def fake_scraper(delays, failing=()):
+    def scrape(site_name, **kwargs):
+        site = site_name[0]
+        time.sleep(delays.get(site, 0))
+        if site in failing:
+            raise RuntimeError(f"{site} blocked")
+        return pd.DataFrame([{'site': site, 'title': f"{kwargs['search_term']} at {site}"}])
+    return scrape
+
+
+def test_merges_sites_in_requested_order():
+    scraper = fake_scraper({'indeed': 0.05, 'google': 0})
+    jobs, reports = scrape_jobs_parallel('AI engineer', 'Dallas, TX', sites=['indeed', 'google'], scraper=scraper, cache=False)
+
+    assert list(jobs['site']) == ['indeed', 'google']
+    assert [r['jobs_count'] for r in reports] == [1, 1]
+    assert all(r['error'] is None for r in reports)
+
+
+def test_slow_site_times_out_without_blocking_others():
+    scraper = fake_scraper({'linkedin': 2, 'indeed': 0})
+    started = time.monotonic()
+    jobs, reports = scrape_jobs_parallel(
+        'AI engineer', 'Dallas, TX', sites=['indeed', 'linkedin'],
+        site_timeouts={'linkedin': 0.2}, scraper=scraper, cache=False,
+    )
+
+    assert time.monotonic() - started < 1
+    assert list(jobs['site']) == ['indeed']
+    assert reports[1] == {'site': 'linkedin', 'jobs_count': 0, 'elapsed': reports[1]['elapsed'], 'error': 'timed out', 'cached': False}
+
+
+def test_queued_sites_get_their_full_timeout(monkeypatch):
+    monkeypatch.setattr(scrape_engine, 'MAX_WORKERS', 1)
+    scraper = fake_scraper({'indeed': 0.15, 'google': 0.1})
+    jobs, reports = scrape_jobs_parallel(
+        'AI engineer', 'Dallas, TX', sites=['indeed', 'google'],
+        site_timeouts={'indeed': 0.3, 'google': 0.2}, scraper=scraper, cache=False,
+    )
+
+    # google waits behind indeed for longer than its own timeout, but only its scrape is timed
+    assert list(jobs['site']) == ['indeed', 'google']
+    assert all(r['error'] is None for r in reports)
+
+
+def test_timed_out_scrapes_do_not_hold_up_later_searches(monkeypatch):
+    monkeypatch.setattr(scrape_engine, 'MAX_WORKERS', 1)
+    scraper = fake_scraper({'linkedin': 1})
+    scrape_jobs_parallel('AI engineer', 'Dallas, TX', sites=['linkedin'],
+                         site_timeouts={'linkedin': 0.05}, scraper=scraper, cache=False)
+    started = time.monotonic()
+    jobs, reports = scrape_jobs_parallel('AI engineer', 'Dallas, TX', sites=['indeed'],
+                                         site_timeouts={'indeed': 0.5}, scraper=scraper, cache=False)
+
+    assert time.monotonic() - started < 0.5
+    assert reports[0]['error'] is None
+
+
+def test_failed_site_is_reported():
+    completed = []
+    scraper = fake_scraper({}, failing={'zip_recruiter'})
+    jobs, reports = scrape_jobs_parallel(
+        'AI engineer', 'Dallas, TX', sites=['zip_recruiter', 'google'], scraper=scraper, cache=False,
+        on_site_done=lambda report, done, total: completed.append((report['site'], done, total)),
+    )
+
+    assert len(jobs) == 1
+    assert reports[0]['error'] == 'zip_recruiter blocked'
+    assert [done for _, done, _ in completed] == [1, 2]
+    assert {site for site, _, _ in completed} == {'zip_recruiter', 'google'}
+
+
+def test_cache_skips_fresh_sites_and_rescrapes_failed_ones(tmp_path):
+    calls = []
+
+    def scraper(site_name, **kwargs):
+        calls.append(site_name[0])
+        return fake_scraper({}, failing={'linkedin'} if len(calls) <= 2 else ())(site_name, **kwargs)
+
+    cache = ScrapeCache(ttl=60, max_entries=10, cache_dir=str(tmp_path))
+    scrape_jobs_parallel('AI engineer', 'Dallas, TX', sites=['indeed', 'linkedin'], scraper=scraper, cache=cache)
+    jobs, reports = scrape_jobs_parallel('  ai ENGINEER', 'dallas, tx ', sites=['indeed', 'linkedin'], scraper=scraper, cache=cache)
+
+    assert sorted(calls) == ['indeed', 'linkedin', 'linkedin']
+    assert [r['cached'] for r in reports] == [True, False]
+    assert len(jobs) == 2
+
+    # A fresh process only has the on-disk tier
+    restarted = ScrapeCache(ttl=60, max_entries=10, cache_dir=str(tmp_path))
+    key = make_key('AI engineer', 'Dallas, TX', 72, 20, ['indeed'])
+    assert restarted.get(key) is not None
+    assert restarted.stats()['disk_hits'] == 1
+
+
+def test_cache_key_covers_every_scrape_argument():
+    key = make_key('AI engineer', 'Dallas, TX', 72, 20, ['indeed'])
+
+    assert make_key(' ai ENGINEER', 'dallas, tx', 72, 20, ['Indeed'], None, 'usa') == key
+    assert make_key('AI engineer', 'Dallas, TX', 72, 20, ['indeed'], google_search_term='ml jobs') != key
+    assert make_key('AI engineer', 'Dallas, TX', 72, 20, ['indeed'], country_indeed='Canada') != key
+    assert make_key('AI engineer', 'Dallas, TX', 72, 20, ['indeed'], is_remote=True) != key
+
+
+def test_cache_evicts_least_recently_used_and_expires():
+    cache = ScrapeCache(ttl=60, max_entries=2)
+    frame = pd.DataFrame([{'title': 'x'}])
+    cache.put('a', frame)
+    cache.put('b', frame)
+    cache.get('a')
+    cache.put('c', frame)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+
+    cache.ttl = 0.01
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['expired'] == 1
+
+
+def test_disk_entry_removed_while_loading_is_still_served(tmp_path, monkeypatch):
+    frame = pd.DataFrame([{'title': 'x'}])
+    ScrapeCache(ttl=60, cache_dir=str(tmp_path)).put('a', frame)
+    read_pickle = pd.read_pickle
+
+    def read_then_remove(path):
+        # Another process clears the cache right after this one loads the file
+        jobs = read_pickle(path)
+        os.remove(path)
+        return jobs
+
+    monkeypatch.setattr(pd, 'read_pickle', read_then_remove)
+    cache = ScrapeCache(ttl=60, cache_dir=str(tmp_path))
+
+    assert cache.get('a').equals(frame)
+    assert cache.get('b') is None
+    assert cache.stats()['disk_hits'] == 1
+
+
+if __name__ == "__main__":
+    test_merges_sites_in_requested_order()
+    test_slow_site_times_out_without_blocking_others()
+    test_failed_site_is_reported()
+    test_cache_key_covers_every_scrape_argument()
+    test_cache_evicts_least_recently_used_and_expires()
+    print("✅ scrape engine tests passed")
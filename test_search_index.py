@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+import time
+
+import pytest
+
+import firebase_config
+from job_records import job_document_id
+from search_index import PersistentSearchIndex, SearchIndex, tokenize
+
+
+JOBS = [
+    {'id': 'a', 'title': 'Machine Learning Engineer', 'company': 'Acme', 'location': 'Dallas, TX',
+     'description': 'Train models in Python and PyTorch.'},
+    {'id': 'b', 'title': 'Frontend Developer', 'company': 'Webco', 'location': 'Remote',
+     'description': 'React and TypeScript. Some machine learning exposure is a plus.'},
+    {'id': 'c', 'title': 'C++ Engineer', 'company': 'Acme', 'location': 'Austin, TX',
+     'description': 'Low latency systems.', 'skills': ['c++', 'linux']},
+]
+
+
+def build_index():
+    index = SearchIndex()
+    index.add_many((job['id'], job) for job in JOBS)
+    return index
+
+
+def test_tokenize_keeps_language_names():
+    assert tokenize('Senior C++ / C# engineer, and the Python team') == ['senior', 'c++', 'c#', 'engineer', 'python', 'team']
+
+
+def test_title_matches_outrank_description_matches():
+    results = build_index().search('machine learning')
+
+    assert [hit['id'] for hit in results['results']] == ['a', 'b']
+    assert results['total'] == 2
+    assert results['results'][0]['title'] == 'Machine Learning Engineer'
+
+
+def test_filters_exclusions_and_removal():
+    index = build_index()
+
+    assert [hit['id'] for hit in index.search('engineer', {'company': 'Acme', 'location': 'Austin, TX'})['results']] == ['c']
+    assert [hit['id'] for hit in index.search('engineer', exclude={'c'})['results']] == ['a']
+    assert index.remove(['a', 'missing']) == 1
+    assert [hit['id'] for hit in index.search('engineer')['results']] == ['c']
+    with pytest.raises(ValueError):
+        index.search('engineer', {'salary': 1})
+
+
+def test_reindexing_replaces_the_old_version():
+    index = build_index()
+    index.add('a', {**JOBS[0], 'title': 'Data Analyst', 'description': ''})
+
+    assert index.search('pytorch')['total'] == 0
+    assert [hit['id'] for hit in index.search('analyst')['results']] == ['a']
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    index = PersistentSearchIndex(path, save_interval=3600)
+    index.add_many((job['id'], job) for job in JOBS)
+    assert index.flush()
+    index.add('d', {'title': 'Rust Engineer'})
+    assert not index.flush()
+    assert index.flush(force=True)
+
+    loaded = PersistentSearchIndex(path)
+    assert loaded.load()
+    assert [hit['id'] for hit in loaded.search('rust')['results']] == ['d']
+
+
+def test_autosave_runs_off_the_writing_thread(tmp_path):
+    path = tmp_path / 'index.pkl'
+    index = PersistentSearchIndex(str(path), save_interval=0.01)
+    index.start_autosave()
+    try:
+        index.add_many((job['id'], job) for job in JOBS)
+        deadline = time.time() + 5
+        while not path.exists() and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        index.stop_autosave(timeout=5)
+
+    loaded = PersistentSearchIndex(str(path))
+    assert loaded.load()
+    assert len(loaded) == len(JOBS)
+
+
+def test_ingest_apply_and_delete_keep_the_index_current(db):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.save_jobs_bulk(JOBS[:1], user_id='u2')
+    ml_id = job_document_id(JOBS[0], 'u1')
+
+    assert [hit['id'] for hit in firebase_config.search_jobs('pytorch', 'u1')['results']] == [ml_id]
+    assert firebase_config.search_jobs('pytorch')['total'] == 2
+
+    firebase_config.mark_job_applied(ml_id, 'u1')
+    firebase_config.delete_jobs_bulk([job_document_id(JOBS[2], 'u1')], 'u1')
+    assert firebase_config.search_jobs('pytorch', 'u1')['total'] == 0
+    assert firebase_config.search_jobs('engineer', 'u1')['total'] == 0
+
+    assert firebase_config.rebuild_search_index() == 2
+    assert firebase_config.search_jobs('machine learning', 'u1')['total'] == 1
+
+
+
+def test_facets_count_top_values_per_field():
+    index = build_index()
+
+    facets = index.facets(top_n=1)
+
+    assert facets['company'] == [{'value': 'Acme', 'count': 2}]
+    assert len(facets['location']) == 1
+    assert facets['job_type'] == []
+
+
+def test_facets_respect_other_filters_but_not_their_own():
+    index = build_index()
+
+    facets = index.facets({'company': 'Acme', 'location': 'Dallas, TX'})
+
+    assert facets['company'] == [{'value': 'Acme', 'count': 1}]
+    assert facets['location'] == [{'value': 'Austin, TX', 'count': 1}, {'value': 'Dallas, TX', 'count': 1}]
+
+
+def test_facet_tables_follow_adds_removes_and_reloads(tmp_path):
+    index = build_index()
+    index.add('c', {**JOBS[2], 'company': 'Initech'})
+    index.remove(['a'])
+
+    assert index.facets()['company'] == [{'value': 'Initech', 'count': 1}, {'value': 'Webco', 'count': 1}]
+    assert index.facets(exclude={'b'})['company'] == [{'value': 'Initech', 'count': 1}]
+
+    index.save(str(tmp_path / 'index.pkl'))
+    loaded = SearchIndex()
+    loaded.load(str(tmp_path / 'index.pkl'))
+    assert loaded.facets() == index.facets()
+
+
+def test_job_facets_are_per_user_and_skip_applied_jobs(db):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.save_jobs_bulk(JOBS, user_id='u2')
+    firebase_config.mark_job_applied(job_document_id(JOBS[0], 'u1'), 'u1')
+
+    facets = firebase_config.get_job_facets('u1')
+    assert facets['company'] == [{'value': 'Acme', 'count': 1}, {'value': 'Webco', 'count': 1}]
+    assert firebase_config.get_job_facets()['company'][0] == {'value': 'Acme', 'count': 3}
+
+    # Once the applied IDs are cached, facets don't touch Firestore
+    db.reset_stats()
+    firebase_config.get_job_facets('u1', {'company': 'Acme'})
+    assert db.stats['rpcs'] == 0
+
+
+def test_index_resyncs_after_other_processes_write(db, monkeypatch):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    local = firebase_config._search_index_override
+    # Another worker: same database, its own index
+    monkeypatch.setattr(firebase_config, '_search_index_override', SearchIndex())
+    firebase_config.delete_jobs_bulk([job_document_id(JOBS[2], 'u1')], user_id='u1')
+    firebase_config.save_job_to_firebase({'id': 'd', 'title': 'Rust Engineer', 'company': 'Initech'}, 'u1')
+    monkeypatch.setattr(firebase_config, '_search_index_override', local)
+    assert firebase_config.search_jobs('rust')['total'] == 0
+
+    # Checked at most once per interval
+    assert firebase_config.sync_search_index() is None
+    monkeypatch.setattr(firebase_config, 'SEARCH_INDEX_SYNC_INTERVAL', 0)
+    firebase_config.sync_search_index().join()
+
+    assert firebase_config.search_jobs('rust')['total'] == 1
+    assert firebase_config.get_job_facets()['company'] == [{'value': 'Acme', 'count': 1}, {'value': 'Initech', 'count': 1},
+                                                           {'value': 'Webco', 'count': 1}]
+    assert firebase_config.sync_search_index() is None
+
+
+def test_own_writes_keep_the_index_current_without_rescans(db, monkeypatch):
+    monkeypatch.setattr(firebase_config, 'SEARCH_INDEX_SYNC_INTERVAL', 0)
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    firebase_config.mark_job_applied(job_document_id(JOBS[0], 'u1'), 'u1')
+    firebase_config.delete_jobs_bulk([job_document_id(JOBS[1], 'u1'), 'missing'], user_id='u1')
+    firebase_config.rebuild_global_stats()
+
+    assert firebase_config.sync_search_index() is None
+    assert firebase_config.search_jobs('engineer')['total'] == 1
+
+
+def test_saved_index_is_trusted_only_when_its_generation_matches(db, tmp_path, monkeypatch):
+    firebase_config.save_jobs_bulk(JOBS, user_id='u1')
+    path = str(tmp_path / 'index.pkl')
+    saved = PersistentSearchIndex(path)
+    saved.replace_all(((doc.id, doc.to_dict()) for doc in db.collection('jobs').stream()), data_generation=1)
+    saved.flush(force=True)
+
+    restarted = PersistentSearchIndex(path)
+    restarted.load()
+    monkeypatch.setattr(firebase_config, '_search_index_override', restarted)
+    assert firebase_config.ensure_search_index() is None
+
+    # Another process writes after the index was saved
+    monkeypatch.setattr(firebase_config, '_search_index_override', SearchIndex())
+    firebase_config.save_job_to_firebase({'id': 'd', 'title': 'Rust Engineer'}, 'u1')
+    restarted.load()
+    monkeypatch.setattr(firebase_config, '_search_index_override', restarted)
+    firebase_config.ensure_search_index().join()
+    assert restarted.data_generation == 2
+    assert firebase_config.search_jobs('rust')['total'] == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import pytest
+
+import search_queue
+from search_queue import QueueFull, submit_search, get_search_status, latest_search
+
+
+def wait_for(search_id, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = get_search_status(search_id)
+        if status['state'] in ('completed', 'failed'):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"search {search_id} did not finish")
+
+
+def test_searches_have_independent_status():
+    release = threading.Event()
+
+    def run(params, status):
+        release.wait(1)
+        status['jobs_count'] = params['count']
+        status['progress'] = 100
+
+    first = submit_search(run, {'count': 3}, owner='alice')
+    second = submit_search(run, {'count': 7}, owner='bob')
+    assert get_search_status(first)['state'] in ('queued', 'running')
+
+    release.set()
+    assert wait_for(first)['jobs_count'] == 3
+    assert wait_for(second)['jobs_count'] == 7
+    assert latest_search(owner='alice')['search_id'] == first
+
+
+def test_exceptions_mark_search_failed():
+    def run(params, status):
+        raise RuntimeError('boom')
+
+    status = wait_for(submit_search(run, {}))
+    assert status['state'] == 'failed'
+    assert status['errors'] == ['boom']
+    assert status['is_running'] is False
+
+
+def test_full_queue_refuses_new_searches(monkeypatch):
+    monkeypatch.setattr(search_queue, 'MAX_QUEUED_SEARCHES', 0)
+    monkeypatch.setattr(search_queue, 'SEARCH_WORKERS', 1)
+    release = threading.Event()
+
+    first = submit_search(lambda params, status: release.wait(1), {})
+    with pytest.raises(QueueFull):
+        submit_search(lambda params, status: None, {})
+
+    release.set()
+    wait_for(first)
+    wait_for(submit_search(lambda params, status: None, {}))
+
+
+def test_unknown_search_id():
+    assert get_search_status('missing') is None
+
+
+if __name__ == "__main__":
+    test_searches_have_independent_status()
+    test_exceptions_mark_search_failed()
+    test_unknown_search_id()
+    print("✅ search queue tests passed")
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import server
+
+
+def test_demo_mode_serves_applied_jobs_and_stats():
+    server.use_storage(None)
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'demo-user-id'
+
+    applied = client.get('/api/applied-jobs')
+    assert applied.status_code == 200
+    assert applied.get_json() == {'jobs': [], 'next_cursor': None}
+
+    stats = client.get('/api/stats')
+    assert stats.status_code == 200
+    assert stats.get_json()['total_jobs'] == 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import secrets
+
+import pytest
+from flask import Flask, jsonify, session
+
+from session_store import CompactSessionInterface, SessionStore, SessionTooLarge, session_secret_key, store_key
+
+
+def test_store_caps_items_and_sessions():
+    store = SessionStore(ttl=60, max_entries=2, max_items=3)
+
+    store.set('a', 'jobs', list(range(10)))
+    assert store.get('a', 'jobs') == [7, 8, 9]
+
+    store.set('b', 'jobs', [1])
+    store.get('a', 'jobs')
+    store.set('c', 'jobs', [2])
+    # 'b' was least recently used
+    assert store.get('b', 'jobs') is None
+    assert store.get('a', 'jobs') == [7, 8, 9]
+    assert store.stats() == {'expired': 0, 'evicted': 1, 'sessions': 2}
+
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(ttl=0, max_entries=10)
+
+    store.set('a', 'jobs', [1])
+
+    assert store.get('a', 'jobs', []) == []
+    assert len(store) == 0
+    assert store.get(None, 'jobs', 'default') == 'default'
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.testing = True
+    app.session_interface = CompactSessionInterface(max_bytes=200)
+    store = SessionStore()
+
+    @app.route('/login')
+    def login():
+        session['user_id'] = 'u1'
+        store.set(store_key(session), 'demo_jobs', [{'title': 'x' * 100}] * 50)
+        return jsonify(len(store.get(session['sid'], 'demo_jobs')))
+
+    @app.route('/stash')
+    def stash():
+        session['demo_jobs'] = [{'id': secrets.token_hex(16)} for _ in range(50)]
+        return jsonify(True)
+
+    return app.test_client()
+
+
+def test_cookie_holds_identity_only(client):
+    response = client.get('/login')
+
+    assert response.get_json() == 50
+    cookie = response.headers['Set-Cookie']
+    assert len(cookie) < 200
+    assert 'x' * 20 not in cookie
+
+
+def test_large_sessions_are_rejected(client):
+    with pytest.raises(SessionTooLarge):
+        client.get('/stash')
+
+
+def test_placeholder_secret_keys_are_replaced():
+    assert session_secret_key('a-real-secret') == 'a-real-secret'
+    first, second = session_secret_key(''), session_secret_key('your-secret-key-here')
+    assert len(first) == 64 and first != second
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
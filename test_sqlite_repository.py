@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import job_sweeper
+from job_records import job_document_id
+from sqlite_repository import SQLiteJobRepository
+
+JOBS = [
+    {'id': 'a', 'title': 'Python Engineer', 'company': 'Acme', 'location': 'Dallas, TX', 'job_type': 'fulltime',
+     'is_remote': True, 'min_amount': 100000.0, 'max_amount': 120000.0, 'description': 'Python and SQL ' * 40},
+    {'id': 'b', 'title': 'Data Scientist', 'company': 'Acme', 'location': 'Austin, TX', 'job_type': 'contract',
+     'is_remote': False, 'min_amount': None, 'max_amount': None},
+    {'id': 'c', 'title': 'Rust Developer', 'company': 'Globex', 'location': 'Dallas, TX', 'job_type': 'fulltime',
+     'is_remote': False, 'min_amount': 80000.0, 'max_amount': 100000.0},
+]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SQLiteJobRepository(str(tmp_path / 'jobs.db'), batch_rows=2)
+    yield repo
+    repo.close()
+
+
+def doc_id(job, user_id='u1'):
+    return job_document_id(job, user_id)
+
+
+def test_schema_uses_wal_and_indexes(repo):
+    conn = repo._connect()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'jobs_status', 'jobs_user', 'jobs_location', 'jobs_company', 'jobs_job_type'} <= indexes
+
+    plan = ' '.join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE status = 'active' AND user_id = ? ORDER BY id", ('u1',)))
+    assert 'USING INDEX jobs_user' in plan or 'USING COVERING INDEX jobs_user' in plan
+
+
+def test_bulk_save_upserts_and_pages(repo):
+    report = repo.save_jobs_bulk(JOBS, user_id='u1')
+    assert report['saved'] == 3 and report['failed'] == 0
+
+    # Re-scraping upserts in place and merges new fields
+    repo.save_jobs_bulk([{**JOBS[1], 'title': 'Senior Data Scientist'}], user_id='u1')
+
+    first = repo.get_jobs_page('u1', page_size=2)
+    second = repo.get_jobs_page('u1', page_size=2, cursor=first['next_cursor'])
+    jobs = first['jobs'] + second['jobs']
+    assert second['next_cursor'] is None
+    assert sorted(job['id'] for job in jobs) == sorted(doc_id(job) for job in JOBS)
+    renamed = next(job for job in jobs if job['id'] == doc_id(JOBS[1]))
+    assert renamed['title'] == 'Senior Data Scientist'
+    # Listings return summary fields only
+    assert 'description' not in jobs[0] and 'description_snippet' in next(job for job in jobs if job['id'] == doc_id(JOBS[0]))
+    assert repo.get_job(doc_id(JOBS[0]), 'u1')['description'].startswith('Python')
+    assert repo.get_job(doc_id(JOBS[0]), 'someone-else') is None
+
+
+def test_filters(repo):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+
+    dallas = repo.get_jobs_page('u1', {'location': 'Dallas, TX', 'job_type': 'fulltime'})['jobs']
+    assert sorted(job['title'] for job in dallas) == ['Python Engineer', 'Rust Developer']
+    assert [job['title'] for job in repo.get_jobs('u1', {'is_remote': True})] == ['Python Engineer']
+    with pytest.raises(ValueError):
+        repo.get_jobs_page('u1', {'salary': 1})
+
+
+def test_apply_delete_and_stats(repo):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+    assert repo.get_global_stats() == {'total_jobs': 3, 'remote_jobs': 1, 'avg_salary': 100000, 'unique_companies': 2}
+    version = repo.get_data_version()
+
+    report = repo.mark_jobs_applied_bulk([doc_id(JOBS[0]), 'missing'], 'u1')
+    assert report['applied'] == 1
+    assert report['errors'] == [{'id': 'missing', 'error': 'Job not found'}]
+    assert repo.get_data_version() > version
+
+    applied = repo.get_applied_jobs_page('u1')['jobs']
+    assert [job['title'] for job in applied] == ['Python Engineer']
+    assert applied[0]['application_status'] == 'applied'
+    assert doc_id(JOBS[0]) not in {job['id'] for job in repo.get_jobs('u1')}
+
+    # Other users' jobs are not applied to or deleted on their behalf
+    assert repo.mark_jobs_applied_bulk([doc_id(JOBS[1])], 'u2')['errors'] == [{'id': doc_id(JOBS[1]), 'error': 'Job not found'}]
+    assert repo.delete_jobs_bulk([doc_id(JOBS[1])], user_id='u2')['deleted'] == 0
+    repo.delete_job(doc_id(JOBS[1]), 'u2')
+    assert repo.get_job(doc_id(JOBS[1]), 'u1') is not None
+    assert repo.delete_jobs_bulk([doc_id(JOBS[1])], user_id='u1')['deleted'] == 1
+
+    assert repo.get_user_stats('u1') == {'applied_jobs': 1, 'searches_performed': 1, 'total_jobs_available': 1}
+    assert repo.get_global_stats()['total_jobs'] == 1
+
+
+def test_search_and_facets_follow_writes(repo):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+
+    results = repo.search_jobs('python', 'u1')
+    assert [job['id'] for job in results['results']] == [doc_id(JOBS[0])]
+
+    repo.mark_job_applied(doc_id(JOBS[0]), 'u1')
+    assert repo.search_jobs('python', 'u1')['total'] == 0
+
+    repo.save_job({'id': 'd', 'title': 'Python Developer', 'company': 'Initech', 'location': 'Austin, TX'}, 'u1')
+    assert repo.search_jobs('python', 'u1')['results'][0]['company'] == 'Initech'
+    companies = {facet['value']: facet['count'] for facet in repo.get_job_facets('u1')['company']}
+    assert companies == {'Acme': 1, 'Globex': 1, 'Initech': 1}
+
+
+def test_search_index_picks_up_other_processes_writes(repo, tmp_path):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+    assert repo.search_jobs('rust', 'u1')['total'] == 1
+    other = SQLiteJobRepository(repo.path)
+    try:
+        other.delete_jobs_bulk([doc_id(JOBS[2])], user_id='u1')
+        other.save_job({'id': 'd', 'title': 'Go Developer', 'company': 'Initech'}, 'u1')
+    finally:
+        other.close()
+
+    assert repo.search_jobs('rust', 'u1')['total'] == 0
+    assert repo.search_jobs('go', 'u1')['total'] == 1
+    assert 'Globex' not in {facet['value'] for facet in repo.get_job_facets('u1')['company']}
+
+
+def test_expire_stale_jobs(repo):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+
+    assert repo.expire_stale_jobs(max_age_hours=1)['deleted'] == 0
+    report = repo.expire_stale_jobs(max_age_hours=-1, batch_size=2, pause=0)
+    assert report['deleted'] == 3
+    assert repo.get_jobs() == []
+
+
+def test_sweeper_expires_sqlite_jobs(repo):
+    repo.save_jobs_bulk(JOBS, user_id='u1')
+
+    assert job_sweeper.run_sweep(repo, max_age_hours=-1, pause=0)['deleted'] == 3
+    assert repo.get_jobs() == []
+
+
+def test_local_accounts(repo):
+    user_id = repo.create_user('Ada@example.com', 'hunter22', 'Ada')
+
+    assert user_id
+    assert repo.create_user('ada@example.com ', 'other', 'Impostor') is None
+    assert repo.verify_user_credentials('ada@example.com', 'hunter22') == {
+        'uid': user_id, 'email': 'ada@example.com', 'display_name': 'Ada'}
+    assert repo.verify_user_credentials('ada@example.com', 'wrong') is None
+    assert repo.verify_user_credentials('bob@example.com', 'hunter22') is None
+    stored = repo._connect().execute('SELECT password_hash FROM users').fetchone()[0]
+    assert 'hunter22' not in stored
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
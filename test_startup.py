@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import subprocess
+import sys
+
+import pytest
+
+import startup
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_importing_server_defers_heavy_dependencies():
+    loaded = run_python(
+        "import sys, server; "
+        "print(sorted(name for name in ('pandas', 'firebase_admin', 'google.cloud.firestore', 'jobspy') if name in sys.modules))"
+    )
+    assert loaded == '[]'
+
+
+def test_lazy_module_imports_on_first_use():
+    output = run_python(
+        "import sys; from startup import lazy_module; "
+        "colorsys = lazy_module('colorsys'); before = 'colorsys' in sys.modules; "
+        "colorsys.rgb_to_hsv(0, 0, 0); print(before, 'colorsys' in sys.modules)"
+    )
+    assert output == 'False True'
+
+
+def test_warm_up_records_times_and_failures():
+    calls = []
+
+    def build_index():
+        calls.append('json' in sys.modules)
+
+    def broken_task():
+        raise RuntimeError('no index')
+
+    startup.warm_up(['json', 'no_such_module_for_warm_up'], background=False, tasks=[build_index, broken_task])
+
+    report = startup.warm_up_report()
+    assert isinstance(report['json'], float)
+    assert report['no_such_module_for_warm_up'].startswith('ModuleNotFoundError')
+    assert calls == [True]
+    assert isinstance(report['build_index'], float)
+    assert report['broken_task'] == 'RuntimeError: no index'
+
+
+def test_profile_imports_reports_slowest_modules():
+    report = startup.profile_imports('json', top=3)
+
+    assert report['module'] == 'json'
+    assert 0 < len(report['imports']) <= 3
+    assert report['imports'][0]['cumulative_ms'] >= report['imports'][-1]['cumulative_ms']
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))